@@ -5,7 +5,18 @@ from tests.test_model import BasicTestModel
 from tests.test_space import TestLatLonGridAPI, TestGridComparison
 from tests.test_time import TestTimeDomainAPI, TestTimeDomainComparison
 from tests.test_utils.test_clock import TestClock
-from tests.test_component import TestSubstituteComponent
+from tests.test_utils.test_state import TestState
+from tests.test_utils.test_exchanger import TestExchanger
+from tests.test_utils.test_record import TestRecordStreamCompact
+from tests.test_utils.test_io import (
+    TestFileManager,
+    TestTimeIndex,
+    TestHyperslabReader,
+    TestFileIndex,
+)
+from tests.test_utils.test_remap import TestBlockRemap, TestSparseRemap
+from tests.test_component import TestSubstituteComponent, TestIOMemoryBudget
+from tests.test_data import TestDataSetFiles, TestClimatologicVariable
 import unifhy
 
 
@@ -39,7 +50,19 @@ if __name__ == "__main__":
     test_suite.addTests(test_loader.loadTestsFromTestCase(TestTimeDomainAPI))
     test_suite.addTests(test_loader.loadTestsFromTestCase(TestTimeDomainComparison))
     test_suite.addTests(test_loader.loadTestsFromTestCase(TestClock))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestState))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestExchanger))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestRecordStreamCompact))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestFileManager))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestTimeIndex))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestHyperslabReader))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestFileIndex))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestBlockRemap))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestSparseRemap))
     test_suite.addTests(test_loader.loadTestsFromTestCase(TestSubstituteComponent))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestIOMemoryBudget))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestDataSetFiles))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestClimatologicVariable))
 
     test_suite.addTests(doctest.DocTestSuite(unifhy.data))
     test_suite.addTests(doctest.DocTestSuite(unifhy.time))
@@ -99,7 +99,7 @@ class Dummy(NutrientOpenWaterComponent):
         return (
             # to exchanger
             {
-                "transfer_d": ancillary_d[11] * transfer_e
+                "transfer_d": ancillary_d * transfer_e
                 + state_a.get_timestep(0)[..., 0, 0],
                 "transfer_f": parameter_e * transfer_b,
                 "transfer_g": constant_d + transfer_b,
@@ -107,7 +107,7 @@ class Dummy(NutrientOpenWaterComponent):
             # component outputs
             {
                 "output_x": parameter_e * transfer_b + constant_d,
-                "output_y": ancillary_d[11][0] * transfer_e
+                "output_y": ancillary_d * transfer_e
                 - state_a.get_timestep(0)[..., 0, 0]
                 + transfer_p,
             },
@@ -40,12 +40,9 @@ void run_(int ny, int nx,
           // component outputs
           double *output_x, double *output_y)
 {
-  int h, j, k, l, m;
+  int j, k, l, m;
   int nv, nw;
-  int jklm, hjk, jk;
-
-  // time dimension for monthly ancillary
-  h = 11;
+  int jklm, jk;
 
   // dimensions for state division
   nw = 4;
@@ -54,8 +51,6 @@ void run_(int ny, int nx,
   for (j=0; j < ny; j++)
     for (k=0; k < nx; k++)
     {
-      // vectorisation of 3d-array (space with time)
-      hjk = k + nx * (j + ny * h);
       // vectorisation of 2d-array (space without time)
       jk = k + nx * j;
       // update states
@@ -72,7 +67,7 @@ void run_(int ny, int nx,
       m = 0;
       jklm = m + nv * (l + nw * (k + nx * j));
       // compute transfers to exchanger
-      transfer_d[jk] = (ancillary_d[hjk] * transfer_e[jk])
+      transfer_d[jk] = (ancillary_d[jk] * transfer_e[jk])
         + state_a_0[jklm];
       transfer_f[jk] = parameter_e[jk] * transfer_b[jk];
       transfer_g[jk] = constant_d + transfer_b[jk];
@@ -25,7 +25,7 @@ def initialise(double constant_d,
 def run(cnp.ndarray[cnp.npy_float64, ndim=2] transfer_b,
         cnp.ndarray[cnp.npy_float64, ndim=2] transfer_e,
         cnp.ndarray[cnp.npy_float64, ndim=2] transfer_p,
-        cnp.ndarray[cnp.npy_float64, ndim=3] ancillary_d,
+        cnp.ndarray[cnp.npy_float64, ndim=2] ancillary_d,
         cnp.ndarray[cnp.npy_float64, ndim=2] parameter_e,
         cnp.ndarray[cnp.npy_float64, ndim=4] state_a_m1,
         cnp.ndarray[cnp.npy_float64, ndim=4] state_a_0,
@@ -46,7 +46,7 @@ def run(cnp.ndarray[cnp.npy_float64, ndim=2] transfer_b,
         (ny, nx), dtype=np.float64)
 
     run_(ny, nx, &transfer_b[0, 0], &transfer_e[0, 0], &transfer_p[0, 0],
-         &ancillary_d[0, 0, 0], &parameter_e[0, 0],
+         &ancillary_d[0, 0], &parameter_e[0, 0],
          &state_a_m1[0, 0, 0, 0], &state_a_0[0, 0, 0, 0],
          constant_d, &transfer_d[0, 0],
          &transfer_f[0, 0], &transfer_g[0, 0],
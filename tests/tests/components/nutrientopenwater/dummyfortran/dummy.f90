@@ -28,7 +28,7 @@ subroutine run(y, x, &
     ! from exchanger
     real(kind=8), intent(in), dimension(y, x) :: transfer_b, transfer_e, transfer_p
     ! component ancillary data
-    real(kind=8), intent(in), dimension(12, y, x) :: ancillary_d
+    real(kind=8), intent(in), dimension(y, x) :: ancillary_d
     ! component parameters
     real(kind=8), intent(in), dimension(y, x) :: parameter_e
     ! component constants
@@ -45,12 +45,12 @@ subroutine run(y, x, &
 
     state_a_0 = state_a_m1 + 1
 
-    transfer_d = (ancillary_d(12,:,:) * transfer_e) + state_a_0(:,:,1,1)
+    transfer_d = (ancillary_d * transfer_e) + state_a_0(:,:,1,1)
     transfer_f = parameter_e * transfer_b
     transfer_g = constant_d + transfer_b
 
     output_x = (parameter_e * transfer_b) + constant_d
-    output_y = (ancillary_d(12,:,:) * transfer_e) - state_a_0(:,:,1,1) + transfer_p
+    output_y = (ancillary_d * transfer_e) - state_a_0(:,:,1,1) + transfer_p
 
 end subroutine run
 
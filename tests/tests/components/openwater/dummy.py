@@ -90,7 +90,7 @@ class Dummy(OpenWaterComponent):
         return (
             # to exchanger
             {
-                "transfer_l": ancillary_b[11] * transfer_m
+                "transfer_l": ancillary_b * transfer_m
                 + state_a.get_timestep(0)[..., 0, 0],
                 "transfer_n": parameter_c * transfer_j,
                 "transfer_o": constant_c + transfer_j,
@@ -99,7 +99,7 @@ class Dummy(OpenWaterComponent):
             # component outputs
             {
                 "output_x": parameter_c * transfer_j + constant_c,
-                "output_y": ancillary_b[11][0] * transfer_m
+                "output_y": ancillary_b * transfer_m
                 - state_a.get_timestep(0)[..., 0, 0],
             },
         )
@@ -240,3 +240,23 @@ class DummyC(Dummy):
         **kwargs
     ):
         dummyc.finalise()
+
+
+class DummyInPlace(Dummy):
+    # write outwards directly into the buffers given by the framework
+    _writes_outwards = True
+
+    def run(self, outwards, **kwargs):
+        to_exchanger, outputs = super().run(**kwargs)
+        for name, value in to_exchanger.items():
+            outwards[name][...] = value
+
+        return outwards, outputs
+
+
+class DummyOutOfPlace(Dummy):
+    # given buffers to write outwards into, but returning other arrays
+    _writes_outwards = True
+
+    def run(self, outwards, **kwargs):
+        return super().run(**kwargs)
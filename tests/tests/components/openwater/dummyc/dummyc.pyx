@@ -24,7 +24,7 @@ def initialise(double constant_c,
 
 def run(cnp.ndarray[cnp.npy_float64, ndim=2] transfer_j,
         cnp.ndarray[cnp.npy_float64, ndim=2] transfer_m,
-        cnp.ndarray[cnp.npy_float64, ndim=3] ancillary_b,
+        cnp.ndarray[cnp.npy_float64, ndim=2] ancillary_b,
         cnp.ndarray[cnp.npy_float64, ndim=2] parameter_c,
         cnp.ndarray[cnp.npy_float64, ndim=4] state_a_m1,
         cnp.ndarray[cnp.npy_float64, ndim=4] state_a_0,
@@ -45,7 +45,7 @@ def run(cnp.ndarray[cnp.npy_float64, ndim=2] transfer_j,
         (ny, nx), dtype=np.float64)
 
     run_(ny, nx, &transfer_j[0, 0], &transfer_m[0, 0],
-         &ancillary_b[0, 0, 0], &parameter_c[0, 0],
+         &ancillary_b[0, 0], &parameter_c[0, 0],
          &state_a_m1[0, 0, 0, 0], &state_a_0[0, 0, 0, 0],
          constant_c, &transfer_l[0, 0],
          &transfer_n[0, 0], &transfer_o[0, 0],
@@ -28,7 +28,7 @@ subroutine run(y, x, &
     ! from exchanger
     real(kind=8), intent(in), dimension(y, x) :: transfer_j, transfer_m
     ! component ancillary data
-    real(kind=8), intent(in), dimension(12, y, x) :: ancillary_b
+    real(kind=8), intent(in), dimension(y, x) :: ancillary_b
     ! component parameters
     real(kind=8), intent(in), dimension(y, x) :: parameter_c
     ! component constants
@@ -45,13 +45,13 @@ subroutine run(y, x, &
 
     state_a_0 = state_a_m1 + 1
 
-    transfer_l = (ancillary_b(12,:,:) * transfer_m) + state_a_0(:,:,1,1)
+    transfer_l = (ancillary_b * transfer_m) + state_a_0(:,:,1,1)
     transfer_n = parameter_c * transfer_j
     transfer_o = parameter_c + transfer_j
     transfer_p = state_a_0(:,:,1,1)
 
     output_x = (parameter_c * transfer_j) + constant_c
-    output_y = (ancillary_b(12,:,:) * transfer_m) - state_a_0(:,:,1,1)
+    output_y = (ancillary_b * transfer_m) - state_a_0(:,:,1,1)
 
 end subroutine run
 
@@ -214,3 +214,23 @@ class DummyC(Dummy):
         **kwargs
     ):
         dummyc.finalise()
+
+
+class DummyInPlace(Dummy):
+    # write outwards directly into the buffers given by the framework
+    _writes_outwards = True
+
+    def run(self, outwards, **kwargs):
+        to_exchanger, outputs = super().run(**kwargs)
+        for name, value in to_exchanger.items():
+            outwards[name][...] = value
+
+        return outwards, outputs
+
+
+class DummyOutOfPlace(Dummy):
+    # given buffers to write outwards into, but returning other arrays
+    _writes_outwards = True
+
+    def run(self, outwards, **kwargs):
+        return super().run(**kwargs)
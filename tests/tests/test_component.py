@@ -248,7 +248,7 @@ records = {
 }
 
 
-def get_dummy_component(category, kind, time_, space_, source):
+def get_dummy_component(category, kind, time_, space_, source, **kwargs):
     # get component class
     component_class = getattr(
         import_module("tests.components.{}".format(category)),
@@ -263,6 +263,9 @@ def get_dummy_component(category, kind, time_, space_, source):
     if category in ["surfacelayer", "nutrientsurfacelayer"]:
         spacedomain.land_sea_mask = get_dummy_land_sea_mask_field(space_resolution)
         spacedomain.flow_direction = get_dummy_flow_direction_field(space_resolution)
+    else:
+        # only components on a masked grid can compute land elements only
+        kwargs.pop("compact_land", None)
 
     dataset = get_dummy_dataset(category, time_resolution, space_resolution)
 
@@ -276,6 +279,7 @@ def get_dummy_component(category, kind, time_, space_, source):
             constants=constants[category],
             records=records[category][time_],
             io_slice=10,
+            **kwargs,
         )
     elif kind == "d":
         return unifhy.DataComponent(
@@ -360,12 +364,84 @@ class TestSubstituteComponent(unittest.TestCase):
                 nc = unifhy.NullComponent(td, sd, substituting_class)
                 self.assertEqual(nc.outwards_info, substituting_class._outwards_info)
 
+    def test_run_block_nullcomponent(self):
+        td = self.td
+        sd = self.sd
+
+        nc = unifhy.NullComponent(td, sd, unifhy.component.SurfaceLayerComponent)
+
+        to_exchanger, outputs = nc.run()
+        to_exchanger_block, outputs_block = nc.run_block(5)
+
+        self.assertEqual(to_exchanger.keys(), to_exchanger_block.keys())
+        self.assertEqual(outputs, outputs_block)
+        for name in to_exchanger:
+            self.assertEqual(to_exchanger_block[name].shape, (5, *sd.shape))
+            for i in range(5):
+                numpy.testing.assert_array_equal(
+                    to_exchanger_block[name][i], to_exchanger[name]
+                )
+
+    def test_plan_blocks_nullcomponent(self):
+        # blocks are planned for components implementing the optional
+        # 'run_block' method (which the base class does not define)
+        self.assertFalse(hasattr(unifhy.component.Component, "run_block"))
+
+        nc = unifhy.NullComponent(
+            self.td, self.sd, unifhy.component.SurfaceLayerComponent
+        )
+        nc.plan_blocks_([])
+        self.assertIsNotNone(nc._block_bounds)
+        self.assertEqual(nc._block_bounds[-1], self.td.time.size)
+
+
+class TestIOMemoryBudget(unittest.TestCase):
+    def test_io_slice_derived(self):
+        reference = get_dummy_component(
+            "surfacelayer", "c", "same_t", "same_s", "Python"
+        )
+        memory = reference.io_memory_per_step_()
+        self.assertGreater(memory, 0)
+
+        for compact_land in [False, True]:
+            with self.subTest(compact_land=compact_land):
+                component = get_dummy_component(
+                    "surfacelayer",
+                    "c",
+                    "same_t",
+                    "same_s",
+                    "Python",
+                    compact_land=compact_land,
+                    io_memory_budget=3 * memory,
+                )
+                memory_ = component.io_memory_per_step_()
+                # (records only hold land elements if compact)
+                if compact_land:
+                    self.assertLessEqual(memory_, memory)
+                else:
+                    self.assertEqual(memory_, memory)
+
+                # slice is the longest fitting in the budget, and it
+                # is used to read inputs and to write records
+                io_slice = component._io_slice
+                self.assertEqual(
+                    io_slice,
+                    min(int(3 * memory // memory_), component.timedomain.time.size),
+                )
+                for name in component._inputs_info:
+                    variable = component.datasubset[name]
+                    if isinstance(variable, unifhy.data.DynamicVariable):
+                        self.assertEqual(variable.reading_slice, io_slice)
+                for stream in component._record_streams.values():
+                    self.assertEqual(stream.writing_slice, io_slice)
+
 
 if __name__ == "__main__":
     test_loader = unittest.TestLoader()
     test_suite = unittest.TestSuite()
 
     test_suite.addTests(test_loader.loadTestsFromTestCase(TestSubstituteComponent))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestIOMemoryBudget))
 
     test_suite.addTests(doctest.DocTestSuite(unifhy.component))
 
@@ -1,7 +1,22 @@
 import unittest
 import doctest
+import os
+import shutil
+import tempfile
+from glob import glob
+import numpy as np
+import cftime
+import cf
 
 import unifhy
+from unifhy.data import (
+    ClimatologicVariable,
+    _expand_files,
+    _indices,
+    _read_fields,
+    _scans,
+    _scans_maxsize,
+)
 
 
 def get_dummy_dataset(component_category, time_res, space_res):
@@ -18,10 +33,163 @@ def get_dummy_component_substitute_dataset(component_category, time_res, space_r
     )
 
 
+class TestDataSetFiles(unittest.TestCase):
+    def test_expand_local_files(self):
+        # wildcards are resolved into absolute paths of existing files
+        filepaths = _expand_files("data/dummy_subsurface_data_*daily_1deg.nc")
+        self.assertListEqual(
+            filepaths,
+            [
+                os.path.abspath("data/dummy_subsurface_data_4daily_1deg.nc"),
+                os.path.abspath("data/dummy_subsurface_data_daily_1deg.nc"),
+            ],
+        )
+
+    def test_expand_remote_or_missing_files(self):
+        # names not matching local files are left to cf-python
+        names = [
+            "https://example.org/thredds/dodsC/dummy_data.nc",
+            "data/dummy_missing_data.nc",
+        ]
+        self.assertListEqual(_expand_files(names), names)
+
+    def test_scans_bounded(self):
+        # only the most recent scans are kept in memory
+        filepaths = sorted(glob("data/dummy_*_data_*.nc"))[: _scans_maxsize + 2]
+        for filepath in filepaths:
+            _read_fields(filepath)
+        self.assertEqual(len(_scans), _scans_maxsize)
+        # and reading the same file again reuses its scan
+        _read_fields(filepaths[-1])
+        self.assertEqual(len(_scans), _scans_maxsize)
+        self.assertEqual(next(reversed(_scans))[0][0], os.path.abspath(filepaths[-1]))
+
+    def test_select_from_same_directory(self):
+        # variables selected separately from the same directory reuse
+        # its index, which is re-created if the index directory changed
+        filepath = "data/sciencish_driving_data_daily.nc"
+        directory = os.path.dirname(os.path.abspath(filepath))
+        index_directory = tempfile.mkdtemp()
+        try:
+            for setting in ["", index_directory]:
+                with self.subTest(index_directory=setting):
+                    unifhy.index_directory(setting)
+                    rain = unifhy.DataSet(filepath, select="rainfall_flux")
+                    index = _indices[directory]
+                    snow = unifhy.DataSet(filepath, select="snowfall_flux")
+                    self.assertIs(_indices[directory], index)
+                    self.assertEqual(index.index_directory, unifhy.index_directory())
+
+                    self.assertListEqual(list(rain), ["rainfall_flux"])
+                    self.assertListEqual(list(snow), ["snowfall_flux"])
+            # (index persisted once an index directory is set)
+            self.assertListEqual(
+                os.listdir(index_directory), [os.path.basename(index.filepath)]
+            )
+        finally:
+            unifhy.index_directory("")
+            shutil.rmtree(index_directory)
+
+
+def get_dummy_climatology(length):
+    # climatology whose values are their position along time, over a
+    # domain of two elements
+    field = cf.Field(properties={"standard_name": "dummy_climatology"})
+    axis_t = field.set_construct(cf.DomainAxis(length))
+    axis_x = field.set_construct(cf.DomainAxis(2))
+    field.set_construct(
+        cf.DimensionCoordinate(
+            properties={"standard_name": "time"}, data=cf.Data(np.arange(length))
+        ),
+        axes=axis_t,
+    )
+    field.set_data(
+        cf.Data(np.repeat(np.arange(length, dtype=float)[:, np.newaxis], 2, 1)),
+        axes=[axis_t, axis_x],
+    )
+    return field
+
+
+class TestClimatologicVariable(unittest.TestCase):
+    def check_indices(self, frequency, length, dates, expected, calendar="standard"):
+        datetimes = [cftime.datetime(*d, calendar=calendar) for d in dates]
+        variable = ClimatologicVariable(
+            get_dummy_climatology(length), (), frequency, datetimes, calendar
+        )
+        for i, index in enumerate(expected):
+            np.testing.assert_array_equal(variable[i], [index, index])
+        np.testing.assert_array_equal(
+            variable.block(0, len(expected)),
+            np.repeat(np.array(expected, dtype=float)[:, np.newaxis], 2, 1),
+        )
+
+    def test_seasonal(self):
+        self.check_indices(
+            "seasonal",
+            4,
+            [(2019, 1, 1), (2019, 3, 1), (2019, 6, 30), (2019, 11, 30), (2019, 12, 1)],
+            [0, 1, 2, 3, 0],
+        )
+
+    def test_monthly(self):
+        self.check_indices(
+            "monthly",
+            12,
+            [(2019, 1, 31), (2019, 2, 1), (2020, 2, 29), (2019, 7, 15), (2019, 12, 31)],
+            [0, 1, 1, 6, 11],
+        )
+
+    def test_day_of_year(self):
+        # (February 29th has its own value, also skipped in other years)
+        self.check_indices(
+            "day_of_year",
+            366,
+            [(2019, 1, 1), (2019, 2, 28), (2020, 2, 29), (2019, 3, 1), (2019, 12, 31)],
+            [0, 58, 59, 60, 365],
+        )
+
+    def test_day_of_year_360_day(self):
+        with self.assertRaises(ValueError):
+            self.check_indices("day_of_year", 366, [(2019, 2, 30)], [59], "360_day")
+
+    def test_integer(self):
+        self.check_indices(
+            6,
+            6,
+            [(2019, 1, 1), (2019, 2, 28), (2019, 3, 1), (2019, 7, 1), (2019, 12, 31)],
+            [0, 0, 0, 2, 5],
+        )
+        self.check_indices(
+            366,
+            366,
+            [(2019, 1, 1), (2020, 2, 29), (2019, 3, 1), (2019, 12, 31)],
+            [0, 59, 60, 365],
+        )
+
+    def test_integer_360_day(self):
+        # (February 30th and March 1st must not share the same value)
+        self.check_indices(
+            360,
+            360,
+            [(2019, 1, 1), (2019, 2, 30), (2019, 3, 1), (2019, 12, 30)],
+            [0, 59, 60, 359],
+            "360_day",
+        )
+        self.check_indices(
+            12,
+            12,
+            [(2019, 1, 30), (2019, 2, 1), (2019, 2, 30), (2019, 3, 1), (2019, 12, 30)],
+            [0, 1, 1, 2, 11],
+            "360_day",
+        )
+
+
 if __name__ == "__main__":
     test_loader = unittest.TestLoader()
     test_suite = unittest.TestSuite()
 
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestDataSetFiles))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestClimatologicVariable))
     test_suite.addTests(doctest.DocTestSuite(unifhy.data))
 
     runner = unittest.TextTestRunner(verbosity=2)
@@ -4,6 +4,7 @@ import os
 import numpy as np
 from copy import deepcopy
 from glob import glob
+from netCDF4 import Dataset
 
 import unifhy
 from .test_time import (
@@ -39,6 +40,7 @@ class Simulator(object):
         nutrient_openwater_kind,
         sources=None,
         id_trail=None,
+        **kwargs,
     ):
         return cls(
             time_,
@@ -54,6 +56,7 @@ class Simulator(object):
                 nutrient_openwater_kind,
                 sources,
                 id_trail,
+                **kwargs,
             ),
         )
 
@@ -79,6 +82,7 @@ class Simulator(object):
         nutrient_openwater_kind,
         sources,
         id_trail,
+        **kwargs,
     ):
         # for surfacelayer component
         category = "surfacelayer"
@@ -88,6 +92,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # for nutrient surfacelayer component
@@ -98,6 +103,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # for subsurface component
@@ -108,6 +114,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # for nutrient subsurface component
@@ -118,6 +125,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # for openwater
@@ -128,6 +136,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # for nutrient openwater
@@ -138,6 +147,7 @@ class Simulator(object):
             time_,
             space_,
             "Python" if sources is None else sources.get(category, "Python"),
+            **kwargs,
         )
 
         # try to get an instance of model with the given combination
@@ -172,8 +182,10 @@ class Simulator(object):
             dumping_frequency=get_dummy_dumping_frequency(self.time_)
         )
 
-    def run_model(self):
-        self.model.simulate(dumping_frequency=get_dummy_dumping_frequency(self.time_))
+    def run_model(self, **kwargs):
+        self.model.simulate(
+            dumping_frequency=get_dummy_dumping_frequency(self.time_), **kwargs
+        )
 
     def resume_model(self, tag="run"):
         if tag == "run":
@@ -546,6 +558,183 @@ class BasicTestModel(object):
         else:
             print('Skipping tests')
 
+    def test_setup_simulate_resume_run_asynchronous_output(self):
+        """Record streams are written asynchronously."""
+        self.check_simulate_resume(run_kwargs={"asynchronous_output": True})
+
+    def test_setup_simulate_resume_run_threaded_execution(self):
+        """Components are run in a pool of threads."""
+        self.check_simulate_resume(run_kwargs={"execution": "threads"})
+
+    def test_simulate_threaded_execution_component_error(self):
+        """Errors raised by components run in threads are not masked."""
+        if self.doe != ("c", "c", "c", "c", "c", "c"):
+            print('Skipping tests')
+            return
+
+        simulator = Simulator.from_scratch(
+            self.t, self.s, "c", "c", "c", "c", "c", "c", id_trail="-error"
+        )
+
+        def run(**kwargs):
+            raise RuntimeError("dummy component failure")
+
+        simulator.model.subsurface.run = run
+
+        with self.assertRaisesRegex(RuntimeError, "dummy component failure"):
+            simulator.run_model(execution="threads")
+        # check that the threads were released
+        self.assertIsNone(simulator.model._executor)
+
+        # clean up
+        simulator.clean_up_files()
+
+    def test_simulate_execution_unknown(self):
+        """Unknown execution modes are rejected before saving anything."""
+        if self.doe != ("c", "c", "c", "c", "c", "c"):
+            print('Skipping tests')
+            return
+
+        simulator = Simulator.from_scratch(
+            self.t, self.s, "c", "c", "c", "c", "c", "c", id_trail="-execution"
+        )
+        model = simulator.model
+        filepath = os.sep.join(
+            [model.config_directory, f"{model.identifier}.simulate.yml"]
+        )
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+        with self.assertRaisesRegex(ValueError, "execution mode"):
+            model.simulate(execution="parallel")
+        self.assertFalse(os.path.exists(filepath))
+
+        # clean up
+        simulator.clean_up_files()
+
+    def test_setup_simulate_resume_run_process_execution(self):
+        """Components are run in worker processes."""
+        self.check_simulate_resume(run_kwargs={"execution": "processes"})
+
+    def test_setup_simulate_resume_run_process_execution_out_of_place(self):
+        """Components given buffers for their outwards but returning
+        other arrays are run in worker processes."""
+        self.check_simulate_resume(
+            run_kwargs={"execution": "processes"},
+            sources={
+                "surfacelayer": "InPlace",
+                "subsurface": "OutOfPlace",
+                "openwater": "OutOfPlace",
+            },
+        )
+
+    def test_setup_simulate_resume_run_tiled_execution(self):
+        """Components are run tile by tile."""
+        self.check_simulate_resume(tiling=(2, 2))
+
+    def test_setup_simulate_resume_run_in_place_outwards(self):
+        """Components write their outwards into the exchanger buffers."""
+        self.check_simulate_resume(
+            sources={
+                "surfacelayer": "InPlace",
+                "subsurface": "InPlace",
+                "openwater": "InPlace",
+            }
+        )
+
+    def test_setup_simulate_resume_run_compact_land(self):
+        """Components on a masked grid only compute their land elements."""
+        self.check_simulate_resume(id_trail="-compact", compact_land=True)
+
+    def test_setup_simulate_resume_run_prefetched_inputs(self):
+        """Components read their dynamic inputs ahead on a thread."""
+        self.check_simulate_resume(id_trail="-prefetch", io_prefetch=2)
+
+    def test_setup_simulate_resume_run_io_memory_budget(self):
+        """Components derive their io_slice from a memory budget."""
+        simulator = self.check_simulate_resume(
+            id_trail="-budget", io_memory_budget=4000
+        )
+        if simulator is None:
+            return
+
+        for component in [
+            simulator.model.surfacelayer,
+            simulator.model.subsurface,
+            simulator.model.openwater,
+            simulator.model.nutrientsurfacelayer,
+            simulator.model.nutrientsubsurface,
+            simulator.model.nutrientopenwater,
+        ]:
+            memory = component.io_memory_per_step_()
+            if not memory:
+                continue
+            # check slice is the longest fitting in the budget
+            io_slice = component._io_slice
+            self.assertEqual(
+                io_slice,
+                min(max(4000 // memory, 1), component.timedomain.time.size),
+            )
+            self.assertTrue(io_slice * memory <= 4000 or io_slice == 1)
+            # check inputs are read and records written with this slice
+            for name in component._inputs_info:
+                variable = component.datasubset[name]
+                if isinstance(variable, unifhy.data.DynamicVariable):
+                    self.assertEqual(variable.reading_slice, io_slice)
+            for stream in component._record_streams.values():
+                self.assertEqual(stream.writing_slice, io_slice)
+
+    def test_setup_simulate_resume_run_input_cache(self):
+        """Components cache their dynamic inputs subset onto their domains."""
+        if self.doe != ("c", "c", "c", "c", "c", "c"):
+            print('Skipping tests')
+            return
+
+        cache = os.sep.join(["outputs", "input_*.nc"])
+        for f in glob(cache):
+            os.remove(f)
+
+        # set up a first model, writing the cache files
+        simulator = Simulator.from_scratch(
+            self.t,
+            self.s,
+            "c",
+            "c",
+            "c",
+            "c",
+            "c",
+            "c",
+            id_trail="-cache",
+            input_cache="outputs",
+        )
+        cached = {f: os.path.getmtime(f) for f in glob(cache)}
+        self.assertTrue(cached)
+        simulator.clean_up_files()
+
+        # set up, run, and resume a second model, reading the cache files
+        self.check_simulate_resume(id_trail="-cache", input_cache="outputs")
+        self.assertDictEqual(cached, {f: os.path.getmtime(f) for f in glob(cache)})
+
+        # clean up
+        for f in glob(cache):
+            os.remove(f)
+
+    def test_setup_simulate_resume_run_streaming_records(self):
+        """Record streams aggregate values as they are received."""
+        self.check_simulate_resume(
+            matching="exact",
+            id_trail="-streaming",
+            record_aggregation="streaming",
+        )
+
+    def test_setup_simulate_resume_run_hierarchical_records(self):
+        """Coarser record streams are fed by finer record streams."""
+        self.check_simulate_resume(
+            matching="close",
+            id_trail="-hierarchical",
+            record_aggregation="hierarchical",
+        )
+
     def test_setup_spinup_yaml_resume_spinup(self):
         """
         The purpose of this test is to check that the following workflow
@@ -763,6 +952,65 @@ class BasicTestModel(object):
         else:
             print('Skipping test')
 
+    def check_simulate_resume(self, run_kwargs=None, matching=None, **model_kwargs):
+        """
+        This method checks that the following workflow is functional
+        for the given model settings:
+        - configure model (passing *model_kwargs* to the simulator);
+        - simulate model main run (passing *run_kwargs* to the model);
+        - resume model main run at second-to-last snapshot.
+
+        The functional character of the workflow is tested through:
+        - completing with no error;
+        - checking the correctness of the final component state values;
+        - checking the correctness of the final exchanger transfer values;
+        - checking the values in the record files, or if *matching* is
+          'exact' (or 'close'), checking that they are identical (or
+          close) to the ones produced with the default settings.
+
+        The simulator is returned for further checks (if the test is
+        not skipped).
+        """
+        if self.doe != ("c", "c", "c", "c", "c", "c"):
+            print('Skipping tests')
+            return None
+
+        reference = None
+        if matching is not None:
+            # set up, and run a model with default settings
+            reference = Simulator.from_scratch(
+                self.t, self.s, "c", "c", "c", "c", "c", "c"
+            )
+            reference.run_model()
+
+        # set up a model
+        simulator = Simulator.from_scratch(
+            self.t, self.s, "c", "c", "c", "c", "c", "c", **model_kwargs
+        )
+
+        # start main run
+        simulator.run_model(**({} if run_kwargs is None else run_kwargs))
+
+        # resume main run
+        simulator.resume_model()
+
+        # check final state and transfer values
+        self.check_final_conditions(simulator.model)
+        # check records
+        if reference is None:
+            self.check_records(simulator.model)
+        else:
+            self.check_matching_records(
+                reference.model, simulator.model, exact=matching == "exact"
+            )
+
+        # clean up
+        simulator.clean_up_files()
+        if reference is not None:
+            reference.clean_up_files()
+
+        return simulator
+
     def check_final_conditions(self, model):
         """
         This method checks that the final values of all component states
@@ -827,7 +1075,7 @@ class BasicTestModel(object):
             "transfer_o",
             "transfer_p",
         ]:
-            arr = exchanger.transfers[transfer]["slices"][-1]
+            arr = exchanger.get_latest_transfer(transfer)
             cat = exchanger.transfers[transfer]["src_cat"]
             # compare both min/max, as array should be homogeneous
             val = exp_records_raw[self.t][cat][transfer][-1]
@@ -887,6 +1135,58 @@ class BasicTestModel(object):
                                     " {}, {}".format(cat, name, delta, method)
                                 ) from e
 
+    def check_matching_records(self, model_1, model_2, exact=True):
+        """
+        This method checks that all values of all component records
+        are identical (or close if not *exact*) across two models.
+        """
+        for component_1, component_2 in zip(
+            [
+                model_1.surfacelayer,
+                model_1.subsurface,
+                model_1.openwater,
+                model_1.nutrientsurfacelayer,
+                model_1.nutrientsubsurface,
+                model_1.nutrientopenwater,
+            ],
+            [
+                model_2.surfacelayer,
+                model_2.subsurface,
+                model_2.openwater,
+                model_2.nutrientsurfacelayer,
+                model_2.nutrientsubsurface,
+                model_2.nutrientopenwater,
+            ],
+        ):
+            cat = component_1.category
+            if isinstance(
+                component_1, (unifhy.DataComponent, unifhy.NullComponent)
+            ):
+                continue
+            for delta, stream_1 in component_1._record_streams.items():
+                stream_2 = component_2._record_streams[delta]
+                with Dataset(stream_1.file, "r") as f_1, Dataset(
+                    stream_2.file, "r"
+                ) as f_2:
+                    for name, variable in f_1.variables.items():
+                        try:
+                            if exact:
+                                np.testing.assert_array_equal(
+                                    variable[:], f_2.variables[name][:]
+                                )
+                            else:
+                                np.testing.assert_allclose(
+                                    variable[:],
+                                    f_2.variables[name][:],
+                                    unifhy.rtol(),
+                                    unifhy.atol(),
+                                )
+                        except AssertionError as e:
+                            raise AssertionError(
+                                "error for {} component record {}: "
+                                "{}".format(cat, name, delta)
+                            ) from e
+
 
 class AdvancedTestModel(BasicTestModel):
     def test_setup_spinup_simulate_resume_run(self):
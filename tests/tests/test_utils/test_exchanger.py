@@ -1,13 +1,254 @@
 import unittest
 import doctest
+from types import SimpleNamespace
+from datetime import timedelta
+import numpy as np
 
 import unifhy
+from unifhy._utils.clock import Clock
+from unifhy._utils.compass import Compass
+from unifhy._utils.exchanger import Exchanger
+from ..test_time import get_dummy_timedomain
+from ..test_space import get_dummy_spacedomain
+
+
+def get_dummy_exchanger(
+    method,
+    dumping_frequency=None,
+    names=("x",),
+    dst_resolution="1deg",
+    writes_outwards=False,
+):
+    # component 'a' runs daily and gives transfers to
+    # component 'b' which runs every four days
+    src_sd = get_dummy_spacedomain("1deg")
+    dst_sd = get_dummy_spacedomain(dst_resolution)
+    components = {
+        "a": SimpleNamespace(
+            category="a",
+            inwards_info={},
+            outwards_info={
+                n: {"units": "1", "to": ["b"], "method": method} for n in names
+            },
+            spacedomain=src_sd,
+            writes_outwards=writes_outwards,
+            compact_land=False,
+        ),
+        "b": SimpleNamespace(
+            category="b",
+            inwards_info={
+                n: {"units": "1", "from": "a", "method": method} for n in names
+            },
+            outwards_info={},
+            spacedomain=dst_sd,
+            writes_outwards=False,
+            compact_land=False,
+        ),
+    }
+    clock = Clock(
+        {"a": get_dummy_timedomain("daily"), "b": get_dummy_timedomain("4daily")}
+    )
+    if dumping_frequency is not None:
+        clock.set_dumping_frequency(dumping_frequency)
+    compass = Compass({"a": src_sd, "b": dst_sd})
+
+    return Exchanger(components, clock, compass, "test", None), clock
+
+
+class TestExchanger(unittest.TestCase):
+    def run_exchanger(self, exchanger, clock, reuse=False):
+        # emulate the model loop: dumps first, then the components due
+        # read their inwards, and the source component sets its outward
+        shape = exchanger.get_latest_transfer("x").shape
+        array = np.zeros(shape)
+        received, dumped = [], []
+        for it, (run_a, run_b, dumping) in enumerate(clock):
+            if dumping:
+                dumped.append((it, np.array(exchanger.get_latest_transfer("x"))))
+            if run_b:
+                received.append((it, np.array(exchanger.get_transfer("x", "b"))))
+            if not reuse:
+                array = np.zeros(shape)
+            array[...] = it
+            exchanger.set_transfer("x", array)
+            if reuse:
+                # component reuses the array it returned as scratch space
+                array[...] = -1
+        return received, dumped
+
+    def test_ring_buffer(self):
+        # values are stored in a ring buffer allocated once, whose head
+        # moves forward each time a value is set
+        exchanger, clock = get_dummy_exchanger("maximum")
+        transfer = exchanger.transfers["x"]
+        array = transfer["array"]
+        self.assertEqual(array.shape[0], 4)
+        for it in range(6):
+            head = transfer["head"]
+            exchanger.set_transfer("x", np.full((4, 3), float(it)))
+            self.assertIs(transfer["array"], array)
+            self.assertEqual(transfer["head"], (head + 1) % 4)
+            np.testing.assert_array_equal(exchanger.get_latest_transfer("x"), it)
+
+        # (value reduced into the buffer preallocated for 'b')
+        value = exchanger.get_transfer("x", "b")
+        self.assertTrue(np.shares_memory(value, transfer["b"]["value"]))
+        np.testing.assert_array_equal(value, 5)
+
+    def test_accumulate(self):
+        for method in ["mean", "sum"]:
+            with self.subTest(method=method):
+                exchanger, clock = get_dummy_exchanger(method)
+                self.assertTrue(exchanger.transfers["x"]["b"]["accumulate"])
+                # (only the most recent value is stored)
+                self.assertEqual(exchanger.transfers["x"]["array"].shape[0], 1)
+
+                received, _ = self.run_exchanger(exchanger, clock)
+                self.assertListEqual([it for it, _ in received], [3, 7, 11, 15])
+                for it, value in received:
+                    # (four most recent values, initial one being zero,
+                    # and 'sum' weights being divided by the steps of 'b')
+                    expected = np.mean([max(v, 0) for v in range(it - 4, it)])
+                    np.testing.assert_allclose(value, expected)
+
+    def test_accumulate_across_set_up(self):
+        # accumulator is kept when the exchanger is set up again
+        # (e.g. when a simulation is resumed), unless its array is reset
+        exchanger, clock = get_dummy_exchanger("mean")
+        for overwrite in [False, True]:
+            with self.subTest(overwrite=overwrite):
+                for it in range(3):
+                    exchanger.set_transfer("x", np.full((4, 3), float(it)))
+                exchanger.set_up(clock, exchanger.compass, overwrite)
+                value = exchanger.get_transfer("x", "b")
+                # (initial zero and the three values set, or only
+                # zeros if reset)
+                np.testing.assert_allclose(
+                    value, 0.0 if overwrite else np.mean([0, 0, 1, 2])
+                )
+                # (accumulated into the buffer preallocated for 'b')
+                self.assertTrue(
+                    np.shares_memory(value, exchanger.transfers["x"]["b"]["value"])
+                )
+
+    def test_reduce_history(self):
+        exchanger, clock = get_dummy_exchanger("maximum")
+        self.assertFalse(exchanger.transfers["x"]["b"]["accumulate"])
+        self.assertEqual(exchanger.transfers["x"]["history"], 4)
+
+        received, _ = self.run_exchanger(exchanger, clock)
+        for it, value in received:
+            np.testing.assert_array_equal(value, it - 1)
+
+    def test_remap_shared(self):
+        # transfers between the same pair of spacedomains share the same
+        # remapping operator, and are remapped together when given at once
+        exchanger, clock = get_dummy_exchanger(
+            "point", names=("x", "y"), dst_resolution="pt5deg"
+        )
+        remap = exchanger.transfers["x"]["b"]["remap"]
+        self.assertIsNotNone(remap)
+        self.assertIs(exchanger.transfers["y"]["b"]["remap"], remap)
+
+        rng = np.random.default_rng(42)
+        for name in ["x", "y"]:
+            exchanger.set_transfer(name, rng.random((4, 3)))
+        separate = {n: exchanger.get_transfer(n, "b") for n in ["x", "y"]}
+
+        # (record the calls to the operator shared by both transfers)
+        calls = []
+
+        def counted(values):
+            calls.append(values)
+            return remap(values)
+
+        for name in ["x", "y"]:
+            exchanger.transfers[name]["b"]["remap"] = counted
+        together = exchanger.get_transfers(["x", "y"], "b")
+        self.assertEqual(len(calls), 1)
+        self.assertTupleEqual(calls[0].shape, (2, 4, 3))
+        for name in ["x", "y"]:
+            self.assertTupleEqual(together[name].shape, (8, 6))
+            np.testing.assert_allclose(together[name], separate[name])
+
+        # (values stacked into the same buffer at each call)
+        exchanger.get_transfers(["x", "y"], "b")
+        self.assertEqual(len(calls), 2)
+        self.assertIs(calls[1], calls[0])
+
+    def test_transfer_read_only(self):
+        # values given to receiving components are reused buffers,
+        # so modifying them in place must fail
+        for method in ["mean", "sum", "point", "minimum", "maximum"]:
+            with self.subTest(method=method):
+                exchanger, clock = get_dummy_exchanger(method)
+                value = exchanger.get_transfer("x", "b")
+                self.assertFalse(value.flags.writeable)
+                with self.assertRaises(ValueError):
+                    value[...] = 1.0
+                # (while the exchanger can still use its buffers)
+                exchanger.set_transfer("x", np.ones(value.shape))
+                exchanger.get_transfer("x", "b")
+
+    def test_demand(self):
+        exchanger, clock = get_dummy_exchanger("point", timedelta(days=8))
+        demand = exchanger.transfers["x"]["demand"]
+        dumped = exchanger.transfers["x"]["dumped"]
+        # only values set before 'b' runs are read by 'b', and
+        # only values set before a dump and the last one are dumped
+        self.assertListEqual(list(np.flatnonzero(demand)), [2, 6, 10, 14])
+        self.assertListEqual(list(np.flatnonzero(dumped)), [7, 15])
+
+        for reuse in [False, True]:
+            with self.subTest(reuse=reuse):
+                exchanger, clock = get_dummy_exchanger("point", timedelta(days=8))
+                received, dumped = self.run_exchanger(exchanger, clock, reuse)
+
+                self.assertListEqual([it for it, _ in received], [3, 7, 11, 15])
+                for it, value in received:
+                    np.testing.assert_array_equal(value, it - 1)
+
+                self.assertListEqual([it for it, _ in dumped], [0, 8])
+                for it, value in dumped:
+                    np.testing.assert_array_equal(value, max(it - 1, 0))
+
+                # (last value set is dumped at the end of the run)
+                np.testing.assert_array_equal(
+                    exchanger.get_latest_transfer("x"), clock.length - 1
+                )
+
+    def test_head_rotated_at_each_set(self):
+        # processes other than the one setting the values of a transfer
+        # only rotate its ring buffer, so the head must move the same
+        # way when a value is set, even if the value is not copied
+        for writes_outwards in [False, True]:
+            with self.subTest(writes_outwards=writes_outwards):
+                exchanger, clock = get_dummy_exchanger(
+                    "point", timedelta(days=8), writes_outwards=writes_outwards
+                )
+                transfer = exchanger.transfers["x"]
+                size = transfer["array"].shape[0]
+                self.assertEqual(size, 2 if writes_outwards else 1)
+
+                head = transfer["head"]
+                for it, (run_a, run_b, dumping) in enumerate(clock):
+                    if run_b:
+                        value = exchanger.get_transfer("x", "b")
+                        np.testing.assert_array_equal(value, it - 1)
+                    if writes_outwards:
+                        # (component given a buffer to write into, but
+                        # returning another array)
+                        exchanger.get_outwards_buffers(["x"])
+                    exchanger.set_transfer("x", np.full((4, 3), float(it)))
+                    head = (head + 1) % size
+                    self.assertEqual(transfer["head"], head)
 
 
 if __name__ == "__main__":
     test_loader = unittest.TestLoader()
     test_suite = unittest.TestSuite()
 
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestExchanger))
     test_suite.addTests(doctest.DocTestSuite(unifhy._utils.exchanger))
 
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,363 @@
+import unittest
+import os
+import shutil
+import tempfile
+from netCDF4 import Dataset
+import numpy as np
+import cf
+
+from unifhy.data import DynamicVariable
+from unifhy._utils.io import (
+    FileIndex,
+    FileManager,
+    HyperslabReader,
+    TimeIndex,
+    get_time_index,
+    open_dataset,
+)
+
+
+def write_dummy_file(filepath, ncvar, **attributes):
+    with Dataset(filepath, "w") as f:
+        f.createDimension("x", 2)
+        v = f.createVariable(ncvar, "f8", ("x",))
+        for name, value in attributes.items():
+            v.setncattr(name, value)
+        v[:] = [1.0, 2.0]
+
+
+def write_dummy_series(filepath, file_format, packed=False):
+    # time series on a (Y, X) grid, where one element is missing
+    values = np.ma.masked_array(
+        np.arange(6 * 3 * 4, dtype="f8").reshape((6, 3, 4)) / 4.0
+    )
+    values[1, 0, 0] = np.ma.masked
+
+    with Dataset(filepath, "w", format=file_format) as f:
+        for dim, size, name, units in [
+            ("time", 6, "time", "days since 2000-01-01"),
+            ("lat", 3, "latitude", "degrees_north"),
+            ("lon", 4, "longitude", "degrees_east"),
+        ]:
+            f.createDimension(dim, size)
+            c = f.createVariable(dim, "f8", (dim,))
+            c.standard_name = name
+            c.units = units
+            c[:] = np.arange(size, dtype="f8")
+        f.variables["time"].calendar = "gregorian"
+
+        if packed:
+            v = f.createVariable("rain", "i2", ("time", "lat", "lon"), fill_value=-999)
+            v.scale_factor = 0.25
+            v.add_offset = 1.0
+        else:
+            # (missing element holding the default fill value)
+            v = f.createVariable("rain", "f8", ("time", "lat", "lon"))
+        v.standard_name = "rainfall_flux"
+        v.units = "kg m-2 s-1"
+        v[:] = values
+
+
+class TestFileManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.sep.join([self.directory, "record.nc"])
+        with Dataset(self.filepath, "w") as f:
+            f.createDimension("time", None)
+            t = f.createVariable("time", "f8", ("time",))
+            t[:] = [0.0, 1.0]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_handle_reused(self):
+        files = FileManager()
+        try:
+            f = files.get(self.filepath)
+            self.assertTrue(f.isopen())
+            self.assertIs(files.get(self.filepath), f)
+            # (also when requested through the context manager, which
+            # leaves the file open)
+            with open_dataset(self.filepath, files) as g:
+                self.assertIs(g, f)
+            self.assertTrue(f.isopen())
+        finally:
+            files.close()
+        self.assertFalse(f.isopen())
+
+    def test_reopened_once_closed(self):
+        files = FileManager()
+        for close in [files.close, None]:
+            with self.subTest(closed_by_manager=close is not None):
+                f = files.get(self.filepath)
+                if close is None:
+                    # (handle closed elsewhere)
+                    f.close()
+                else:
+                    close()
+                self.assertFalse(f.isopen())
+                g = files.get(self.filepath)
+                try:
+                    self.assertIsNot(g, f)
+                    self.assertTrue(g.isopen())
+                finally:
+                    files.close()
+
+    def test_opened_for_update(self):
+        # existing values are kept and new ones can be appended
+        files = FileManager()
+        try:
+            f = files.get(self.filepath)
+            np.testing.assert_array_equal(f.variables["time"][:], [0.0, 1.0])
+            f.variables["time"][2] = 2.0
+            files.sync()
+        finally:
+            files.close()
+
+        with Dataset(self.filepath, "r") as f:
+            np.testing.assert_array_equal(f.variables["time"][:], [0.0, 1.0, 2.0])
+
+    def test_unmanaged_closed_after_use(self):
+        with open_dataset(self.filepath) as f:
+            self.assertTrue(f.isopen())
+            f.variables["time"][2] = 2.0
+        self.assertFalse(f.isopen())
+
+        with Dataset(self.filepath, "r") as f:
+            np.testing.assert_array_equal(f.variables["time"][:], [0.0, 1.0, 2.0])
+
+
+class TestHyperslabReader(unittest.TestCase):
+    formats = ["NETCDF4", "NETCDF3_CLASSIC"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_field(self, file_format, packed=False):
+        filepath = os.sep.join([self.directory, f"{file_format}_{packed}.nc"])
+        write_dummy_series(filepath, file_format, packed)
+        return cf.read(filepath)[0]
+
+    def check_slices(self, reader, field):
+        # several consecutive slices (the last one being truncated)
+        for start, stop in [(0, 2), (2, 4), (4, 6), (3, 8)]:
+            values = reader(start, stop)
+            expected = field.array[start:stop]
+            self.assertEqual(values.dtype, expected.dtype)
+            self.assertTupleEqual(values.shape, expected.shape)
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(values), np.ma.getmaskarray(expected)
+            )
+            np.testing.assert_array_equal(values, expected)
+
+    def test_slices(self):
+        for file_format in self.formats:
+            with self.subTest(file_format=file_format):
+                field = self.get_field(file_format)
+                reader = HyperslabReader.from_field(field)
+                self.assertIsNotNone(reader)
+                self.assertEqual(reader.memmap, file_format == "NETCDF3_CLASSIC")
+                self.check_slices(reader, field)
+
+                # field subset onto part of the variable
+                subset = field[1:5, 1:, :3]
+                reader = HyperslabReader.from_field(subset)
+                self.assertIsNotNone(reader)
+                self.check_slices(reader, subset)
+
+    def test_file_kept_open(self):
+        field = self.get_field("NETCDF4")
+        reader = HyperslabReader.from_field(field)
+        reader(0, 2)
+        handle = reader._file
+        self.assertIsNotNone(handle)
+        reader(2, 4)
+        self.assertIs(reader._file, handle)
+
+        reader.close()
+        self.assertIsNone(reader._file)
+        # (file re-opened if read again)
+        self.check_slices(reader, field)
+        reader.close()
+
+    def test_packed_not_memory_mapped(self):
+        # packed variable must be unpacked by the netCDF library rather
+        # than read raw from the memory map of the file
+        for file_format in self.formats:
+            with self.subTest(file_format=file_format):
+                field = self.get_field(file_format, packed=True)
+                reader = HyperslabReader.from_field(field)
+                self.assertIsNotNone(reader)
+                self.assertFalse(reader.memmap)
+                self.check_slices(reader, field)
+
+    def test_dynamic_variable(self):
+        for file_format in self.formats:
+            for packed in [False, True]:
+                with self.subTest(file_format=file_format, packed=packed):
+                    field = self.get_field(file_format, packed)
+                    expected = field.array
+                    variable = DynamicVariable(field, [], 2)
+                    for i in range(6):
+                        np.testing.assert_array_equal(variable[i], expected[i])
+                    # (hyperslab reader used after the first slice)
+                    self.assertIsNotNone(variable._hyperslab)
+
+    def test_dynamic_variable_fall_back(self):
+        # field values no longer those of the file (here converted to
+        # other units) must be read with cf-python
+        for file_format in self.formats:
+            with self.subTest(file_format=file_format):
+                field = self.get_field(file_format, packed=True)
+                field.Units = cf.Units("kg m-2 h-1")
+                self.assertIsNone(HyperslabReader.from_field(field))
+
+                expected = field.array
+                variable = DynamicVariable(field, [], 2)
+                for i in range(6):
+                    np.testing.assert_array_equal(variable[i], expected[i])
+                self.assertIsNone(variable._hyperslab)
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.sep.join([self.directory, "dump.nc"])
+        with Dataset(self.filepath, "w") as f:
+            f.createDimension("time", None)
+            t = f.createVariable("time", "f8", ("time",))
+            t[:] = [0.0, 1.5, 3.0]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_seeded_from_file(self):
+        with Dataset(self.filepath, "r") as f:
+            index = TimeIndex(f.variables["time"])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.get(1.5), 1)
+        self.assertEqual(index.get(np.float32(3.0)), 2)
+        self.assertIsNone(index.get(2.0))
+
+    def test_append_and_set(self):
+        with Dataset(self.filepath, "r") as f:
+            index = TimeIndex(f.variables["time"])
+        self.assertEqual(index.append(4.5), 3)
+        self.assertEqual(index.get(4.5), 3)
+        self.assertEqual(len(index), 4)
+        # (overwriting an existing timestamp does not extend the index)
+        index.set(0.0, 0)
+        self.assertEqual(len(index), 4)
+        index.set(9.0, 6)
+        self.assertEqual(len(index), 7)
+        self.assertEqual(index.append(10.5), 7)
+
+    def test_managed_files(self):
+        # index is kept by the manager while the file remains open, so
+        # it must be kept up-to-date by the writers of the file
+        files = FileManager()
+        try:
+            f = files.get(self.filepath)
+            index = get_time_index(f, files)
+            self.assertIs(get_time_index(f, files), index)
+            t = index.append(4.5)
+            f.variables["time"][t] = 4.5
+        finally:
+            files.close()
+
+        # index is seeded afresh once the file is re-opened, or when
+        # the file is not managed
+        f = files.get(self.filepath)
+        try:
+            self.assertIsNot(get_time_index(f, files), index)
+            self.assertEqual(get_time_index(f, files).get(4.5), 3)
+            self.assertEqual(get_time_index(f).get(4.5), 3)
+        finally:
+            files.close()
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index_directory = tempfile.mkdtemp()
+        self.file_a = os.sep.join([self.directory, "a.nc"])
+        self.file_b = os.sep.join([self.directory, "b.nc"])
+        write_dummy_file(self.file_a, "rain", standard_name="rainfall_flux")
+        write_dummy_file(self.file_b, "snow", long_name="snowfall")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.index_directory)
+
+    def test_identities(self):
+        index = FileIndex(self.directory)
+        self.assertListEqual(
+            index.identities(self.file_a),
+            ["ncvar%rain", "rainfall_flux", "standard_name=rainfall_flux"],
+        )
+        self.assertListEqual(
+            index.identities(self.file_b),
+            ["long_name=snowfall", "ncvar%snow", "snowfall"],
+        )
+
+    def test_identities_not_netcdf(self):
+        filepath = os.sep.join([self.directory, "c.txt"])
+        with open(filepath, "w") as f:
+            f.write("not a netCDF file")
+        self.assertIsNone(FileIndex(self.directory).identities(filepath))
+
+    def test_identities_refreshed_when_modified(self):
+        index = FileIndex(self.directory)
+        index.identities(self.file_a)
+        mtime = os.path.getmtime(self.file_a)
+        write_dummy_file(self.file_a, "hail", standard_name="hail_flux")
+        os.utime(self.file_a, (mtime + 1, mtime + 1))
+        self.assertIn("hail_flux", index.identities(self.file_a))
+        self.assertNotIn("rainfall_flux", index.identities(self.file_a))
+
+    def test_not_persisted_by_default(self):
+        index = FileIndex(self.directory)
+        index.identities(self.file_a)
+        index.save()
+        self.assertIsNone(index.filepath)
+        self.assertListEqual(sorted(os.listdir(self.directory)), ["a.nc", "b.nc"])
+
+    def test_persisted_in_index_directory(self):
+        index = FileIndex(self.directory, self.index_directory)
+        identities = index.identities(self.file_a)
+        index.save()
+        # index is not written in the data directory
+        self.assertListEqual(sorted(os.listdir(self.directory)), ["a.nc", "b.nc"])
+        self.assertListEqual(
+            os.listdir(self.index_directory), [os.path.basename(index.filepath)]
+        )
+
+        # another index for the same directory reuses the entries
+        # without scanning the files again
+        index = FileIndex(self.directory, self.index_directory)
+
+        def scan(filepath):
+            raise AssertionError(f"{filepath} scanned again")
+
+        index._scan = scan
+        self.assertListEqual(index.identities(self.file_a), identities)
+
+        # but an index for another directory does not
+        other = FileIndex(self.index_directory, self.index_directory)
+        self.assertNotEqual(other.filepath, index.filepath)
+
+
+if __name__ == "__main__":
+    test_loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite()
+
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestFileManager))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestHyperslabReader))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestTimeIndex))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestFileIndex))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(test_suite)
@@ -1,8 +1,15 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 import numpy as np
 from netCDF4 import Dataset
 
 import unifhy
-from ..test_time import get_dummy_output_time_and_bounds
+from unifhy._utils.record import RecordStream, StateRecord
+from ..test_time import get_dummy_output_time_and_bounds, get_dummy_timedomain
+from ..test_space import get_dummy_spacedomain
 from ..test_component import time_resolutions
 
 # expected raw values for states/transfers/outputs after main run
@@ -850,3 +857,86 @@ def get_produced_record(component, name, delta, method):
     np.testing.assert_allclose(min_, max_, atol, rtol)
 
     return time, bounds, min_
+
+
+def get_dummy_record_stream(compact):
+    spacedomain = get_dummy_spacedomain("1deg")
+    mask = spacedomain.to_field()
+    mask.set_data(np.array([[0, 1, 1], [1, 1, 0], [0, 1, 0], [0, 0, 0]]))
+    spacedomain.land_sea_mask = mask
+
+    stream = RecordStream(timedelta(days=1), 4)
+    stream.add_record(StateRecord("state_a", "1", divisions=(2,)), ["point"])
+    stream.initialise(get_dummy_timedomain("daily"), spacedomain, compact)
+    return stream, spacedomain
+
+
+class TestRecordStreamCompact(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_scatter_gather(self):
+        stream, spacedomain = get_dummy_record_stream(compact=True)
+        # (slice of 4 timesteps for 5 land elements with 2 divisions)
+        self.assertTupleEqual(stream._arrays["state_a"].shape, (4, 5, 2))
+
+        values = np.arange(4 * 5 * 2, dtype=float).reshape((4, 5, 2))
+        scattered = stream._scatter(values)
+        self.assertTupleEqual(scattered.shape, (4, 4, 3, 2))
+        # sea elements are masked, land elements hold the values
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(scattered),
+            np.broadcast_to(
+                ~spacedomain.land_sea_mask[np.newaxis, ..., np.newaxis],
+                scattered.shape,
+            ),
+        )
+        np.testing.assert_array_equal(scattered[:, 0, 1], values[:, 0])
+        np.testing.assert_array_equal(scattered[:, 2, 1], values[:, 4])
+
+        np.testing.assert_array_equal(stream._gather(scattered), values)
+
+    def test_scatter_gather_not_compact(self):
+        stream, spacedomain = get_dummy_record_stream(compact=False)
+        self.assertTupleEqual(stream._arrays["state_a"].shape, (4, 4, 3, 2))
+
+        values = np.arange(4 * 4 * 3 * 2, dtype=float).reshape((4, 4, 3, 2))
+        self.assertIs(stream._scatter(values), values)
+        self.assertIs(stream._gather(values), values)
+
+    def test_stream_file(self):
+        # records stored compact are written onto the whole spacedomain,
+        # i.e. the same way as records stored on the whole spacedomain
+        values = np.arange(4 * 4 * 3 * 2, dtype=float).reshape((4, 4, 3, 2))
+        written = {}
+        for compact in [True, False]:
+            stream, spacedomain = get_dummy_record_stream(compact)
+            filepath = os.sep.join([self.directory, f"compact_{compact}.nc"])
+            stream.create_record_stream_file(filepath)
+            for value in stream._gather(values):
+                stream.update_record("state_a", value)
+            stream.update_record_to_stream_file()
+
+            with Dataset(filepath, "r") as f:
+                written[compact] = f.variables["state_a_point"][:]
+
+        # (sea elements masked, land elements holding the values)
+        self.assertTrue(np.ma.getmaskarray(written[True])[:, 0, 0].all())
+        np.testing.assert_array_equal(written[True][:, 0, 1], values[:, 0, 1])
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(written[True]), np.ma.getmaskarray(written[False])
+        )
+        np.testing.assert_array_equal(written[True], written[False])
+
+
+if __name__ == "__main__":
+    test_loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite()
+
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestRecordStreamCompact))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(test_suite)
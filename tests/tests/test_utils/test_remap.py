@@ -0,0 +1,149 @@
+import unittest
+from unittest import mock
+import os
+import shutil
+import tempfile
+import numpy as np
+
+import unifhy
+from unifhy._utils import remap
+from unifhy._utils.remap import BlockRemap, SparseRemap, get_remap
+
+
+def get_dummy_grid(resolution):
+    # (latitudes spanning a large range so that cell areas vary)
+    return unifhy.LatLonGrid.from_extent_and_resolution(
+        latitude_extent=(-60, 60),
+        latitude_resolution=resolution,
+        longitude_extent=(-2, 1),
+        longitude_resolution=resolution,
+    )
+
+
+def get_dummy_values(grid, stack=()):
+    return np.random.default_rng(42).random(stack + grid.shape)
+
+
+def regrid(src_grid, dst_grid, values):
+    # remap with cf-python (i.e. ESMF) one (Y, X) array at a time
+    stack = values.shape[:-2]
+    values = values.reshape((-1,) + values.shape[-2:])
+    remapped = []
+    for array in values:
+        field = src_grid.to_field()
+        field.set_data(array, axes=("Y", "X"))
+        remapped.append(field.regrids(dst_grid.to_field(), "conservative").array)
+    return np.reshape(remapped, stack + dst_grid.shape)
+
+
+class TestBlockRemap(unittest.TestCase):
+    def test_coarsen(self):
+        fine, coarse = get_dummy_grid(0.5), get_dummy_grid(1)
+        operator = BlockRemap.from_spacedomains(fine, coarse)
+        self.assertIsNotNone(operator)
+        self.assertTrue(operator.coarsen)
+        self.assertTupleEqual(operator.factors, (2, 2))
+        # check that finer cells are not weighted uniformly
+        self.assertFalse(np.allclose(operator.weights, 0.25))
+
+        values = get_dummy_values(fine)
+        np.testing.assert_allclose(
+            operator(values), regrid(fine, coarse, values), rtol=1e-4
+        )
+
+    def test_refine(self):
+        coarse, fine = get_dummy_grid(1), get_dummy_grid(0.25)
+        operator = BlockRemap.from_spacedomains(coarse, fine)
+        self.assertIsNotNone(operator)
+        self.assertFalse(operator.coarsen)
+        self.assertTupleEqual(operator.factors, (4, 4))
+
+        values = get_dummy_values(coarse)
+        np.testing.assert_allclose(
+            operator(values), regrid(coarse, fine, values), rtol=1e-4
+        )
+
+    def test_stacked(self):
+        fine, coarse = get_dummy_grid(0.5), get_dummy_grid(1)
+        for src, dst in [(fine, coarse), (coarse, fine)]:
+            operator = BlockRemap.from_spacedomains(src, dst)
+            values = get_dummy_values(src, stack=(2, 3))
+            remapped = operator(values)
+            self.assertTupleEqual(remapped.shape, (2, 3) + dst.shape)
+            np.testing.assert_allclose(remapped, regrid(src, dst, values), rtol=1e-4)
+
+    def test_not_nested(self):
+        self.assertIsNone(
+            BlockRemap.from_spacedomains(get_dummy_grid(1), get_dummy_grid(0.75))
+        )
+
+
+class TestSparseRemap(unittest.TestCase):
+    def setUp(self):
+        # grids not nested into one another
+        self.src = get_dummy_grid(1)
+        self.dst = get_dummy_grid(0.75)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        remap._remaps.clear()
+
+    def test_from_fields(self):
+        operator = SparseRemap.from_fields(self.src.to_field(), self.dst.to_field())
+        self.assertTupleEqual(operator.src_shape, self.src.shape)
+        self.assertTupleEqual(operator.dst_shape, self.dst.shape)
+
+        values = get_dummy_values(self.src)
+        np.testing.assert_allclose(
+            operator(values), regrid(self.src, self.dst, values), rtol=1e-6
+        )
+
+        values = get_dummy_values(self.src, stack=(2, 3))
+        np.testing.assert_allclose(
+            operator(values), regrid(self.src, self.dst, values), rtol=1e-6
+        )
+
+    def test_file_round_trip(self):
+        operator = SparseRemap.from_fields(self.src.to_field(), self.dst.to_field())
+        filepath = os.sep.join([self.directory, "remap.npz"])
+        operator.to_file(filepath)
+        loaded = SparseRemap.from_file(filepath)
+
+        self.assertEqual((loaded.weights != operator.weights).nnz, 0)
+        self.assertTupleEqual(loaded.src_shape, operator.src_shape)
+        self.assertTupleEqual(loaded.dst_shape, operator.dst_shape)
+        self.assertEqual(loaded.dst_mask is None, operator.dst_mask is None)
+
+        values = get_dummy_values(self.src)
+        np.testing.assert_array_equal(loaded(values), operator(values))
+
+    def test_get_remap_cached_on_disk(self):
+        args = (self.src, self.dst, self.src.to_field(), self.dst.to_field())
+        operator = get_remap(*args, directory=self.directory)
+        self.assertIsInstance(operator, SparseRemap)
+        (filename,) = os.listdir(self.directory)
+        self.assertTrue(filename.startswith("remap_"))
+
+        # check that operator is reused from memory
+        self.assertIs(get_remap(*args, directory=self.directory), operator)
+
+        # check that operator is read from disk once no longer in memory
+        remap._remaps.clear()
+        with mock.patch.object(
+            SparseRemap, "from_fields", side_effect=AssertionError("rebuilt")
+        ):
+            loaded = get_remap(*args, directory=self.directory)
+        values = get_dummy_values(self.src)
+        np.testing.assert_array_equal(loaded(values), operator(values))
+
+
+if __name__ == "__main__":
+    test_loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite()
+
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestBlockRemap))
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestSparseRemap))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(test_suite)
@@ -1,6 +1,8 @@
+import unittest
 import numpy as np
 
 import unifhy
+from unifhy._utils.state import State
 
 
 def compare_states(some_states, some_other_states):
@@ -27,3 +29,37 @@ def compare_states(some_states, some_other_states):
         return False
     else:
         return True
+
+
+class TestState(unittest.TestCase):
+    def test_increment(self):
+        # history of three timesteps (oldest first)
+        state = State(np.arange(3 * 2, dtype=float).reshape((3, 2)))
+        views = list(state)
+
+        state.increment()
+        # (values move one timestep back, the current one is reset)
+        np.testing.assert_array_equal(state.get_timestep(-2), [2.0, 3.0])
+        np.testing.assert_array_equal(state.get_timestep(-1), [4.0, 5.0])
+        np.testing.assert_array_equal(state.get_timestep(0), [0.0, 0.0])
+        # (the views themselves are rotated, no new array is created)
+        self.assertIs(state.get_timestep(-2), views[1])
+        self.assertIs(state.get_timestep(-1), views[2])
+        self.assertIs(state.get_timestep(0), views[0])
+
+    def test_increment_keeps_order(self):
+        state = State(np.zeros((2, 3, 4)), order="F")
+        for _ in range(3):
+            state.increment()
+            for view in state:
+                self.assertTrue(view.flags.f_contiguous)
+
+
+if __name__ == "__main__":
+    test_loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite()
+
+    test_suite.addTests(test_loader.loadTestsFromTestCase(TestState))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(test_suite)
@@ -17,4 +17,4 @@ from .component import (
     DataComponent,
     NullComponent,
 )
-from .settings import atol, rtol, decr, dtype_float
+from .settings import atol, rtol, decr, dtype_float, index_directory
@@ -162,6 +162,11 @@ class Clock(object):
         dumping_increment = int(dumping_step // self.timedelta.total_seconds())
         self.switches["dumping"][0::dumping_increment] = True
 
+    def get_dumping_timeindices(self, category):
+        # dumps occur before running the component timestep starting
+        # at the same time, so they are expressed as component timeindex
+        return np.flatnonzero(self.switches["dumping"]) // self.increments[category]
+
     def get_current_datetime(self):
         return self._current_datetime
 
@@ -1,9 +1,12 @@
 from os import path, sep
+from multiprocessing import shared_memory
 from netCDF4 import Dataset
 from datetime import datetime
 import cftime
 import numpy as np
 
+from .io import netcdf_lock, open_dataset, get_time_index
+from .remap import get_remap
 from ..settings import dtype_float
 
 
@@ -29,19 +32,44 @@ class Exchanger(object):
                         transfers[t]["src_cat"] = components[c].category
                         # store component spacedomain for remapping
                         transfers[t]["src_sd"] = components[c].spacedomain
+                        # store whether component writes value in place
+                        transfers[t]["in_place"] = components[c].writes_outwards
+                        # store whether component only provides the
+                        # values for the land elements of its spacedomain
+                        transfers[t]["compact"] = components[c].compact_land
+
+        # store the components actually consuming each transfer (i.e.
+        # not a DataComponent nor a NullComponent, which have no inwards,
+        # nor a destination outside framework)
+        for t in transfers:
+            transfers[t]["consumers"] = tuple(
+                c
+                for c in transfers[t].get("to", [])
+                if c in components and t in components[c].inwards_info
+            )
 
         self.transfers = transfers
-        # set up transfers according to components' time-/spacedomains
-        self.clock = None
-        self.compass = None
-        self.set_up(clock, compass)
+
+        # store which components only compute the land elements of
+        # their spacedomain
+        self.compact_land = {c: components[c].compact_land for c in components}
 
         # assign identifier
         self.identifier = identifier
 
         # directories and files
+        # (note, saving directory also used to cache remapping weights)
         self.saving_directory = saving_directory
         self.dump_file = None
+        self.files = None
+
+        # set up transfers according to components' time-/spacedomains
+        self.clock = None
+        self.compass = None
+        self.set_up(clock, compass)
+
+        # shared memory blocks (if transfers are shared across processes)
+        self._shared_blocks = []
 
     def set_up(self, clock, compass, overwrite=False):
         # (re)assign clock and compass to exchanger
@@ -55,6 +83,26 @@ class Exchanger(object):
             for c in clock.timedomains
         }
 
+        # remapping operators are only determined once for each pair of
+        # source and destination spacedomains (shared by many transfers)
+        remaps = {}
+        # buffers to stack the values remapped together by the same
+        # operator (allocated on first use, for each receiving component
+        # and each set of transfers requested together)
+        self._stacks = {}
+
+        # masks applied to the values given to components are computed
+        # once for each receiving component (none if component is only
+        # given the values for its land elements)
+        masks = {
+            c: (
+                None
+                if sd.land_sea_mask is None or self.compact_land.get(c)
+                else ~sd.land_sea_mask
+            )
+            for c, sd in compass.spacedomains.items()
+        }
+
         # set up each transfer
         for t in self.transfers:
             histories = []
@@ -66,50 +114,52 @@ class Exchanger(object):
                 if self.transfers[t]["src_sd"].has_vertical_axis()
                 else self.transfers[t]["src_sd"].shape
             )
+            # (only storing land elements if source component only
+            # computes these)
+            if self.transfers[t]["compact"]:
+                shape = self.transfers[t]["src_sd"].land_shape[-1:]
 
-            # special case for transfers towards a DataComponent or
+            # special case for transfers only towards a DataComponent or
             # a NullComponent (or towards outside framework, which will
             # remain possible until Ocean and Atmosphere components are
             # implemented in the framework)
-            if self.transfers[t].get("from") is None:
+            consumers = self.transfers[t]["consumers"]
+            if not consumers:
                 # in this case only set_transfer will be called,
                 # no component is going to call get_transfer, so no need
                 # for time weights, but because transfers still need to be
                 # stored for dump, need to define 'history' for creation
-                # of 'array' and 'slices'
+                # of 'array'
                 histories.append(1)
             else:
-                src_ts = steps[self.transfers[t]["from"]]
-                for c in self.transfers[t]["to"]:
+                src_ts = steps[self.transfers[t]["src_cat"]]
+                for c in consumers:
                     dst_ts = steps[c]
                     # add a key to store info specific to receiving component
                     self.transfers[t][c] = {}
 
-                    # check if spacedomains are different, if identical set
-                    # to None to avoid unnecessary remapping
                     src_sd = self.transfers[t]["src_sd"]
-                    src_fld = src_sd.to_field()
                     dst_sd = compass.spacedomains[c]
-                    dst_fld = dst_sd.to_field()
-
-                    # eliminate Z axis by squeezing fields because
-                    # remapping for transfers on a 2D interface
-                    if src_sd.has_vertical_axis():
-                        src_fld.squeeze(src_sd.vertical_axis, inplace=True)
-                    if dst_sd.has_vertical_axis():
-                        dst_fld.squeeze(dst_sd.vertical_axis, inplace=True)
-
-                    if src_sd.is_space_equal_to(dst_fld):
-                        self.transfers[t][c]["remap"] = None
-                    else:
-                        # now assign a tuple to 'remap' where first item
-                        # is the source field and the second item is the
-                        # preprocessed remapping operator (expensive
-                        # step but done only once at initialisation)
-                        remap = src_fld.regrids(
-                            dst_fld, "conservative", return_operator=True
-                        )
-                        self.transfers[t][c]["remap"] = (src_fld, remap)
+                    pair = (id(src_sd), id(dst_sd))
+                    if pair not in remaps:
+                        remaps[pair] = self._get_remap(src_sd, dst_sd)
+                    self.transfers[t][c]["remap"] = remaps[pair]
+                    self.transfers[t][c]["mask"] = masks[c]
+
+                    # determine whether values need to be scattered onto
+                    # the whole source spacedomain and/or gathered for
+                    # the land elements of the destination spacedomain
+                    # (not if both only feature the same land elements)
+                    src_compact = self.transfers[t]["compact"]
+                    dst_compact = self.compact_land[c]
+                    direct = (
+                        remaps[pair] is None
+                        and src_compact
+                        and dst_compact
+                        and np.array_equal(src_sd.land_sea_mask, dst_sd.land_sea_mask)
+                    )
+                    self.transfers[t][c]["unpack"] = src_compact and not direct
+                    self.transfers[t][c]["pack"] = dst_compact and not direct
 
                     # determine the time weights that will be used by the
                     # exchanger on the stored timesteps when a transfer
@@ -119,21 +169,38 @@ class Exchanger(object):
                     )
 
                     # history is the number of timesteps that are stored
-                    history = t_weights.shape[-1]
+                    # (only the most recent one is ever read for 'point')
+                    history = (
+                        1
+                        if self.transfers[t]["method"] == "point"
+                        else t_weights.shape[-1]
+                    )
                     self.transfers[t][c]["history"] = history
-                    histories.append(history)
 
-                    # special case if method is sum
-                    if self.transfers[t]["method"] == "sum":
+                    # if receiving component is slower by an integer
+                    # multiple, all timesteps in its history have the
+                    # same weight, so rather than being stored they can
+                    # be accumulated as they are set
+                    accumulate = (
+                        self.transfers[t]["method"] in ["mean", "sum"]
+                        and dst_ts > src_ts
+                        and dst_ts % src_ts == 0
+                    )
+                    self.transfers[t][c]["accumulate"] = accumulate
+                    histories.append(1 if accumulate else history)
+
+                    # turn time weights into the factors to apply to
+                    # the stored timesteps in the weighted reduction
+                    if self.transfers[t]["method"] == "mean":
                         # time weights need to sum to one
-                        t_weights = t_weights / dst_ts
-                        # need to add dimensions of size 1 for numpy
-                        # broadcasting in weighted sum
-                        t_weights = np.expand_dims(
-                            t_weights, axis=[-(i + 1) for i in range(len(shape))]
+                        t_weights = t_weights / np.sum(
+                            t_weights, axis=-1, keepdims=True
                         )
+                    elif self.transfers[t]["method"] == "sum":
+                        # time weights need to sum to one
+                        t_weights = t_weights / dst_ts
 
-                    self.transfers[t][c]["t_weights"] = t_weights
+                    self.transfers[t][c]["t_weights"] = t_weights.astype(dtype_float())
 
                     # initialise iterator that allows the exchanger to know
                     # which time weights to use
@@ -143,21 +210,88 @@ class Exchanger(object):
             history = max(histories)
             self.transfers[t]["history"] = history
 
+            # if source component writes the value in place, an extra
+            # timestep is stored for it to write the next value into
+            # while the stored timesteps are being read
+            size = history + 1 if self.transfers[t]["in_place"] else history
+
             # if required or requested, initialise array to store
             # required timesteps
-            if (
+            reset = (
                 overwrite
                 or ("array" not in self.transfers[t])
                 or (
                     "array" in self.transfers[t]
-                    and (self.transfers[t]["array"].shape != ((history,) + shape))
+                    and (self.transfers[t]["array"].shape != ((size,) + shape))
                 )
-            ):
-                arr = np.zeros((history,) + shape, dtype_float())
-                self.transfers[t]["array"] = arr
-                # set up slices that are views of the array that is
-                # to be rolled around each time a transfer is asked
-                self.transfers[t]["slices"] = [arr[i] for i in range(history)]
+            )
+            if reset:
+                # (array is used as a ring buffer where 'head' is the
+                # index of the most recent timestep)
+                self.transfers[t]["array"] = np.zeros((size,) + shape, dtype_float())
+                self.transfers[t]["head"] = size - 1
+            # (timestep given to source component to write into, if any)
+            self.transfers[t]["buffer"] = None
+
+            # determine, for each position of the head, the indices of
+            # the timesteps each receiving component needs (in
+            # chronological order), and preallocate the buffers used to
+            # compute the value of the transfer for this component
+            accumulating = []
+            for c in consumers:
+                if self.transfers[t][c]["accumulate"]:
+                    # (accumulator is kept across set-ups, like the
+                    # array, unless the array is re-initialised)
+                    if reset or "acc" not in self.transfers[t][c]:
+                        self.transfers[t][c]["acc"] = np.zeros(shape, dtype_float())
+                    accumulating.append(c)
+                else:
+                    keep = self.transfers[t][c]["history"]
+                    self.transfers[t][c]["order"] = (
+                        np.arange(size)[:, np.newaxis]
+                        + np.arange(size - keep + 1, size + 1)[np.newaxis, :]
+                    ) % size
+                    self.transfers[t][c]["weights"] = np.zeros((size,), dtype_float())
+                self.transfers[t][c]["value"] = np.zeros(shape, dtype_float())
+            self.transfers[t]["accumulating"] = tuple(accumulating)
+
+            # determine, for each value to be set for this transfer,
+            # whether a receiving component is going to read it before
+            # the next one is set, and whether a dump is going to read it
+            # (only exploitable if the array only stores the most recent
+            # timestep and nothing is accumulated, otherwise all values
+            # need to be stored)
+            if history == 1 and not accumulating:
+                demand, dumped = self._calculate_demand(
+                    self.transfers[t]["src_cat"], consumers, clock.switches
+                )
+            else:
+                demand, dumped = None, None
+            self.transfers[t]["demand"] = demand
+            self.transfers[t]["dumped"] = dumped
+            # initialise counter of values set for this transfer
+            self.transfers[t]["sets"] = 0
+
+    def _get_remap(self, src_sd, dst_sd):
+        # check if spacedomains are different, if identical return
+        # None to avoid unnecessary remapping
+        src_fld = src_sd.to_field()
+        dst_fld = dst_sd.to_field()
+
+        # eliminate Z axis by squeezing fields because
+        # remapping for transfers on a 2D interface
+        if src_sd.has_vertical_axis():
+            src_fld.squeeze(src_sd.vertical_axis, inplace=True)
+        if dst_sd.has_vertical_axis():
+            dst_fld.squeeze(dst_sd.vertical_axis, inplace=True)
+
+        if src_sd.is_space_equal_to(dst_fld):
+            return None
+
+        # now return the remapping operator (expensive step, so the
+        # operator is cached in memory and on disk to be reused by
+        # other runs, and other models on the same grids)
+        return get_remap(src_sd, dst_sd, src_fld, dst_fld, self.saving_directory)
 
     @staticmethod
     def _calculate_temporal_weights(src, dst, length):
@@ -252,7 +386,46 @@ class Exchanger(object):
 
         return weights
 
-    def initialise_(self, tag, overwrite=True):
+    @staticmethod
+    def _calculate_demand(src, dst, switches):
+        """
+        **Examples:**
+
+        >>> switches = {
+        ...     'a': np.array([True, True, True, True, True, True]),
+        ...     'b': np.array([False, False, True, False, False, True]),
+        ...     'dumping': np.array([True, False, False, False, True, False])
+        ... }
+        >>> demand, dumped = Exchanger._calculate_demand('a', ['b'], switches)
+        >>> demand
+        array([False,  True, False, False,  True, False])
+        >>> dumped
+        array([False, False, False,  True, False,  True])
+        """
+        # values are set at the end of the clock iterations where the
+        # source component runs, and the value set in a given iteration
+        # is the most recent one until the end of the iteration where
+        # the next value is set (or until the end of the run)
+        sets = np.flatnonzero(switches[src])
+        ends = np.append(sets[1:], switches[src].size - 1)
+
+        # receiving components read the most recent value when they run
+        reads = np.zeros(switches[src].shape, dtype=bool)
+        for c in dst:
+            reads |= switches[c]
+        reads = np.cumsum(reads)
+        demand = (reads[ends] - reads[sets]) > 0
+
+        # dumps read the most recent value at the start of the clock
+        # iterations where they occur, and at the end of the run
+        dumps = np.cumsum(switches["dumping"])
+        dumped = (dumps[ends] - dumps[sets]) > 0
+        dumped[-1:] = True
+
+        return demand, dumped
+
+    def initialise_(self, tag, overwrite=True, files=None):
+        self.files = files
         self.dump_file = "_".join(
             [self.identifier, "exchanger", tag, "dump_transfers.nc"]
         )
@@ -268,81 +441,246 @@ class Exchanger(object):
 
     def dump_transfers(self, timestamp):
         update_transfers_dump(
-            sep.join([self.saving_directory, self.dump_file]), self.transfers, timestamp
+            sep.join([self.saving_directory, self.dump_file]),
+            self.transfers,
+            timestamp,
+            self.files,
         )
 
     def finalise_(self):
         timestamp = self.clock.timedomain.bounds.array[-1, -1]
         update_transfers_dump(
-            sep.join([self.saving_directory, self.dump_file]), self.transfers, timestamp
+            sep.join([self.saving_directory, self.dump_file]),
+            self.transfers,
+            timestamp,
+            self.files,
         )
 
     def get_transfer(self, name, component):
-        i = self.transfers[name][component]["iter"]
-        history = self.transfers[name][component]["history"]
+        value = self._reduce_transfer(name, component)
+        info = self.transfers[name][component]
+
+        # TODO: remap value from supermesh resolution to destination resolution
+        # REPLACED BY:
+        # remap value from source resolution to destination resolution
+        remap = info["remap"]
+        if remap is not None:
+            value = remap(value)
+
+        return self._finish_transfer(value, info, component)
+
+    def _finish_transfer(self, value, info, component):
+        # gather land elements if component only computes these
+        if info["pack"]:
+            value = self.compass.spacedomains[component].pack_land(value, axis=0)
+
+        # convert value to masked array if mask exists
+        if info["mask"] is not None:
+            value = np.ma.array(value, mask=info["mask"])
+
+        return value
+
+    def get_transfers(self, names, component):
+        # same as get_transfer but for several transfers at once, where
+        # the values requiring the same remapping are stacked and
+        # remapped together (in one sparse matrix-matrix product)
+        values = {}
+        batches = {}
+        for name in names:
+            value = self._reduce_transfer(name, component)
+            remap = self.transfers[name][component]["remap"]
+            if remap is None:
+                values[name] = value
+            else:
+                batches.setdefault(id(remap), (remap, []))[1].append((name, value))
+
+        for remap, batch in batches.values():
+            if len(batch) == 1:
+                name, value = batch[0]
+                values[name] = remap(value)
+            else:
+                # (stacked into a buffer reused at each call)
+                key = (component, tuple(name for name, _ in batch))
+                stacked = self._stacks.get(key)
+                if stacked is None:
+                    stacked = np.empty((len(batch),) + batch[0][1].shape, dtype_float())
+                    self._stacks[key] = stacked
+                for i, (_, value) in enumerate(batch):
+                    stacked[i] = value
+                remapped = remap(stacked)
+                for (name, _), value in zip(batch, remapped):
+                    values[name] = value
+
+        for name in values:
+            values[name] = self._finish_transfer(
+                values[name], self.transfers[name][component], component
+            )
+
+        return values
+
+    def _reduce_transfer(self, name, component):
+        transfer = self.transfers[name]
+        info = transfer[component]
+        i = info["iter"]
+        array = transfer["array"]
+        head = transfer["head"]
 
         # customise the action between existing and incoming arrays
         # depending on method for that particular transfer
-        if self.transfers[name]["method"] == "mean":
-            value = np.average(
-                self.transfers[name]["slices"][-history:],
-                weights=self.transfers[name][component]["t_weights"][i],
-                axis=0,
-            )
-        elif self.transfers[name]["method"] == "sum":
-            value = np.sum(
-                self.transfers[name]["slices"][-history:]
-                * self.transfers[name][component]["t_weights"][i],
-                axis=0,
-            )
-        elif self.transfers[name]["method"] == "point":
-            value = self.transfers[name]["slices"][-1]
-        elif self.transfers[name]["method"] == "minimum":
-            value = np.amin(self.transfers[name]["slices"][-history:], axis=0)
-        elif self.transfers[name]["method"] == "maximum":
-            value = np.amax(self.transfers[name]["slices"][-history:], axis=0)
+        method = transfer["method"]
+        if info["accumulate"]:
+            # accumulator holds the sum of the timesteps set since the
+            # last call, except for the most recent one still stored
+            value = info["value"]
+            np.add(info["acc"], array[head], out=value)
+            value *= info["t_weights"][i, 0]
+            # most recent timestep is about to be added to accumulator
+            # again when the next one is set, so it is discounted now
+            np.negative(array[head], out=info["acc"])
+        elif method == "mean" or method == "sum":
+            # place time weights (already normalised) at the ring buffer
+            # positions of the timesteps they apply to, and reduce the
+            # buffer along time into the preallocated value
+            weights = info["weights"]
+            weights[:] = 0.0
+            weights[info["order"][head]] = info["t_weights"][i]
+            value = info["value"]
+            np.dot(weights, array.reshape(array.shape[0], -1), out=value.reshape(-1))
+        elif method == "point":
+            value = array[head]
+        elif method == "minimum" or method == "maximum":
+            # (order of timesteps does not matter for these reductions)
+            if info["history"] < array.shape[0]:
+                array = array[info["order"][head]]
+            reduce_ = np.amin if method == "minimum" else np.amax
+            value = reduce_(array, axis=0, out=info["value"])
         else:
             raise ValueError("method for exchanger transfer unknown")
 
-        # TODO: remap value from supermesh resolution to destination resolution
-        # REPLACED BY:
-        # remap value from source resolution to destination resolution
-        if self.transfers[name][component]["remap"] is not None:
-            src, remap = self.transfers[name][component]["remap"]
-            src[:] = value
-            value = src.regrids(remap).array
-
         # record that another value was retrieved by incrementing count
-        self.transfers[name][component]["iter"] += 1
+        info["iter"] += 1
 
-        # convert value to masked array if mask exists
-        mask = self.compass.spacedomains[component].land_sea_mask
-        if mask is not None:
-            value = np.ma.array(value, mask=~mask)
+        # value is either a preallocated buffer or a timestep of the
+        # ring buffer (both reused later on), so it is given as a
+        # read-only view for any attempt at modifying it to fail loudly
+        value = value.view()
+        value.flags.writeable = False
+
+        # scatter land elements onto whole source spacedomain if needed
+        if info["unpack"]:
+            value = np.ma.getdata(transfer["src_sd"].unpack_land(value, axis=0))
 
         return value
 
+    def rotate_transfer(self, name):
+        # make room for new value by time incrementing
+        # (i.e. the least recent timestep becomes the most recent one)
+        transfer = self.transfers[name]
+        transfer["head"] = (transfer["head"] + 1) % transfer["array"].shape[0]
+
+    def get_outwards_buffers(self, names):
+        # give the timestep following the most recent one for the source
+        # component to write the next value of each transfer into (which
+        # is not read by any component, because the array features one
+        # more timestep than needed for this purpose)
+        buffers = {}
+        for name in names:
+            transfer = self.transfers[name]
+            array = transfer["array"]
+            transfer["buffer"] = array[(transfer["head"] + 1) % array.shape[0]]
+            buffers[name] = transfer["buffer"]
+        return buffers
+
+    def set_latest_transfer(self, name, value):
+        # assign the most recent value of the transfer (given for the
+        # whole source spacedomain)
+        if self.transfers[name]["compact"]:
+            value = self.transfers[name]["src_sd"].pack_land(value, axis=0)
+        self.get_latest_transfer(name)[...] = value
+
+    def get_latest_transfer(self, name):
+        # return the most recent value set for the transfer
+        transfer = self.transfers[name]
+        return transfer["array"][transfer["head"]]
+
     def set_transfer(self, name, array):
         # TODO: remap value from source resolution to supermesh resolution
 
-        # make room for new value by time incrementing
-        lhs = [a for a in self.transfers[name]["slices"]]
-        rhs = [a for a in self.transfers[name]["slices"][1:]] + [
-            self.transfers[name]["slices"][0]
-        ]
+        transfer = self.transfers[name]
 
-        lhs[:] = rhs[:]
+        # value already in array if written into the buffer given
+        in_place = array is transfer["buffer"]
+        transfer["buffer"] = None
 
-        self.transfers[name]["slices"][:] = lhs
-        self.transfers[name]["slices"][-1][:] = array
+        # skip copying values neither a receiving component nor a dump
+        # is going to read (values read by a dump are copied because the
+        # component may reuse or modify the array it returned before the
+        # dump happens)
+        copy = not in_place
+        demand = transfer["demand"]
+        if demand is not None:
+            i = transfer["sets"]
+            transfer["sets"] += 1
+            if i < demand.size and not demand[i] and not transfer["dumped"][i]:
+                copy = False
+
+        # accumulate current most recent timestep before it is replaced
+        for c in transfer["accumulating"]:
+            transfer[c]["acc"] += transfer["array"][transfer["head"]]
+
+        # make room for new value by time incrementing (even if the value
+        # is not copied, because processes other than the one setting
+        # the value only follow the time incrementing of the transfer)
+        self.rotate_transfer(name)
+
+        if copy:
+            self.get_latest_transfer(name)[...] = array
 
     def update_transfers(self, transfers):
         for name, array in transfers.items():
             self.set_transfer(name, array)
 
+    def share_transfers_(self):
+        # move the arrays storing the transfers into shared memory so
+        # that processes forked thereafter all see the same values
+        # (note, the head of each ring buffer is private to each process
+        # so all processes must rotate all transfers in the same order)
+        for t in self.transfers:
+            self.transfers[t]["array"] = self._share(self.transfers[t]["array"])
+            # (so are the accumulators, set by one process and reset by
+            # another one)
+            for c in self.transfers[t]["accumulating"]:
+                self.transfers[t][c]["acc"] = self._share(self.transfers[t][c]["acc"])
+
+    def _share(self, array):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._shared_blocks.append(block)
+
+        shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+        shared[...] = array
+        return shared
+
+    def unshare_transfers_(self):
+        # move the arrays storing the transfers back into private memory
+        # and release the shared memory
+        for t in self.transfers:
+            self.transfers[t]["array"] = np.array(self.transfers[t]["array"])
+            for c in self.transfers[t]["accumulating"]:
+                self.transfers[t][c]["acc"] = np.array(self.transfers[t][c]["acc"])
+
+        for block in self._shared_blocks:
+            block.unlink()
+            try:
+                block.close()
+            except BufferError:
+                # views still referenced elsewhere, memory is going to
+                # be released once they are garbage collected
+                pass
+        self._shared_blocks = []
+
 
 def create_transfers_dump(filepath, transfers_info, timedomain, spacedomains):
-    with Dataset(filepath, "w") as f:
+    with netcdf_lock, Dataset(filepath, "w") as f:
         # description
         f.description = (
             f"dump file created on "
@@ -396,28 +734,28 @@ def create_transfers_dump(filepath, transfers_info, timedomain, spacedomains):
             s.units = transfers_info[trf]["units"]
 
 
-def update_transfers_dump(filepath, transfers, timestamp):
-    with Dataset(filepath, "a") as f:
-        try:
-            # check whether given snapshot already in file
-            t = cftime.time2index(timestamp, f.variables["time"])
-        # will get a IndexError if time variable is empty
-        # will get a ValueError if timestamp not in time variable
-        except (IndexError, ValueError):
+def update_transfers_dump(filepath, transfers, timestamp, files=None):
+    with open_dataset(filepath, files) as f:
+        # check whether given snapshot already in file
+        index = get_time_index(f, files)
+        t = index.get(timestamp)
+        if t is None:
             # if not, extend time dimension
-            t = len(f.variables["time"])
+            t = index.append(timestamp)
             f.variables["time"][t] = timestamp
 
         for trf in transfers:
-            f.groups[transfers[trf]["src_cat"]].variables[trf][t, ...] = transfers[trf][
-                "slices"
-            ][-1]
+            value = transfers[trf]["array"][transfers[trf]["head"]]
+            # scatter land elements onto whole source spacedomain
+            if transfers[trf]["compact"]:
+                value = transfers[trf]["src_sd"].unpack_land(value, axis=0)
+            f.groups[transfers[trf]["src_cat"]].variables[trf][t, ...] = value
 
 
 def load_transfers_dump(filepath, datetime_, transfers_info):
     transfers = {}
 
-    with Dataset(filepath, "r") as f:
+    with netcdf_lock, Dataset(filepath, "r") as f:
         f.set_always_mask(False)
         # determine point in time to use from the dump
         if datetime_ is None:
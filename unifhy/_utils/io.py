@@ -0,0 +1,414 @@
+import threading
+import queue
+import json
+import hashlib
+from os import path, sep, replace, getpid
+from contextlib import contextmanager
+from netCDF4 import Dataset, default_fillvals
+from scipy.io import netcdf_file
+from cfunits import Units
+import numpy as np
+
+from ..settings import atol, rtol
+
+# lock to serialise access to the netCDF-C/HDF5 libraries, which are
+# not guaranteed to be thread-safe, as soon as more than one thread
+# may be reading from or writing to files (e.g. asynchronous writer)
+netcdf_lock = threading.RLock()
+
+
+@contextmanager
+def open_dataset(filepath, files=None):
+    # open netCDF file for update, either in a managed way (i.e. the
+    # file handle remains open after use if a manager is provided) or
+    # in a self-contained way (i.e. the file is closed after use)
+    with netcdf_lock:
+        if files is None:
+            with Dataset(filepath, "a") as f:
+                yield f
+        else:
+            yield files.get(filepath)
+
+
+def get_time_index(dataset, files=None):
+    # retrieve in-memory index for the time dimension of netCDF file,
+    # which persists as long as the file is managed (if a manager is
+    # provided), otherwise it is seeded afresh from the file
+    if files is None:
+        return TimeIndex(dataset.variables["time"])
+    return files.time_index(dataset)
+
+
+class TimeIndex(object):
+    """Mapping from timestamps to their position along the time
+    dimension of a netCDF file, seeded once from the file content and
+    then kept up-to-date by the writers of the file, which avoids
+    reading the whole time dimension from disk on each update.
+    """
+
+    def __init__(self, variable):
+        values = np.ma.getdata(variable[:]).tolist()
+        self._indices = {v: i for i, v in enumerate(values)}
+        self._length = len(values)
+
+    def __len__(self):
+        return self._length
+
+    def get(self, timestamp):
+        return self._indices.get(float(timestamp))
+
+    def set(self, timestamp, index):
+        self._indices[float(timestamp)] = int(index)
+        self._length = max(self._length, int(index) + 1)
+
+    def append(self, timestamp):
+        index = self._length
+        self.set(timestamp, index)
+        return index
+
+
+class FileManager(object):
+    """Manager keeping netCDF files open for update once they have
+    been requested, until explicitly closed.
+
+    This avoids opening and closing the same file each time a value
+    needs to be appended to it (e.g. records, dumps).
+    """
+
+    def __init__(self):
+        self._datasets = {}
+        self._time_indices = {}
+
+    def get(self, filepath):
+        with netcdf_lock:
+            dataset = self._datasets.get(filepath)
+            if dataset is None or not dataset.isopen():
+                dataset = Dataset(filepath, "a")
+                self._datasets[filepath] = dataset
+                self._time_indices.pop(filepath, None)
+        return dataset
+
+    def time_index(self, dataset):
+        filepath = dataset.filepath()
+        if filepath not in self._time_indices:
+            self._time_indices[filepath] = TimeIndex(dataset.variables["time"])
+        return self._time_indices[filepath]
+
+    def sync(self):
+        # flush buffered data to disk for all open files
+        with netcdf_lock:
+            for dataset in self._datasets.values():
+                if dataset.isopen():
+                    dataset.sync()
+
+    def close(self):
+        with netcdf_lock:
+            errors = []
+            for filepath, dataset in self._datasets.items():
+                try:
+                    if dataset.isopen():
+                        dataset.close()
+                except Exception as e:
+                    errors.append(f"{filepath} ({e})")
+            self._datasets.clear()
+            self._time_indices.clear()
+        if errors:
+            raise RuntimeError(f"failed to close file(s): {', '.join(errors)}")
+
+
+class AsyncWriter(object):
+    """Writer draining a bounded queue of write operations on a
+    background thread.
+
+    Operations are submitted as callables with their arguments, and
+    they are processed in submission order. When the queue is full,
+    submitting blocks until room becomes available (i.e. back-pressure
+    on the producer). Any error raised by an operation is stored and
+    raised back to the producer on its next interaction with the writer.
+    """
+
+    def __init__(self, maxsize=8):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._drain, name="unifhy-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                # once an error occurred, remaining operations are
+                # discarded since files are likely to be inconsistent
+                if self._error is None:
+                    func, args = item
+                    try:
+                        func(*args)
+                    except BaseException as e:
+                        self._error = e
+            finally:
+                self._queue.task_done()
+
+    def raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("asynchronous writing to file failed") from self._error
+
+    def submit(self, func, *args):
+        self.raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("asynchronous writer already closed")
+        self._queue.put((func, args))
+
+    def flush(self):
+        self._queue.join()
+        self.raise_error()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.raise_error()
+
+
+class FileIndex(object):
+    """Identities of the variables contained in the netCDF files of a
+    directory, refreshed only for the files modified since they were
+    last indexed, which avoids reading every file to find out the ones
+    containing the variables required.
+
+    The index is kept in memory, and it is also persisted (in a netCDF
+    file holding only global attributes) if an index directory is
+    given, so that it can be reused by other processes.
+    """
+
+    def __init__(self, directory, index_directory=None):
+        self.directory = path.abspath(directory)
+        self.index_directory = index_directory
+        self.filepath = None
+        self._entries = {}
+        self._modified = False
+
+        if index_directory is None:
+            return
+
+        digest = hashlib.sha256(self.directory.encode()).hexdigest()[:16]
+        self.filepath = sep.join([index_directory, f"index_{digest}.nc"])
+
+        if path.exists(self.filepath):
+            try:
+                with netcdf_lock, Dataset(self.filepath, "r") as f:
+                    if f.getncattr("directory") == self.directory:
+                        self._entries = json.loads(f.getncattr("index"))
+            except (OSError, AttributeError, ValueError):
+                # unreadable index is rebuilt from scratch
+                self._entries = {}
+
+    def identities(self, filepath):
+        name = path.basename(filepath)
+        mtime = path.getmtime(filepath)
+        entry = self._entries.get(name)
+        if entry is None or entry["mtime"] != mtime:
+            entry = {"mtime": mtime, "identities": self._scan(filepath)}
+            self._entries[name] = entry
+            self._modified = True
+        return entry["identities"]
+
+    @staticmethod
+    def _scan(filepath):
+        # collect all the identities a variable in the file can be
+        # selected by, which is a superset of the identities of the
+        # fields that cf-python reads from the file
+        identities = set()
+        try:
+            with netcdf_lock, Dataset(filepath, "r") as f:
+                for ncvar, variable in f.variables.items():
+                    identities.add(f"ncvar%{ncvar}")
+                    for attrib in ["standard_name", "long_name"]:
+                        value = getattr(variable, attrib, None)
+                        if value is not None:
+                            identities.update([str(value), f"{attrib}={value}"])
+        except OSError:
+            # not a netCDF file, so its content is unknown
+            return None
+        return sorted(identities)
+
+    def save(self):
+        if not self._modified or self.filepath is None:
+            return
+        # write to a temporary file first so that another model never
+        # reads a partially written index
+        temporary = f"{self.filepath}.{getpid()}.tmp"
+        try:
+            with netcdf_lock:
+                with Dataset(temporary, "w", format="NETCDF3_CLASSIC") as f:
+                    f.setncattr("directory", self.directory)
+                    f.setncattr("index", json.dumps(self._entries))
+                replace(temporary, self.filepath)
+        except OSError:
+            # directory not writable, so index only kept in memory
+            pass
+        self._modified = False
+
+
+class HyperslabReader(object):
+    """Reader of consecutive timesteps of a field straight from the
+    hyperslabs of the netCDF variable backing it (or from a memory map
+    of the file if it is in classic format and the variable requires
+    neither masking nor scaling), bypassing the cf-python machinery.
+
+    It can only be built if the field maps unambiguously onto the
+    variable (i.e. a single file, the same dimensions and units, and
+    each dimension coordinate a contiguous increasing range of the
+    coordinate variable in the file), otherwise the field must be read
+    with cf-python.
+
+    The file is opened on the first read and kept open for the following
+    ones (by the process that opened it, a forked process opening its
+    own handle), until the reader is closed or garbage collected.
+    """
+
+    # variable attributes requiring values to be masked or scaled
+    _packing = (
+        "scale_factor",
+        "add_offset",
+        "_FillValue",
+        "missing_value",
+        "valid_min",
+        "valid_max",
+        "valid_range",
+    )
+
+    def __init__(self, filepath, ncvar, starts, sizes, axes, dtype, memmap=False):
+        self.filepath = filepath
+        self.ncvar = ncvar
+        # position and length of the field in each variable dimension
+        self.starts = tuple(starts)
+        self.sizes = tuple(sizes)
+        # variable dimension for each field axis (the first one being
+        # the time axis along which timesteps are read)
+        self.axes = tuple(axes)
+        self.dtype = dtype
+        self.memmap = memmap
+        # file handle and process it was opened by
+        self._file = None
+        self._pid = None
+
+    def __getstate__(self):
+        # file handle cannot be carried over to another process
+        state = self.__dict__.copy()
+        state["_file"], state["_pid"] = None, None
+        return state
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _open(self):
+        if self._file is None or self._pid != getpid():
+            if self.memmap:
+                self._file = netcdf_file(self.filepath, "r", mmap=True)
+            else:
+                self._file = Dataset(self.filepath, "r")
+            self._pid = getpid()
+        return self._file
+
+    def close(self):
+        with netcdf_lock:
+            # (handle inherited from another process is left to it)
+            if self._file is not None and self._pid == getpid():
+                self._file.close()
+            self._file, self._pid = None, None
+
+    @classmethod
+    def from_field(cls, field):
+        filenames = field.get_filenames()
+        ncvar = field.nc_get_variable(None)
+        if len(filenames) != 1 or ncvar is None:
+            return None
+        (filepath,) = filenames
+
+        with netcdf_lock, Dataset(filepath, "r") as f:
+            variable = f.variables.get(ncvar)
+            if variable is None or variable.ndim != field.ndim:
+                return None
+            if not field.Units.equals(Units(getattr(variable, "units", None))):
+                return None
+
+            dims = variable.dimensions
+            starts, sizes, axes = [0] * len(dims), list(variable.shape), []
+            for axis, size in zip(field.get_data_axes(), field.shape):
+                dim = field.domain_axis(axis).nc_get_dimension(None)
+                if dim not in dims or dims.index(dim) in axes:
+                    return None
+                start = cls._locate(
+                    field.dimension_coordinate(filter_by_axis=(axis,), default=None),
+                    f.variables.get(dim),
+                    len(f.dimensions[dim]),
+                    size,
+                )
+                if start is None:
+                    return None
+                starts[dims.index(dim)] = start
+                sizes[dims.index(dim)] = size
+                axes.append(dims.index(dim))
+
+            memmap = f.file_format in (
+                "NETCDF3_CLASSIC",
+                "NETCDF3_64BIT_OFFSET",
+            ) and not any(a in variable.ncattrs() for a in cls._packing)
+
+        return cls(filepath, ncvar, starts, sizes, axes, field.dtype, memmap)
+
+    @staticmethod
+    def _locate(coordinate, variable, length, size):
+        # position of the coordinate values in the coordinate variable
+        # (the whole dimension is expected if either is missing)
+        if coordinate is None or variable is None:
+            return 0 if length == size else None
+
+        units = Units(
+            getattr(variable, "units", None), getattr(variable, "calendar", None)
+        )
+        if not coordinate.Units.equivalent(units):
+            return None
+        values = Units.conform(coordinate.array, coordinate.Units, units)
+        candidates = np.ma.getdata(variable[:])
+
+        for start in np.flatnonzero(np.isclose(candidates, values[0], rtol(), atol())):
+            if candidates[start : start + size].shape == values.shape and np.allclose(
+                candidates[start : start + size], values, rtol(), atol()
+            ):
+                return int(start)
+        return None
+
+    def __call__(self, start, stop):
+        # index the variable in the order of its dimensions, restricting
+        # the time dimension to the requested timesteps
+        index = [slice(b, b + n) for b, n in zip(self.starts, self.sizes)]
+        time = self.axes[0]
+        stop = min(stop, self.sizes[time])
+        index[time] = slice(self.starts[time] + start, self.starts[time] + stop)
+        index = tuple(index)
+
+        with netcdf_lock:
+            f = self._open()
+            if self.memmap:
+                # copy values out of the map (which is reused by the
+                # following reads)
+                values = np.array(f.variables[self.ncvar].data[index])
+                # values equal to the default fill value are missing
+                fill = default_fillvals.get(values.dtype.str[1:])
+                if fill is not None:
+                    values = np.ma.masked_equal(values, fill, copy=False)
+            else:
+                values = f.variables[self.ncvar][index]
+
+        values = np.transpose(values, self.axes).astype(self.dtype, copy=False)
+        if not np.ma.is_masked(values):
+            values = np.ma.getdata(values)
+        return values
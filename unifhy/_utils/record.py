@@ -3,6 +3,7 @@ from netCDF4 import Dataset
 from datetime import datetime, timedelta
 import cftime
 
+from .io import netcdf_lock, open_dataset, get_time_index
 from ..time import TimeDomain
 from ..settings import dtype_float
 
@@ -25,6 +26,24 @@ _methods_map = {
 }
 
 
+# dictionary of supported aggregation modes for record streams
+# - 'buffered': each value is stored in a slice buffer, and the buffer
+#   is aggregated when the slice is complete
+# - 'streaming': each value is aggregated as soon as it is received in
+#   running accumulators (one per aggregated quantity)
+_aggregation_modes = ("buffered", "streaming")
+
+# dictionary of quantities to accumulate for each aggregation method
+# in streaming aggregation mode
+_methods_quantities = {
+    "mean": ("sum", "count"),
+    "sum": ("sum",),
+    "point": ("point",),
+    "minimum": ("minimum",),
+    "maximum": ("maximum",),
+}
+
+
 def _frequency_to_frequency_tag(freq):
     if freq % timedelta(weeks=1) == timedelta(seconds=0):
         factor = freq // timedelta(weeks=1)
@@ -103,11 +122,16 @@ class OutputRecord(Record):
 
 
 class RecordStream(object):
-    def __init__(self, frequency, writing_slice):
+    def __init__(self, frequency, writing_slice, aggregation="buffered"):
         # check frequency validity
         if not isinstance(frequency, timedelta):
             raise ValueError(f"invalid recording frequency {frequency}")
 
+        # check aggregation mode validity
+        if aggregation not in _aggregation_modes:
+            raise ValueError(f"invalid record aggregation mode {aggregation}")
+        self.aggregation = aggregation
+
         # instantiate attributes to hold temporal information
         self.frequency = frequency
         self.frequency_tag = _frequency_to_frequency_tag(frequency)
@@ -121,21 +145,48 @@ class RecordStream(object):
         self._steps_per_slice = None
         # "beats" refer to the record stream frequency
         self._beats_per_slice = None
+        self._steps_per_beat = None
 
         # instantiate attributes to hold spatial information
         self._spacedomain = None
         self._spaceshapes = {}
+        # whether only the land elements of the spacedomain are stored
+        # (and where they lie in the record arrays)
+        self._compact = False
+        self._land_axis = None
 
         # instantiate holders for file paths
         self.file = None
         self.dump_file = None
 
+        # optional writer to delegate writing to stream file
+        # (if None, writing is done synchronously)
+        self.writer = None
+        # optional manager to keep stream file and dump file open
+        # (if None, files are opened and closed for each update)
+        self.files = None
+
         # mapping to store record objects (keys are record names)
         self._records = {}
         # mapping to store record methods (keys are record names)
         self._methods = {}
         # mapping to store record arrays (keys are record names)
+        # (in buffered aggregation mode only)
         self._arrays = {}
+        # mapping to store record quantities to accumulate (keys are
+        # record names) (in streaming aggregation mode only)
+        self._quantities = {}
+        # mapping to store record accumulators (keys are record names,
+        # values are mappings with quantities as keys and arrays as
+        # values) (in streaming aggregation mode only)
+        self._accumulators = {}
+        # mapping to store the streams fed with the aggregated beats of
+        # this stream rather than with the record values directly, and
+        # mapping to store the stream feeding this stream with its own
+        # aggregated beats (if any) (keys are record names)
+        # (in streaming aggregation mode only)
+        self._children = {}
+        self._sources = {}
         # mapping for integer tracker to know where in array to write next
         # (keys are record names)
         self._array_trackers = {}
@@ -146,7 +197,31 @@ class RecordStream(object):
         self._trigger = None
         self._trigger_tracker = None
 
-    def add_record(self, record, methods):
+    @property
+    def writing_slice(self):
+        return self._desired_steps_per_slice
+
+    @writing_slice.setter
+    def writing_slice(self, writing_slice):
+        # only taken into account when stream is (re)initialised
+        self._desired_steps_per_slice = writing_slice
+
+    def memory_per_step(self, timedelta_, spaceshape):
+        # memory (in bytes) required for one timestep of the records in
+        # the stream (in streaming aggregation mode, the steps in a beat
+        # share one value per quantity to accumulate)
+        itemsize = np.dtype(dtype_float()).itemsize
+        steps_per_beat = max(self.frequency // timedelta_, 1)
+        memory = 0
+        for name, record in self._records.items():
+            size = int(np.prod((*spaceshape, *record.divisions))) * itemsize
+            if self.aggregation == "streaming":
+                memory += len(self._quantities[name]) * size / steps_per_beat
+            else:
+                memory += size
+        return memory
+
+    def add_record(self, record, methods, source=None):
         name = record.name
         # store link to record object
         self._records[name] = record
@@ -160,10 +235,42 @@ class RecordStream(object):
                     f"method {method} for record {name} aggregation unknown"
                 )
         self._methods[name] = methods_
-        # map this very stream in the record
-        record.streams.append(self)
+        self._quantities[name] = {
+            quantity for method in methods_ for quantity in _methods_quantities[method]
+        }
+        self._children[name] = []
+        self._sources[name] = source
+
+        if source is None:
+            # map this very stream in the record
+            record.streams.append(self)
+        else:
+            # map this very stream in the source stream
+            if self.aggregation != "streaming" or source.aggregation != "streaming":
+                raise ValueError(
+                    f"record {name} can only be fed from another stream "
+                    f"in streaming aggregation mode"
+                )
+            if self.frequency % source.frequency != timedelta(seconds=0):
+                raise ValueError(
+                    f"recording frequency ({self.frequency}) for record "
+                    f"{name} not a multiple of its source stream "
+                    f"recording frequency ({source.frequency})"
+                )
+            source._add_child(name, self)
+
+    def _add_child(self, name, stream):
+        self._children[name].append(stream)
+        self._require_quantities(name, stream._quantities[name])
 
-    def initialise(self, timedomain, spacedomain):
+    def _require_quantities(self, name, quantities):
+        # this stream must accumulate the quantities required by the
+        # streams it feeds, and so must the stream feeding it (if any)
+        self._quantities[name].update(quantities)
+        if self._sources[name] is not None:
+            self._sources[name]._require_quantities(name, quantities)
+
+    def initialise(self, timedomain, spacedomain, compact=False):
         # check frequency / timedomain resolution compatibility
         if (self.frequency % timedomain.timedelta) != timedelta(seconds=0):
             raise ValueError(
@@ -202,6 +309,7 @@ class RecordStream(object):
 
         self._steps_per_slice = selected
         self._beats_per_slice = int(selected / steps_per_beat)
+        self._steps_per_beat = steps_per_beat
 
         # create timedomain for stream
         _timedomain = TimeDomain.from_start_end_step(
@@ -219,6 +327,9 @@ class RecordStream(object):
 
         # store spacedomain
         self._spacedomain = spacedomain
+        self._compact = compact
+        self._land_axis = len(spacedomain.shape) - 1
+        shape = spacedomain.land_shape if compact else spacedomain.shape
 
         # initialise record arrays for accumulating values
         self._trigger = 0
@@ -227,15 +338,25 @@ class RecordStream(object):
 
             d = record.divisions
 
-            # initialise array
-            arr = np.zeros(
-                (self._steps_per_slice, *spacedomain.shape, *d), dtype_float()
-            )
-            arr[:] = np.nan
-            self._arrays[name] = arr
+            if self.aggregation == "streaming":
+                # initialise accumulators (one value per beat in slice)
+                self._accumulators[name] = {
+                    quantity: np.zeros(
+                        (self._beats_per_slice, *shape, *d),
+                        np.intp if quantity == "count" else dtype_float(),
+                    )
+                    for quantity in sorted(self._quantities[name])
+                }
+                self._reset_accumulators(name)
+            else:
+                # initialise array
+                arr = np.zeros((self._steps_per_slice, *shape, *d), dtype_float())
+                arr[:] = np.nan
+                self._arrays[name] = arr
 
             # process array mask
-            if spacedomain.land_sea_mask is None:
+            # (land elements are scattered with sea masked if compact)
+            if spacedomain.land_sea_mask is None or compact:
                 msk = None
             else:
                 msk = ~spacedomain.land_sea_mask
@@ -245,7 +366,7 @@ class RecordStream(object):
                         np.expand_dims(msk, axis=axes), (*spacedomain.shape, *d)
                     )
 
-            spc_shp = (*spacedomain.shape, *d) if d else spacedomain.shape
+            spc_shp = (*shape, *d) if d else shape
 
             self._spaceshapes[name] = spc_shp
             self._masks[name] = msk
@@ -257,17 +378,99 @@ class RecordStream(object):
         self._time_tracker = 0
         self._trigger_tracker = 0
 
+    def _reset_accumulators(self, name):
+        for quantity, accumulator in self._accumulators[name].items():
+            if quantity in ["sum", "count"]:
+                accumulator[:] = 0
+            else:
+                accumulator[:] = np.nan
+
     def update_record(self, name, value):
-        self._arrays[name][self._array_trackers[name], ...] = value
-        self._array_trackers[name] += 1
-        self._trigger_tracker += 1
+        if self.aggregation == "streaming":
+            self._accumulate(name, value, self._array_trackers[name])
+        else:
+            self._arrays[name][self._array_trackers[name], ...] = value
+        self._increment_trackers(name, 1)
+
+    def _update_record_from_source(self, name, aggregates, steps):
+        # aggregate values already aggregated over a beat of the source
+        # stream, which spans the given number of steps
+        accumulators = self._accumulators[name]
+        beat = self._array_trackers[name] // self._steps_per_beat
+
+        for quantity, accumulator in accumulators.items():
+            if quantity in ["sum", "count"]:
+                accumulator[beat] += aggregates[quantity]
+            elif quantity == "minimum":
+                np.fmin(accumulator[beat], aggregates[quantity], out=accumulator[beat])
+            elif quantity == "maximum":
+                np.fmax(accumulator[beat], aggregates[quantity], out=accumulator[beat])
+            else:  # quantity == "point"
+                accumulator[beat] = aggregates[quantity]
+
+        self._feed_children(name, beat, self._array_trackers[name] + steps)
+        self._increment_trackers(name, steps)
+
+    def _feed_children(self, name, beat, step):
+        # feed streams depending on this stream once beat is complete
+        if self._children[name] and (step % self._steps_per_beat == 0):
+            aggregates = {
+                quantity: accumulator[beat]
+                for quantity, accumulator in self._accumulators[name].items()
+            }
+            for stream in self._children[name]:
+                stream._update_record_from_source(
+                    name, aggregates, self._steps_per_beat
+                )
+
+    def _increment_trackers(self, name, steps):
+        self._array_trackers[name] += steps
+        self._trigger_tracker += steps
         if self._trigger_tracker == self._trigger:
             self.update_record_to_stream_file()
 
+    def _accumulate(self, name, value, step):
+        accumulators = self._accumulators[name]
+        beat = step // self._steps_per_beat
+
+        # consider underlying data with the precision of the stream
+        # (as would be the case if stored in a buffer) so that the
+        # aggregated values are identical across aggregation modes
+        value = np.asarray(np.ma.getdata(value), dtype=dtype_float())
+
+        if "sum" in accumulators or "count" in accumulators:
+            # NaN values do not contribute to the aggregation
+            valid = ~np.isnan(value)
+            if "sum" in accumulators:
+                np.add(
+                    accumulators["sum"][beat],
+                    value,
+                    out=accumulators["sum"][beat],
+                    where=valid,
+                )
+            if "count" in accumulators:
+                accumulators["count"][beat] += valid
+        if "minimum" in accumulators:
+            np.fmin(
+                accumulators["minimum"][beat],
+                value,
+                out=accumulators["minimum"][beat],
+            )
+        if "maximum" in accumulators:
+            np.fmax(
+                accumulators["maximum"][beat],
+                value,
+                out=accumulators["maximum"][beat],
+            )
+        if "point" in accumulators:
+            accumulators["point"][beat] = value
+
+        self._feed_children(name, beat, step + 1)
+
     def create_record_stream_file(self, filepath):
         self.file = filepath
 
-        with Dataset(self.file, "w") as f:
+        with netcdf_lock, Dataset(self.file, "w") as f:
             axes = self._spacedomain.axes
             # dimension for space and time lower+upper bounds
             f.createDimension("nv", 2)
@@ -323,50 +526,51 @@ class RecordStream(object):
                     )
 
     def update_record_to_stream_file(self):
-        with Dataset(self.file, "a") as f:
-            start = self._time_tracker * self._beats_per_slice
-            end = start + self._beats_per_slice
-
-            time_ = self._time[start:end]
-            time_bounds = self._time_bounds[start:end]
-            time_len = len(time_)
-
-            try:
-                # check whether all timestamps already in file
-                ts = cftime.time2index(time_, f.variables["time"])
+        start = self._time_tracker * self._beats_per_slice
+        end = start + self._beats_per_slice
+
+        time_ = self._time[start:end]
+        time_bounds = self._time_bounds[start:end]
+        time_len = len(time_)
+
+        values = {}
+        for name in self._records:
+            if self._masks[name] is not None:
+                msk = np.broadcast_to(
+                    np.expand_dims(self._masks[name], axis=0),
+                    (time_len, *self._spaceshapes[name]),
+                )
+            else:
+                msk = None
 
-            # will get a IndexError if time variable is empty
-            except IndexError:
-                # start expanding time dimension
-                ts = np.arange(0, self._beats_per_slice)
+            if self.aggregation == "streaming":
+                accumulators = self._accumulators[name]
 
-            # will get a ValueError if any timestamp not in time variable
-            except ValueError:
-                # keep expanding time dimension
-                try:
-                    start = cftime.time2index(time_[0], f.variables["time"])
-                    # at least one timestamp already in time variable
-                    ts = np.arange(start, start + time_len)
-                except ValueError:
-                    # no timestamp already in time variable
-                    ts = np.arange(
-                        len(f.variables["time"]), len(f.variables["time"]) + time_len
-                    )
-
-            f.variables["time"][ts] = time_
-            f.variables["time_bounds"][ts] = time_bounds
+                for method in self._methods[name]:
+                    name_method = "_".join([name, method])
 
-            for name, array in self._arrays.items():
+                    # retrieve required aggregation
+                    # (copy required because accumulators are reset below)
+                    if method == "mean":
+                        value = accumulators["sum"].copy()
+                        with np.errstate(invalid="ignore", divide="ignore"):
+                            np.divide(
+                                value,
+                                accumulators["count"],
+                                out=value,
+                                casting="unsafe",
+                            )
+                    else:
+                        value = accumulators[method].copy()
+
+                    values[name_method] = self._scatter(np.ma.array(value, mask=msk))
+
+                # reset accumulators for next slice
+                self._reset_accumulators(name)
+            else:
+                array = self._arrays[name]
                 arr = array.reshape((time_len, -1, *self._spaceshapes[name]))
 
-                if self._masks[name] is not None:
-                    msk = np.broadcast_to(
-                        np.expand_dims(self._masks[name], axis=0),
-                        (time_len, *self._spaceshapes[name]),
-                    )
-                else:
-                    msk = None
-
                 for method in self._methods[name]:
                     name_method = "_".join([name, method])
 
@@ -376,28 +580,71 @@ class RecordStream(object):
                     elif method == "sum":
                         value = np.nansum(arr, axis=1)
                     elif method == "point":
-                        value = arr[:, -1]
+                        # copy required because array is reset below
+                        value = arr[:, -1].copy()
                     elif method == "minimum":
                         value = np.nanmin(arr, axis=1)
                     elif method == "maximum":
                         value = np.nanmax(arr, axis=1)
 
-                    # store result in file
-                    f.variables[name_method][ts] = np.ma.array(value, mask=msk)
+                    values[name_method] = self._scatter(np.ma.array(value, mask=msk))
 
-                # reset array tracker to point to start of array again
-                self._array_trackers[name] = 0
                 # reset values in array
                 array[:] = np.nan
-            # increment time tracker to next writing time
-            self._time_tracker += 1
-            # reset trigger tracker
-            self._trigger_tracker = 0
+
+            # reset array tracker to point to start of array again
+            self._array_trackers[name] = 0
+        # increment time tracker to next writing time
+        self._time_tracker += 1
+        # reset trigger tracker
+        self._trigger_tracker = 0
+
+        # store results in file
+        if self.writer is None:
+            self._write_to_stream_file(time_, time_bounds, values)
+        else:
+            self.writer.submit(self._write_to_stream_file, time_, time_bounds, values)
+
+    def _scatter(self, values):
+        # spread land elements onto whole spacedomain if stored compact
+        if self._compact:
+            return self._spacedomain.unpack_land(values, self._land_axis)
+        return values
+
+    def _gather(self, values):
+        # keep land elements of whole spacedomain if stored compact
+        if self._compact:
+            return self._spacedomain.pack_land(values, self._land_axis)
+        return values
+
+    def _write_to_stream_file(self, time_, time_bounds, values):
+        with open_dataset(self.file, self.files) as f:
+            time_len = len(time_)
+
+            # check whether all timestamps already in file
+            index = get_time_index(f, self.files)
+            ts = [index.get(t) for t in time_]
+
+            if None in ts:
+                # keep expanding time dimension
+                start = ts[0]
+                if start is None:
+                    # no timestamp already in time variable
+                    start = len(index)
+                ts = np.arange(start, start + time_len)
+                for t, i in zip(time_, ts):
+                    index.set(t, i)
+
+            f.variables["time"][ts] = time_
+            f.variables["time_bounds"][ts] = time_bounds
+
+            for name_method, value in values.items():
+                f.variables[name_method][ts] = value
 
     def create_record_stream_dump(self, filepath):
         self.dump_file = filepath
 
-        with Dataset(self.dump_file, "w") as f:
+        with netcdf_lock, Dataset(self.dump_file, "w") as f:
             axes = self._spacedomain.axes
 
             # description
@@ -408,7 +655,10 @@ class RecordStream(object):
 
             # dimensions
             f.createDimension("time", None)
-            f.createDimension("length", self._steps_per_slice)
+            if self.aggregation == "streaming":
+                f.createDimension("beats", self._beats_per_slice)
+            else:
+                f.createDimension("length", self._steps_per_slice)
             for axis in axes:
                 f.createDimension(axis, len(getattr(self._spacedomain, axis)))
             f.createDimension("nv", 2)
@@ -418,8 +668,12 @@ class RecordStream(object):
             t.standard_name = "time"
             t.units = self._time_units
             t.calendar = self._time_calendar
-            h = f.createVariable("length", np.uint32, ("length",))
-            h[:] = np.arange(self._steps_per_slice)
+            if self.aggregation == "streaming":
+                h = f.createVariable("beats", np.uint32, ("beats",))
+                h[:] = np.arange(self._beats_per_slice)
+            else:
+                h = f.createVariable("length", np.uint32, ("length",))
+                h[:] = np.arange(self._steps_per_slice)
             for axis in axes:
                 coord = self._spacedomain.to_field().dim(axis)
                 # (domain coordinate)
@@ -442,15 +696,29 @@ class RecordStream(object):
                         dim_name = "_".join([name, "divisions", str(n + 1)])
                         f.createDimension(dim_name, v)
                         dims.append(dim_name)
-                    dims = ("time", "length", *axes, *dims)
+                    dims = (*axes, *dims)
                 else:
-                    dims = ("time", "length", *axes)
-
-                s = f.createVariable(
-                    name, dtype_float(), dims, fill_value=9.9692099683868690e36
-                )
-                s.standard_name = name
-                s.units = record.units
+                    dims = axes
+
+                if self.aggregation == "streaming":
+                    for quantity in self._accumulators[name]:
+                        s = f.createVariable(
+                            f"{name}_{quantity}",
+                            int if quantity == "count" else dtype_float(),
+                            ("time", "beats", *dims),
+                        )
+                        s.standard_name = name
+                        if quantity != "count":
+                            s.units = record.units
+                else:
+                    s = f.createVariable(
+                        name,
+                        dtype_float(),
+                        ("time", "length", *dims),
+                        fill_value=9.9692099683868690e36,
+                    )
+                    s.standard_name = name
+                    s.units = record.units
                 f.createVariable(f"{name}_tracker", int, ("time",))
 
             # stream-specific variables
@@ -458,29 +726,39 @@ class RecordStream(object):
             f.createVariable("trigger_tracker", int, ("time",))
 
     def update_record_stream_dump(self, timestamp):
-        with Dataset(self.dump_file, "a") as f:
-            try:
-                # check whether given snapshot already in file
-                t = cftime.time2index(timestamp, f.variables["time"])
-            # will get a IndexError if time variable is empty
-            # will get a ValueError if timestamp not in time variable
-            except (IndexError, ValueError):
+        # make sure stream file is up-to-date with dump
+        if self.writer is not None:
+            self.writer.flush()
+
+        with open_dataset(self.dump_file, self.files) as f:
+            # check whether given snapshot already in file
+            index = get_time_index(f, self.files)
+            t = index.get(timestamp)
+            if t is None:
                 # if not, extend time dimension
-                t = len(f.variables["time"])
+                t = index.append(timestamp)
                 f.variables["time"][t] = timestamp
 
             for name in self._records:
-                f.variables[name][t, ...] = self._arrays[name]
+                if self.aggregation == "streaming":
+                    for quantity, accumulator in self._accumulators[name].items():
+                        f.variables[f"{name}_{quantity}"][t, ...] = self._scatter(
+                            accumulator
+                        )
+                else:
+                    f.variables[name][t, ...] = self._scatter(self._arrays[name])
                 f.variables[f"{name}_tracker"][t] = self._array_trackers[name]
             f.variables["time_tracker"][t] = self._time_tracker
             f.variables["trigger_tracker"][t] = self._trigger_tracker
 
-    def load_record_stream_dump(self, filepath, datetime_, timedomain, spacedomain):
+    def load_record_stream_dump(
+        self, filepath, datetime_, timedomain, spacedomain, compact=False
+    ):
         self.dump_file = filepath
 
-        with Dataset(self.dump_file, "r") as f:
+        with netcdf_lock, Dataset(self.dump_file, "r") as f:
             # determine original simulation timedomain from dump start
-            self.initialise(timedomain, spacedomain)
+            self.initialise(timedomain, spacedomain, compact)
 
             # determine point in time to use from the dump
             if datetime_ is None:
@@ -504,8 +782,15 @@ class RecordStream(object):
             # retrieve each record values
             for name in self._records:
                 try:
-                    mask = f.variables[name][t, ...].mask
-                    self._arrays[name][~mask] = f.variables[name][t, ...].data[~mask]
+                    if self.aggregation == "streaming":
+                        for quantity, accumulator in self._accumulators[name].items():
+                            accumulator[:] = self._gather(
+                                f.variables[f"{name}_{quantity}"][t, ...]
+                            )
+                    else:
+                        values = self._gather(f.variables[name][t, ...])
+                        mask = np.ma.getmaskarray(values)
+                        self._arrays[name][~mask] = np.ma.getdata(values)[~mask]
                     self._array_trackers[name] = f.variables[
                         "_".join([name, "tracker"])
                     ][t]
@@ -0,0 +1,221 @@
+from os import path, sep, replace, getpid
+import hashlib
+import numpy as np
+from scipy import sparse
+from cfunits import Units
+
+from ..settings import atol, rtol
+
+# remapping operators already built in this process, keyed by the
+# fingerprint of their source and destination spacedomains
+_remaps = {}
+
+
+def get_remap(src_sd, dst_sd, src_fld, dst_fld, directory=None):
+    """Return the operator remapping values from the source to the
+    destination spacedomain, which is only built if it is neither
+    available in memory, nor cached in *directory* (if provided).
+    """
+    # regular grids nested into one another are remapped with block
+    # operations, which require neither ESMF nor any weights to cache
+    remap = BlockRemap.from_spacedomains(src_sd, dst_sd)
+    if remap is not None:
+        return remap
+
+    key = "-".join([fingerprint(src_sd), fingerprint(dst_sd)])
+
+    remap = _remaps.get(key)
+    if remap is None:
+        filepath = (
+            sep.join([directory, f"remap_{key}.npz"]) if directory is not None else None
+        )
+        if filepath is not None and path.exists(filepath):
+            remap = SparseRemap.from_file(filepath)
+        else:
+            remap = SparseRemap.from_fields(src_fld, dst_fld)
+            if filepath is not None:
+                remap.to_file(filepath)
+        _remaps[key] = remap
+
+    return remap
+
+
+def fingerprint(spacedomain):
+    # characterise spacedomain by what the conservative remapping
+    # weights depend on (i.e. kind, location, and extent of the grid
+    # cells, as well as which are masked)
+    digest = hashlib.sha256()
+    config = spacedomain.to_config()
+    for extra in ["land_sea_mask", "flow_direction", "cell_area"]:
+        config.pop(extra, None)
+    digest.update(repr(sorted(config.items())).encode())
+    for axis in ["Y", "X"]:
+        bounds = getattr(spacedomain, f"{axis}_bounds").array
+        digest.update(np.ascontiguousarray(bounds, np.float64).tobytes())
+    mask = spacedomain.land_sea_mask
+    if mask is not None:
+        digest.update(np.ascontiguousarray(mask, bool).tobytes())
+
+    return digest.hexdigest()[:16]
+
+
+class SparseRemap(object):
+    """SparseRemap applies conservative remapping weights, extracted
+    once from a `cf.RegridOperator`, as a sparse matrix-vector product
+    on the flattened (Y, X) values (or as a sparse matrix-matrix product
+    if several values are stacked along leading dimensions).
+    """
+
+    def __init__(self, weights, src_shape, dst_shape, dst_mask=None):
+        self.weights = sparse.csr_array(weights)
+        self.src_shape = tuple(src_shape)
+        self.dst_shape = tuple(dst_shape)
+        # destination cells receiving no contribution at all
+        self.dst_mask = (
+            None
+            if dst_mask is None or not np.any(dst_mask)
+            else np.reshape(dst_mask, self.dst_shape).astype(bool)
+        )
+
+    @classmethod
+    def from_fields(cls, src_fld, dst_fld):
+        operator = src_fld.regrids(dst_fld, "conservative", return_operator=True)
+        operator.tosparse()
+
+        # weights apply to the cells ordered as (Y, X) in both fields
+        src_shape = tuple(operator.src_shape)
+        dst_shape = tuple(operator.dst_shape)
+        if src_shape != src_fld.shape or dst_shape != dst_fld.shape:
+            raise RuntimeError(
+                f"remapping weights for shapes {src_shape} -> {dst_shape} "
+                f"incompatible with grids of shapes {src_fld.shape} -> "
+                f"{dst_fld.shape}"
+            )
+
+        return cls(operator.weights, src_shape, dst_shape, operator.dst_mask)
+
+    @classmethod
+    def from_file(cls, filepath):
+        with np.load(filepath) as f:
+            weights = sparse.csr_array(
+                (f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"])
+            )
+            dst_mask = f["dst_mask"] if f["dst_mask"].size else None
+            return cls(weights, f["src_shape"], f["dst_shape"], dst_mask)
+
+    def to_file(self, filepath):
+        # write to a temporary file first so that another model never
+        # reads a partially written cache file
+        temporary = f"{filepath}.{getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                data=self.weights.data,
+                indices=self.weights.indices,
+                indptr=self.weights.indptr,
+                shape=np.array(self.weights.shape),
+                src_shape=np.array(self.src_shape),
+                dst_shape=np.array(self.dst_shape),
+                dst_mask=(
+                    np.array([], bool) if self.dst_mask is None else self.dst_mask
+                ),
+            )
+        replace(temporary, filepath)
+
+    def __call__(self, values):
+        stack = np.shape(values)[: -len(self.src_shape)]
+        if stack:
+            values = np.reshape(values, (-1, self.weights.shape[-1])).T
+            values = (self.weights @ values).T
+        else:
+            values = self.weights @ np.reshape(values, -1)
+        values = values.reshape(stack + self.dst_shape)
+        if self.dst_mask is not None:
+            values = np.ma.array(
+                values, mask=np.broadcast_to(self.dst_mask, values.shape).copy()
+            )
+        return values
+
+
+class BlockRemap(object):
+    """BlockRemap remaps values between two regular grids of the same
+    extent nested into one another, where each cell of the coarser grid
+    is a block of cells of the finer grid, which makes conservative
+    remapping an area-weighted block average (from finer to coarser)
+    or a block replication (from coarser to finer).
+    """
+
+    def __init__(self, factors, coarsen, weights=None):
+        # number of cells of finer grid per cell of coarser grid along
+        # Y and X dimensions
+        self.factors = tuple(factors)
+        self.coarsen = coarsen
+        # area weights of finer cells normalised over each block,
+        # shaped as (Y, factor Y, X, factor X)
+        self.weights = weights
+
+    @classmethod
+    def from_spacedomains(cls, src_sd, dst_sd):
+        if type(src_sd) is not type(dst_sd):
+            return None
+
+        src_shape, dst_shape = src_sd.shape[-2:], dst_sd.shape[-2:]
+        if all(s >= d for s, d in zip(src_shape, dst_shape)):
+            fine, coarse, coarsen = src_sd, dst_sd, True
+        elif all(s <= d for s, d in zip(src_shape, dst_shape)):
+            fine, coarse, coarsen = dst_sd, src_sd, False
+        else:
+            return None
+
+        # check that the cells of the coarser grid are exactly made of
+        # blocks of cells of the finer grid
+        factors = []
+        for axis in ["Y", "X"]:
+            f_bounds = getattr(fine, f"{axis}_bounds").array
+            c_bounds = getattr(coarse, f"{axis}_bounds").array
+            n, r = divmod(f_bounds.shape[0], c_bounds.shape[0])
+            if r or not (
+                np.allclose(f_bounds[::n, 0], c_bounds[:, 0], rtol(), atol())
+                and np.allclose(f_bounds[n - 1 :: n, 1], c_bounds[:, 1], rtol(), atol())
+            ):
+                return None
+            factors.append(n)
+
+        weights = None
+        if coarsen and factors != [1, 1]:
+            weights = cls._block_weights(fine, factors)
+
+        return cls(factors, coarsen, weights)
+
+    @staticmethod
+    def _block_weights(grid, factors):
+        # use cell areas of finer grid if provided, otherwise, on a
+        # regular grid, only the Y dimension can make cell areas vary
+        # (i.e. on the sphere), where areas are proportional to the
+        # difference of the sine of the latitude bounds
+        if grid._cell_area is not None:
+            areas = np.asarray(grid.cell_area, np.float64)
+        else:
+            bounds = grid.Y_bounds
+            if bounds.Units.equivalent(Units("degrees")):
+                areas = np.abs(np.diff(np.sin(np.radians(bounds.array)), axis=-1))
+            else:
+                areas = np.abs(np.diff(bounds.array, axis=-1))
+            areas = np.broadcast_to(areas, grid.shape[-2:])
+
+        (ny, fy), (nx, fx) = [(s // f, f) for s, f in zip(areas.shape, factors)]
+        areas = areas.reshape(ny, fy, nx, fx)
+        return areas / areas.sum(axis=(1, 3), keepdims=True)
+
+    def __call__(self, values):
+        values = np.asarray(values)
+        stack = values.shape[:-2]
+        fy, fx = self.factors
+        if self.coarsen:
+            y, x = values.shape[-2:]
+            values = values.reshape(stack + (y // fy, fy, x // fx, fx))
+            if self.weights is None:
+                return values.sum(axis=(-3, -1))
+            return (values * self.weights).sum(axis=(-3, -1))
+        else:
+            return np.repeat(np.repeat(values, fy, axis=-2), fx, axis=-1)
@@ -3,6 +3,7 @@ from datetime import datetime
 import cftime
 import numpy as np
 
+from .io import netcdf_lock, open_dataset, get_time_index
 from ..settings import dtype_float
 
 
@@ -103,6 +104,17 @@ class State(object):
     def __repr__(self):
         return "%r" % self._slices
 
+    def view(self, index):
+        """Return a `State` whose values are views on the given spatial
+        window (index) of the values of this `State`.
+
+        The views remain in sync with this `State` as long as both are
+        incremented together.
+        """
+        state = object.__new__(State)
+        state._slices = [s[index] for s in self._slices]
+        return state
+
     def increment(self):
         """Increment forward in time the state values across its history.
 
@@ -112,27 +124,17 @@ class State(object):
         The least recent timestep is value is lost, while the new most
         recent timestep is initialised with a value of 0.
         """
-        # determine first index in the State
-        # (function of solver's history)
-        first_index = -len(self) + 1
-        # prepare the left-hand side for the permutation of views
-        lhs = [t for t in self]
-        # prepare the right-hand side for the permutation of views
-        rhs = [t for t in self.get_timestep(slice(first_index + 1, None))] + [
-            self.get_timestep(first_index)
-        ]
-        # carry out the permutation of views
-        # to avoid new object creations
-        lhs[:] = rhs[:]
-        # apply new list of views to the State
-        self._slices[:] = lhs
+        # carry out the permutation of views in place (the least recent
+        # view becomes the most recent) to avoid new object creations
+        slices = self._slices
+        slices.append(slices.pop(0))
 
         # re-initialise current timestep of State to zero
-        self.set_timestep(0, 0.0)
+        slices[-1][:] = 0.0
 
 
 def create_states_dump(filepath, states_info, solver_history, timedomain, spacedomain):
-    with Dataset(filepath, "w") as f:
+    with netcdf_lock, Dataset(filepath, "w") as f:
         axes = spacedomain.axes
 
         # description
@@ -187,16 +189,14 @@ def create_states_dump(filepath, states_info, solver_history, timedomain, spaced
             s.units = states_info[var]["units"]
 
 
-def update_states_dump(filepath, states, timestamp, solver_history):
-    with Dataset(filepath, "a") as f:
-        try:
-            # check whether given snapshot already in file
-            t = cftime.time2index(timestamp, f.variables["time"])
-        # will get a IndexError if time variable is empty
-        # will get a ValueError if timestamp not in time variable
-        except (IndexError, ValueError):
+def update_states_dump(filepath, states, timestamp, solver_history, files=None):
+    with open_dataset(filepath, files) as f:
+        # check whether given snapshot already in file
+        index = get_time_index(f, files)
+        t = index.get(timestamp)
+        if t is None:
             # if not, extend time dimension
-            t = len(f.variables["time"])
+            t = index.append(timestamp)
             f.variables["time"][t] = timestamp
 
         for state in states:
@@ -207,7 +207,7 @@ def update_states_dump(filepath, states, timestamp, solver_history):
 def load_states_dump(filepath, datetime_, states_info):
     states = {}
 
-    with Dataset(filepath, "r") as f:
+    with netcdf_lock, Dataset(filepath, "r") as f:
         f.set_always_mask(False)
         # determine point in time to use from the dump
         if datetime_ is None:
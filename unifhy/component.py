@@ -1,11 +1,15 @@
 import abc
+import hashlib
 from importlib import import_module
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from os import path, sep
+from os import path, sep, getpid
 import cf
 from cfunits import Units
 from numbers import Number
-from copy import deepcopy
+from datetime import timedelta
+from copy import copy, deepcopy
 import yaml
 
 from ._utils.state import (
@@ -20,9 +24,10 @@ from ._utils.record import (
     OutputRecord,
     RecordStream,
 )
+from ._utils.remap import fingerprint
 from .time import TimeDomain
 from . import space
-from .space import SpaceDomain, Grid
+from .space import SpaceDomain, Grid, GridTile, HaloExchange
 from .data import (
     DataSet,
     Variable,
@@ -241,6 +246,8 @@ class Component(metaclass=MetaComponent):
     _requires_flow_direction = False
     _requires_cell_area = False
 
+    _writes_outwards = False
+
     def __init__(
         self,
         saving_directory,
@@ -251,6 +258,12 @@ class Component(metaclass=MetaComponent):
         constants=None,
         records=None,
         io_slice=None,
+        record_aggregation=None,
+        tiling=None,
+        compact_land=False,
+        io_prefetch=None,
+        io_memory_budget=None,
+        input_cache=None,
     ):
         """**Instantiation**
 
@@ -389,6 +402,100 @@ class Component(metaclass=MetaComponent):
                 timesteps to read/write at once. If not set, its default
                 value is 100 (arbitrary).
 
+            record_aggregation: `str`, optional
+                The mode to use to aggregate the values of the records
+                over time. If not set, its default value is
+                ``'buffered'``.
+
+                ====================  ======================================
+                mode                  description
+                ====================  ======================================
+                ``'buffered'``        The values for each timestep are
+                                      stored in buffers holding *io_slice*
+                                      timesteps, and they are aggregated
+                                      once the buffers are full.
+
+                ``'streaming'``       The values for each timestep are
+                                      aggregated as they are received into
+                                      running accumulators (one per method
+                                      and recording period in a slice),
+                                      which requires less memory and
+                                      provides values identical to the
+                                      ``'buffered'`` mode.
+
+                ``'hierarchical'``    The values for each timestep are
+                                      aggregated as in the ``'streaming'``
+                                      mode, but only for the finest
+                                      recording temporal resolution of each
+                                      record, the coarser resolutions being
+                                      fed with the aggregated values of the
+                                      finest resolution they are a multiple
+                                      of. Note, values may differ from the
+                                      other modes within floating point
+                                      precision for ``'sum'`` and
+                                      ``'mean'``.
+                ====================  ======================================
+
+            tiling: pair of `int`, optional
+                The number of tiles to split the `Grid` of the
+                component into along its Y and X dimensions (in this
+                order), each tile being run concurrently in its own
+                thread. This requires the component to only perform
+                operations local to each spatial element, except for
+                the `Grid.route` method of its *spacedomain*, which
+                exchanges values between neighbouring tiles. If not
+                set, the component is run for the whole `Grid` at once.
+
+                *Parameter example:* ::
+
+                    tiling=(2, 3)
+
+            compact_land: `bool`, optional
+                Whether to only store and compute the land elements of
+                the `Grid` of the component (according to its
+                *land_sea_mask*). If set to `True`, the component
+                inputs, parameters, states, inwards, and outwards are
+                given as compact arrays where the Y and X dimensions
+                are replaced by a single dimension for the land elements
+                (see `Grid.pack_land`), which requires the component to
+                only perform operations local to each spatial element,
+                except for the `Grid.route` method of its *spacedomain*,
+                which accepts compact arrays. The arrays are only
+                scattered onto the whole `Grid` for the records and the
+                dumps. If not set, the default is `False`.
+
+            io_prefetch: `int`, optional
+                The number of time slices (of length *io_slice*) of the
+                dynamic input data to read ahead on a background thread
+                while the current time slice is being used, so that
+                reading overlaps with computing. The memory required to
+                hold the input data is multiplied by one plus this
+                number. If not set, its default value is 0 (i.e. each
+                time slice is only read when first needed).
+
+            io_memory_budget: `int`, optional
+                The memory (in bytes) that the time slices of the
+                dynamic input data (including the ones read ahead) and
+                of the records can use. If set, *io_slice* is ignored,
+                and the length of the time slice is instead derived from
+                this budget, the shape of the `Grid`, the data types,
+                and the number of dynamic inputs and records. The
+                length derived is given when printing the component.
+
+                *Parameter example:* ::
+
+                    io_memory_budget=2e9
+
+            input_cache: `str`, optional
+                The path to the directory where to cache the dynamic
+                input data once subset onto the *spacedomain* and the
+                *timedomain*. Each input is written once into a local
+                netCDF file chunked along time with *io_slice*, and
+                later components using the same source files (left
+                unmodified since), *spacedomain*, and *timedomain* read
+                this file directly instead. If not set, no cache is
+                used.
+
         """
         # check class definition attributes
         self._check_definition()
@@ -396,19 +503,81 @@ class Component(metaclass=MetaComponent):
         # space attributes
         self.spacedomain = spacedomain
 
+        # tiling attributes (to run tiles of the spacedomain concurrently)
+        self._tiling = None
+        if tiling is not None:
+            if not isinstance(spacedomain, Grid):
+                raise TypeError("tiling requires a Grid spacedomain")
+            tiling = tuple(int(t) for t in tiling)
+            if len(tiling) != 2 or not all(
+                0 < t <= n for t, n in zip(tiling, self.spaceshape[-2:])
+            ):
+                raise ValueError(
+                    f"tiling {tiling} incompatible with spacedomain shape "
+                    f"{self.spaceshape}"
+                )
+            self._tiling = tiling
+        self._plan_tiles = None
+        self._tile_exchange = None
+        self._tile_pool = None
+
+        # compact attributes (to only store and compute land elements)
+        self._compact_land = bool(compact_land)
+        if self._compact_land:
+            if not isinstance(spacedomain, Grid):
+                raise TypeError("compact_land requires a Grid spacedomain")
+            if spacedomain.land_sea_mask is None:
+                raise RuntimeError("compact_land requires a land sea mask")
+            if self._tiling is not None:
+                raise ValueError("compact_land cannot be combined with tiling")
+
         # data attributes
         # # dataset to keep whole data period pristine
         self.dataset = dataset
         # # dataset to subset whole data for given period
         self.datasubset = DataSet()
 
-        # time attribute
+        # input/output attributes (time slice derived from memory budget
+        # whenever the timedomain is set, if a budget is given)
         self._io_slice = 100 if io_slice is None else int(io_slice)
+        self._io_prefetch = 0 if io_prefetch is None else int(io_prefetch)
+        self._io_memory_budget = (
+            None if io_memory_budget is None else float(io_memory_budget)
+        )
+        self._input_cache = input_cache
+
+        # records attributes
+        self._record_aggregation = (
+            "buffered" if record_aggregation is None else str(record_aggregation)
+        )
+        if self._record_aggregation not in ["buffered", "streaming", "hierarchical"]:
+            raise ValueError(
+                f"record aggregation mode {self._record_aggregation} unknown"
+            )
+        self._record_objects = None
+        self._record_streams = None
+        self.records = records
+
+        # time attribute
         self._timedelta_in_seconds = None
         self._current_datetime = None
         self._datetime_array = None
         self.timedomain = timedomain
 
+        # call plan attributes (to run timesteps with minimal overhead)
+        self._plan_kwargs = None
+        self._plan_inputs = None
+        self._plan_inwards = None
+        self._plan_outwards = None
+        self._plan_records = None
+        self._plan_states = None
+
+        # block attributes (to run consecutive timesteps at once)
+        self._block_bounds = None
+        self._block_start = None
+        self._block_end = None
+        self._block = None
+
         # parameters attribute
         self._pristine_parameters = None
         self.parameters = parameters
@@ -416,11 +585,6 @@ class Component(metaclass=MetaComponent):
         # constants attribute
         self.constants = constants
 
-        # records attributes
-        self._record_objects = None
-        self._record_streams = None
-        self.records = records
-
         # states attribute
         self.states = {}
 
@@ -430,6 +594,7 @@ class Component(metaclass=MetaComponent):
         # directories and files
         self.saving_directory = saving_directory
         self.dump_file = None
+        self._files = None
 
         # special attribute to store information that can be communicated
         # between component methods (typically between `initialise` and `run`)
@@ -448,11 +613,14 @@ class Component(metaclass=MetaComponent):
     @timedomain.setter
     def timedomain(self, timedomain):
         self._check_timedomain(timedomain)
-        self._check_dataset_time(timedomain)
+        datetime_array = timedomain.time.datetime_array[:]
+        if self._io_memory_budget is not None:
+            self._derive_io_slice(timedomain)
+        self._check_dataset_time(timedomain, datetime_array)
         self._timedomain = timedomain
         self._timedelta_in_seconds = timedomain.timedelta.total_seconds()
-        self._current_datetime = timedomain.time.datetime_array[0]
-        self._datetime_array = timedomain.time.datetime_array[:]
+        self._current_datetime = datetime_array[0]
+        self._datetime_array = datetime_array
 
     @property
     def timedelta_in_seconds(self):
@@ -485,6 +653,12 @@ class Component(metaclass=MetaComponent):
         configuration of the Component as a `tuple` of `int`."""
         return self._spaceshape
 
+    @property
+    def compact_land(self):
+        """Return whether the Component only stores and computes the
+        land elements of its spacedomain as a `bool`."""
+        return self._compact_land
+
     @property
     def dataset(self):
         """Return the collection of variables forming the dataset for
@@ -569,15 +743,30 @@ class Component(metaclass=MetaComponent):
             else:
                 raise ValueError(f"{name} not available for {self._category} component")
 
-            for delta, methods in frequencies.items():
+            hierarchical = self._record_aggregation == "hierarchical"
+
+            for delta in sorted(frequencies) if hierarchical else frequencies:
                 # instantiate RecordStream if none for given timedelta yet
                 if delta not in self._record_streams:
                     self._record_streams[delta] = RecordStream(
-                        delta, writing_slice=self._io_slice
+                        delta,
+                        writing_slice=self._io_slice,
+                        aggregation=(
+                            "streaming" if hierarchical else self._record_aggregation
+                        ),
                     )
+                # in hierarchical mode, find the stream with the coarsest
+                # timedelta that is a divisor of the given timedelta, if
+                # any, to feed the given stream
+                source = None
+                if hierarchical:
+                    for d in sorted(frequencies, reverse=True):
+                        if d < delta and delta % d == timedelta(seconds=0):
+                            source = self._record_streams[d]
+                            break
                 # hold reference to record object in stream
                 self._record_streams[delta].add_record(
-                    self._record_objects[name], methods
+                    self._record_objects[name], frequencies[delta], source
                 )
 
     @property
@@ -643,7 +832,7 @@ class Component(metaclass=MetaComponent):
                             if isinstance(freq, str) and freq not in [
                                 "seasonal",
                                 "monthly",
-                                "daily",
+                                "day_of_year",
                             ]:
                                 raise TypeError(
                                     f"invalid frequency for {name} in "
@@ -782,7 +971,7 @@ class Component(metaclass=MetaComponent):
                     f"'{self.__class__.__name__}'"
                 )
 
-    def _check_dataset_time(self, timedomain):
+    def _check_dataset_time(self, timedomain, datetime_array):
         # check time compatibility for 'dynamic' input data
         for data_name in self._inputs_info:
             error = ValueError(
@@ -798,10 +987,38 @@ class Component(metaclass=MetaComponent):
                 error,
                 self._io_slice,
                 frequency=self._inputs_info[data_name].get("frequency"),
+                prefetch=self._io_prefetch,
+                datetime_array=datetime_array,
             )
 
+            if (
+                self._input_cache is not None
+                and self._inputs_info[data_name]["kind"] == "dynamic"
+            ):
+                self.datasubset[data_name] = self.datasubset[data_name].to_cache(
+                    self._input_cache, self._input_cache_tag(timedomain)
+                )
+
+    def _input_cache_tag(self, timedomain):
+        # characterise the domains onto which the input data is subset
+        digest = hashlib.sha256(fingerprint(self.spacedomain).encode())
+        digest.update(
+            np.ascontiguousarray(timedomain.bounds.array, np.float64).tobytes()
+        )
+        digest.update(f"{timedomain.units!r}:{timedomain.calendar}".encode())
+        return digest.hexdigest()[:16]
+
     @staticmethod
-    def _check_time(variable, timedomain, kind, error, reading_slice, frequency=None):
+    def _check_time(
+        variable,
+        timedomain,
+        kind,
+        error,
+        reading_slice,
+        frequency=None,
+        prefetch=0,
+        datetime_array=None,
+    ):
         field = variable.field
         filenames = variable.filenames
 
@@ -811,6 +1028,7 @@ class Component(metaclass=MetaComponent):
                     timedomain.subset_and_compare(field),
                     filenames,
                     reading_slice,
+                    prefetch,
                 )
             except RuntimeError:
                 raise error
@@ -830,8 +1048,18 @@ class Component(metaclass=MetaComponent):
             if field.construct("time").size != length:
                 raise error
 
-            # copy reference for climatologic input data
-            variable_subset = ClimatologicVariable(field, filenames)
+            # climatologic input data indexed for each timestep
+            variable_subset = ClimatologicVariable(
+                field,
+                filenames,
+                frequency,
+                (
+                    timedomain.time.datetime_array
+                    if datetime_array is None
+                    else datetime_array
+                ),
+                timedomain.calendar,
+            )
 
         else:  # kind == 'static':
             # copy reference for static input data
@@ -989,6 +1217,12 @@ class Component(metaclass=MetaComponent):
         """Return the outgoing information provided by the `Component`."""
         return deepcopy(self._outwards_info)
 
+    @property
+    def writes_outwards(self):
+        """Return `True` if the `Component` writes its outwards into the
+        buffers given by the framework, otherwise return `False`."""
+        return self._writes_outwards
+
     @classmethod
     def from_config(cls, cfg):
         # get relevant spacedomain subclass
@@ -1020,6 +1254,12 @@ class Component(metaclass=MetaComponent):
             constants=cfg.get("constants"),
             records=cfg.get("records"),
             io_slice=cfg.get("io_slice", None),
+            record_aggregation=cfg.get("record_aggregation", None),
+            tiling=cfg.get("tiling", None),
+            compact_land=cfg.get("compact_land", False),
+            io_prefetch=cfg.get("io_prefetch", None),
+            io_memory_budget=cfg.get("io_memory_budget", None),
+            input_cache=cfg.get("input_cache", None),
         )
 
     def to_config(self):
@@ -1093,6 +1333,12 @@ class Component(metaclass=MetaComponent):
             "constants": constants if constants else None,
             "records": self.records if self.records else None,
             "io_slice": self._io_slice,
+            "record_aggregation": self._record_aggregation,
+            "tiling": list(self._tiling) if self._tiling else None,
+            "compact_land": self._compact_land,
+            "io_prefetch": self._io_prefetch,
+            "io_memory_budget": self._io_memory_budget,
+            "input_cache": self._input_cache,
         }
         return cfg
 
@@ -1134,12 +1380,58 @@ class Component(metaclass=MetaComponent):
             + [f"    saving directory: {self.saving_directory}"]
             + [f"    timedomain: period: {self.timedomain.period}"]
             + [f"    spacedomain: shape: ({shape})"]
+            + (
+                [
+                    f"    io slice: {self._io_slice} timesteps "
+                    f"(memory budget: {self._io_memory_budget:g} bytes)"
+                ]
+                if self._io_memory_budget is not None
+                else []
+            )
             + (["    records:"] if records else [])
             + records
             + [")"]
         )
 
-    def initialise_(self, tag, overwrite):
+    def io_memory_per_step_(self, timedomain=None):
+        # memory (in bytes) required for one timestep in the time slices
+        # of the dynamic input data (including the ones read ahead) and
+        # of the records
+        timedomain = self.timedomain if timedomain is None else timedomain
+        memory = 0
+        for d, info in self._inputs_info.items():
+            if info["kind"] == "dynamic":
+                field = self.dataset[d].field
+                memory += (
+                    (1 + self._io_prefetch)
+                    * (field.size // field.construct("time").size)
+                    * field.dtype.itemsize
+                )
+        shape = self.spacedomain.land_shape if self._compact_land else self.spaceshape
+        for stream in self._record_streams.values():
+            memory += stream.memory_per_step(timedomain.timedelta, shape)
+        return memory
+
+    def _derive_io_slice(self, timedomain):
+        # derive the length of the time slice fitting in the budget
+        # (but no longer than the period of the timedomain)
+        memory = self.io_memory_per_step_(timedomain)
+        if memory:
+            self._io_slice = int(
+                min(max(self._io_memory_budget // memory, 1), timedomain.time.size)
+            )
+            for stream in self._record_streams.values():
+                stream.writing_slice = self._io_slice
+
+    def set_io_memory_budget_(self, io_memory_budget):
+        # derive the time slice from the given budget, and set the
+        # timedomain again for the dynamic input data to be read (and
+        # cached) with this time slice
+        self._io_memory_budget = float(io_memory_budget)
+        self.timedomain = self.timedomain
+
+    def initialise_(self, tag, overwrite, writer=None, files=None):
+
         # if states not already initialised, instantiate them
         if not self._initialised_states:
             self._instantiate_states()
@@ -1153,6 +1445,8 @@ class Component(metaclass=MetaComponent):
 
         # collect inputs for first time step (i.e. time index 0)
         inputs = {d: self.datasubset[d][0] for d in self._inputs_info}
+        if self._compact_land:
+            inputs = {d: self._compact_input(d, v) for d, v in inputs.items()}
 
         # reset time for data slices
         # (because of the input collection just above, the slices
@@ -1162,9 +1456,14 @@ class Component(metaclass=MetaComponent):
             self.datasubset[d].reset_time()
 
         # initialise component
-        self.initialise(**inputs, **self.parameters, **self.constants, **self.states)
+        self.initialise(
+            **inputs, **self._get_parameters(), **self.constants, **self.states
+        )
         self._initialised_states = True
 
+        # prepare calls to run for the timesteps to follow
+        self._compile_call_plan()
+
         # create dump file for given run
         self._initialise_states_dump(tag, overwrite)
 
@@ -1179,30 +1478,310 @@ class Component(metaclass=MetaComponent):
             # optionally create files and dump files
             self._create_stream_files_and_dumps(tag, overwrite)
 
+        self.attach_io_(writer, files)
+
+    def attach_io_(self, writer=None, files=None):
+        # assign manager (if any) to keep files open during run
+        self._files = files
+        # assign writer (if any) to delegate writing to stream files
+        # and manager (if any) to keep stream files open during run
+        if self.records:
+            for delta, stream in self._record_streams.items():
+                stream.writer = writer
+                stream.files = files
+
+    def _compile_call_plan(self):
+        # gather once what is needed to call 'run' repeatedly, so that
+        # only inputs and inwards need updating at each timestep (note,
+        # the keyword arguments are unpacked into a new dict for each
+        # call, so it is safe to update the same dict in place)
+        self._plan_kwargs = {
+            **self._get_parameters(),
+            **self.constants,
+            **self.states,
+        }
+        if not self._compact_land:
+            self._plan_inputs = tuple(
+                (d, self.datasubset[d].__getitem__) for d in self._inputs_info
+            )
+        else:
+            # land elements of static inputs are gathered once for all,
+            # and at each timestep otherwise
+            inputs = []
+            for d in self._inputs_info:
+                if self._inputs_info[d]["kind"] == "static":
+                    self._plan_kwargs[d] = self._compact_input(d, self.datasubset[d][0])
+                else:
+                    inputs.append((d, self._get_compact_input_function(d)))
+            self._plan_inputs = tuple(inputs)
+        self._plan_inwards = tuple(self._inwards_info)
+        self._plan_outwards = (
+            tuple(self._outwards_info) if self._writes_outwards else ()
+        )
+        self._plan_records = tuple(self._record_objects[n] for n in self._records)
+        self._plan_states = tuple(self.states.values())
+        self._plan_tiles = None
+        if self._tiling is not None:
+            self._compile_tiles()
+
+    def _compact(self, values, lead=0):
+        # gather the land elements of the values whose spatial dimensions
+        # are preceded by the given number of leading dimensions
+        return self.spacedomain.pack_land(values, lead + len(self.spaceshape) - 2)
+
+    def _compact_input(self, name, values, block=False):
+        # inputs feature a leading time dimension if not static and
+        # given for a block
+        lead = int(block and self._inputs_info[name]["kind"] != "static")
+        return self._compact(values, lead)
+
+    def _get_compact_input_function(self, name):
+        variable = self.datasubset[name]
+        if self._inputs_info[name]["kind"] == "climatologic":
+            # land elements of the part of the climatology used are
+            # gathered once for all, and only indexed at each timestep
+            climatology = self._compact(variable.climatology, lead=1)
+            indices = variable.indices
+
+            def get_compact_input(timeindex):
+                return climatology[indices[timeindex]]
+
+            return get_compact_input
+
+        get_input = variable.__getitem__
+
+        def get_compact_input(timeindex):
+            return self._compact(get_input(timeindex))
+
+        return get_compact_input
+
+    def _get_parameters(self):
+        # parameters as given to the component methods
+        if not self._compact_land:
+            return self.parameters
+        return {n: self._compact(p) for n, p in self.parameters.items()}
+
+    def _get_states_to_dump(self):
+        # states as stored in the dumps (i.e. on the whole spacedomain)
+        if not self._compact_land:
+            return self.states
+        return {
+            n: State(np.ma.stack([self.spacedomain.unpack_land(v) for v in s]))
+            for n, s in self.states.items()
+        }
+
+    def _compile_tiles(self):
+        # split Y and X dimensions into (almost) equal-length intervals
+        bounds = [
+            np.cumsum([0] + [len(a) for a in np.array_split(np.arange(n), t)])
+            for t, n in zip(self._tiling, self.spaceshape[-2:])
+        ]
+        self._tile_exchange = HaloExchange(int(np.prod(self._tiling)))
+
+        tiles = []
+        for y0, y1 in zip(bounds[0][:-1], bounds[0][1:]):
+            for x0, x1 in zip(bounds[1][:-1], bounds[1][1:]):
+                ys, xs = slice(y0, y1), slice(x0, x1)
+                window = (slice(None),) * (len(self.spaceshape) - 2) + (ys, xs)
+
+                # shallow copy of component standing for the tile, which
+                # shares its shelf, time, and datasets with the component
+                tile = copy(self)
+                tile._spacedomain = GridTile(
+                    self.spacedomain, ys, xs, self._tile_exchange
+                )
+                tile._spaceshape = tile._spacedomain.shape
+                tile._tiling = None
+                tile.states = {n: s.view(window) for n, s in self.states.items()}
+
+                kwargs = {
+                    **{n: p[window] for n, p in self.parameters.items()},
+                    **self.constants,
+                    **tile.states,
+                }
+                # inputs are sliced from the ones of the component
+                inputs = tuple((d, window) for d in self._inputs_info)
+                tiles.append((tile, kwargs, window, inputs))
+
+                # tile states must be incremented along with component states
+                self._plan_states += tuple(tile.states.values())
+
+        self._plan_tiles = tuple(tiles)
+
+    def plan_blocks_(self, dumping_timeindices):
+        # determine whether consecutive timesteps can be run at once,
+        # which requires the component to implement the optional
+        # 'run_block' method (see contributor documentation), not to
+        # depend on other components (i.e. no inwards), and not to
+        # record its states (only available at the end of a block)
+        self._block = None
+        if (
+            not hasattr(self, "run_block")
+            or self._inwards_info
+            or any(name in self._states_info for name in self._records)
+        ):
+            self._block_bounds = None
+            return
+
+        # blocks must not span across a dump (which needs the states at
+        # this time) nor across an input/output time slice
+        length = self.timedomain.time.size
+        self._block_bounds = np.union1d(
+            np.arange(self._io_slice, length, self._io_slice),
+            np.append(dumping_timeindices, length),
+        )
+
     def run_(self, timeindex, exchanger):
-        data = {}
+        if self._block_bounds is not None:
+            return self._run_from_block(timeindex)
+
+        kwargs = self._plan_kwargs
         # collect required input data from dataset
-        for d in self._inputs_info:
-            data[d] = self.datasubset[d][timeindex]
+        for d, get_input in self._plan_inputs:
+            kwargs[d] = get_input(timeindex)
 
         # determine current datetime in simulation
         self._current_datetime = self._datetime_array[timeindex]
 
         # collect required transfers from exchanger
-        for d in self._inwards_info:
-            data[d] = exchanger.get_transfer(d, self._category)
+        if self._plan_inwards:
+            kwargs.update(exchanger.get_transfers(self._plan_inwards, self._category))
+
+        # collect buffers to write outwards into from exchanger
+        if self._plan_outwards:
+            kwargs["outwards"] = exchanger.get_outwards_buffers(self._plan_outwards)
 
         # run simulation for the component
-        to_exchanger, outputs = self.run(
-            **self.parameters, **self.constants, **self.states, **data
-        )
+        if self._plan_tiles is None:
+            to_exchanger, outputs = self.run(**kwargs)
+        else:
+            to_exchanger, outputs = self._run_tiles(kwargs)
 
         # store variables to record
-        for name in self._records:
-            self._record_objects[name](self.states, to_exchanger, outputs)
+        states = self.states
+        for record in self._plan_records:
+            record(states, to_exchanger, outputs)
 
         # increment the component's states by one timestep
-        self.increment_states()
+        for state in self._plan_states:
+            state.increment()
+
+        return to_exchanger
+
+    def _run_tiles(self, kwargs):
+        # thread pool is created on first use (and re-created if used
+        # from a forked process, where the threads would not exist)
+        if self._tile_pool is None or self._tile_pool[0] != getpid():
+            self._tile_pool = (
+                getpid(),
+                ThreadPoolExecutor(
+                    max_workers=len(self._plan_tiles),
+                    thread_name_prefix=f"unifhy-{self._category}-tile",
+                ),
+            )
+        pool = self._tile_pool[1]
+
+        futures = []
+        for tile, tile_kwargs, window, inputs in self._plan_tiles:
+            for d, index in inputs:
+                tile_kwargs[d] = kwargs[d][index]
+            for d in self._plan_inwards:
+                tile_kwargs[d] = kwargs[d][window]
+            if self._plan_outwards:
+                tile_kwargs["outwards"] = {
+                    n: b[window] for n, b in kwargs["outwards"].items()
+                }
+            tile._current_datetime = self._current_datetime
+            futures.append(pool.submit(self._run_tile, tile, tile_kwargs))
+
+        # wait for all tiles to complete before raising any error
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            self._tile_exchange.barrier.reset()
+            # tiles released from the barrier are not the actual cause
+            raise next(
+                (e for e in errors if not isinstance(e, threading.BrokenBarrierError)),
+                errors[0],
+            )
+
+        # stitch tiles back together (directly into the buffers given
+        # for the outwards, if any)
+        windows = [window for _, _, window, _ in self._plan_tiles]
+        buffers = [kwargs.get("outwards", {}), {}]
+        return tuple(
+            {
+                name: self._stitch_tiles(
+                    windows,
+                    [result[i][name] for result in results],
+                    buffers[i].get(name),
+                )
+                for name in results[0][i]
+            }
+            for i in range(2)
+        )
+
+    def _run_tile(self, tile, kwargs):
+        try:
+            return tile.run(**kwargs)
+        except BaseException:
+            # release the other tiles possibly waiting for this one
+            self._tile_exchange.barrier.abort()
+            raise
+
+    def _stitch_tiles(self, windows, values, out=None):
+        extra = np.shape(values[0])[len(self.spaceshape) :]
+        if out is not None:
+            array = out
+        elif any(np.ma.isMaskedArray(v) for v in values):
+            array = np.ma.zeros(self.spaceshape + extra, np.result_type(values[0]))
+        else:
+            array = np.zeros(self.spaceshape + extra, np.result_type(values[0]))
+        for window, value in zip(windows, values):
+            # (tiles may have written their values in place already)
+            if not np.may_share_memory(value, array):
+                array[window] = value
+        return array
+
+    def _run_from_block(self, timeindex):
+        # determine current datetime in simulation
+        self._current_datetime = self._datetime_array[timeindex]
+
+        # run all timesteps until next block boundary at once
+        if self._block is None:
+            end = self._block_bounds[
+                np.searchsorted(self._block_bounds, timeindex, side="right")
+            ]
+            kwargs = self._plan_kwargs
+            for d in self._inputs_info:
+                kwargs[d] = self.datasubset[d].block(timeindex, end - timeindex)
+                if self._compact_land:
+                    kwargs[d] = self._compact_input(d, kwargs[d], block=True)
+
+            self._block = self.run_block(end - timeindex, **kwargs)
+            self._block_start = timeindex
+            self._block_end = end
+
+        # extract current timestep from block
+        i = timeindex - self._block_start
+        to_exchanger = {n: a[i] for n, a in self._block[0].items()}
+        outputs = {n: a[i] for n, a in self._block[1].items()}
+
+        # store variables to record
+        states = self.states
+        for record in self._plan_records:
+            record(states, to_exchanger, outputs)
+
+        # states already integrated over the whole block, so only
+        # increment them once at the end of the block
+        if timeindex == self._block_end - 1:
+            for state in self._plan_states:
+                state.increment()
+            self._block = None
 
         return to_exchanger
 
@@ -1210,20 +1789,27 @@ class Component(metaclass=MetaComponent):
         timestamp = self.timedomain.bounds.array[-1, -1]
         update_states_dump(
             sep.join([self.saving_directory, self.dump_file]),
-            self.states,
+            self._get_states_to_dump(),
             timestamp,
             self._solver_history,
+            self._files,
         )
-        self.finalise(**self.parameters, **self.constants, **self.states)
+        self.finalise(**self._get_parameters(), **self.constants, **self.states)
+
+        if self._tile_pool is not None:
+            self._tile_pool[1].shutdown()
+            self._tile_pool = None
 
     def _instantiate_states(self):
         # get a State object for each state and initialise to zero
+        # (only for the land elements if component only computes these)
+        shape = self.spacedomain.land_shape if self._compact_land else self.spaceshape
         for s in self._states_info:
             d = self._states_info[s].get("divisions")
             o = self._states_info[s].get("order", array_order())
             self.states[s] = State(
                 np.zeros(
-                    (self._solver_history + 1, *self.spaceshape, *d),
+                    (self._solver_history + 1, *shape, *d),
                     dtype_float(),
                     order=o,
                 ),
@@ -1280,6 +1866,8 @@ class Component(metaclass=MetaComponent):
         for s in self._states_info:
             if s in states:
                 o = self._states_info[s].get("order", array_order())
+                if self._compact_land:
+                    states[s] = self._compact(states[s], 1)
                 self.states[s] = State(states[s], order=o)
             else:
                 raise KeyError(
@@ -1298,15 +1886,16 @@ class Component(metaclass=MetaComponent):
         timestamp = self.timedomain.bounds.array[timeindex, 0]
         update_states_dump(
             sep.join([self.saving_directory, self.dump_file]),
-            self.states,
+            self._get_states_to_dump(),
             timestamp,
             self._solver_history,
+            self._files,
         )
 
     def _initialise_record_streams(self):
         for delta, stream in self._record_streams.items():
             # (re)initialise record stream time attributes
-            stream.initialise(self.timedomain, self.spacedomain)
+            stream.initialise(self.timedomain, self.spacedomain, self._compact_land)
 
     def _create_stream_files_and_dumps(self, tag, overwrite):
         for delta, stream in self._record_streams.items():
@@ -1401,6 +1990,7 @@ class Component(metaclass=MetaComponent):
                         at,
                         timedomain or self.timedomain,
                         self.spacedomain,
+                        self._compact_land,
                     )
                 )
         self._revived_streams = True
@@ -1972,6 +2562,9 @@ class DataComponent(Component):
         dataset,
         substituting_class,
         io_slice=None,
+        io_prefetch=None,
+        io_memory_budget=None,
+        input_cache=None,
     ):
         """**Instantiation**
 
@@ -2000,6 +2593,26 @@ class DataComponent(Component):
                 timesteps to read/write at once. If not set, its default
                 value is 100 (arbitrary).
 
+            io_prefetch: `int`, optional
+                The number of time slices (of length *io_slice*) of the
+                substitute data to read ahead on a background thread
+                while the current time slice is being used. If not set,
+                its default value is 0 (i.e. each time slice is only
+                read when first needed).
+
+            io_memory_budget: `int`, optional
+                The memory (in bytes) that the time slices of the
+                substitute data (including the ones read ahead) can
+                use. If set, *io_slice* is ignored, and the length of
+                the time slice is instead derived from this budget.
+
+            input_cache: `str`, optional
+                The path to the directory where to cache the substitute
+                data once subset onto the *spacedomain* and the
+                *timedomain*, for later components using the same source
+                files to read it directly instead. If not set, no cache
+                is used.
+
         """
         # store class being substituted for config
         self._substituting_class = substituting_class
@@ -2018,7 +2631,14 @@ class DataComponent(Component):
 
         # initialise as a Component
         super(DataComponent, self).__init__(
-            None, timedomain, spacedomain, dataset, io_slice=io_slice
+            None,
+            timedomain,
+            spacedomain,
+            dataset,
+            io_slice=io_slice,
+            io_prefetch=io_prefetch,
+            io_memory_budget=io_memory_budget,
+            input_cache=input_cache,
         )
 
     def __str__(self):
@@ -2047,6 +2667,9 @@ class DataComponent(Component):
             dataset=DataSet.from_config(cfg.get("dataset")),
             substituting_class=substituting_class,
             io_slice=cfg.get("io_slice", None),
+            io_prefetch=cfg.get("io_prefetch", None),
+            io_memory_budget=cfg.get("io_memory_budget", None),
+            input_cache=cfg.get("input_cache", None),
         )
 
     def to_config(self):
@@ -2061,6 +2684,9 @@ class DataComponent(Component):
                 "class": self._substituting_class.__name__,
             },
             "io_slice": self._io_slice,
+            "io_prefetch": self._io_prefetch,
+            "io_memory_budget": self._io_memory_budget,
+            "input_cache": self._input_cache,
         }
         return cfg
 
@@ -2069,6 +2695,9 @@ class DataComponent(Component):
         for d in self._inputs_info:
             self.datasubset[d].reset_time()
 
+        # prepare calls to run for the timesteps to follow
+        self._compile_call_plan()
+
     def dump_states(self, *args, **kwargs):
         pass
 
@@ -2081,6 +2710,9 @@ class DataComponent(Component):
     def run(self, *args, **kwargs):
         return {n: kwargs[n] for n in self._outwards_info}, {}
 
+    def run_block(self, timesteps, *args, **kwargs):
+        return {n: kwargs[n] for n in self._outwards_info}, {}
+
     def finalise(self, *args, **kwargs):
         pass
 
@@ -2170,7 +2802,8 @@ class NullComponent(Component):
         return cfg
 
     def initialise_(self, *args, **kwargs):
-        pass
+        # prepare calls to run for the timesteps to follow
+        self._compile_call_plan()
 
     def dump_states(self, *args, **kwargs):
         pass
@@ -2185,5 +2818,11 @@ class NullComponent(Component):
         null_array = np.zeros(self.spaceshape, np.float32)
         return {n: null_array for n in self._outwards_info}, {}
 
+    def run_block(self, timesteps, *args, **kwargs):
+        null_array = np.broadcast_to(
+            np.zeros(self.spaceshape, np.float32), (timesteps, *self.spaceshape)
+        )
+        return {n: null_array for n in self._outwards_info}, {}
+
     def finalise(self, *args, **kwargs):
         pass
@@ -1,10 +1,166 @@
+from collections import OrderedDict
 from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from os import path, sep, replace, getpid, listdir
+from glob import glob
+import hashlib
+import numpy as np
 import cf
 
+from ._utils.io import netcdf_lock, HyperslabReader, FileIndex
+from .settings import index_directory
+
+# thread pool to read time slices of dynamic variables ahead of their
+# use (a single thread is enough since reads are serialised anyway),
+# created on first use (and re-created if used from a forked process,
+# where the thread would not exist)
+_reader = None
+
+
+def _get_reader():
+    global _reader
+    if _reader is None or _reader[0] != getpid():
+        _reader = (
+            getpid(),
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="unifhy-reader"),
+        )
+    return _reader[1]
+
+
+def flush_reader():
+    # wait for all the reads already submitted to be completed (the
+    # single thread processes them in submission order)
+    if _reader is not None and _reader[0] == getpid():
+        _reader[1].submit(int).result()
+
+
+# fields most recently read in this process, keyed by the files (and
+# their modification time) they were read from, so that the variables
+# pointing at the same files share a single scan and aggregation (only
+# the latest scans are kept, least recently used ones being discarded,
+# so that fields from data sets no longer in use are released)
+_scans = OrderedDict()
+_scans_maxsize = 8
+
+
+def _read_fields(files, select=None):
+    filepaths = _expand_files(files)
+    if select is not None:
+        select = (select,) if isinstance(select, str) else tuple(select)
+        filepaths = _narrow_files(filepaths, select)
+
+    key = tuple((f, path.getmtime(f) if path.exists(f) else None) for f in filepaths)
+    with netcdf_lock:
+        scan = _scans.get(key)
+        if scan is None:
+            fields = (
+                cf.read(filepaths, aggregate={"relaxed_identities": True})
+                if filepaths
+                else []
+            )
+            # filenames may be dropped by cf-python after data access so
+            # store them as early as possible
+            scan = [(field, field.get_filenames()) for field in fields]
+            _scans[key] = scan
+            while len(_scans) > _scans_maxsize:
+                _scans.popitem(last=False)
+        else:
+            _scans.move_to_end(key)
+
+    return [
+        (field.copy(), filenames)
+        for field, filenames in scan
+        if select is None or field.match_by_identity(*select)
+    ]
+
+
+def _expand_files(files):
+    # resolve the local file names, wildcards, and directories (whose
+    # files are read non-recursively) into the file paths to read from
+    # (remote sources, e.g. OPeNDAP URLs, and names matching no local
+    # file are left untouched for cf-python to deal with)
+    filepaths = []
+    for name in [files] if isinstance(files, str) else files:
+        if "://" in name:
+            filepaths.append(name)
+            continue
+        local = path.abspath(path.expanduser(path.expandvars(name)))
+        if path.exists(local):
+            matches = [local]
+        elif any(c in local for c in "*?["):
+            matches = sorted(glob(local))
+        else:
+            matches = []
+        if not matches:
+            filepaths.append(name)
+        for match in matches:
+            if path.isdir(match):
+                filepaths.extend(
+                    sep.join([match, f])
+                    for f in sorted(listdir(match))
+                    if path.isfile(sep.join([match, f]))
+                )
+            else:
+                filepaths.append(match)
+    return filepaths
+
+
+# indices of the variables contained in the input data directories
+# already read in this process (keys are the directories)
+_indices = {}
+
+
+def _get_index(directory):
+    # (index is re-created if the directory where indices are persisted
+    # was changed since it was first used)
+    index = _indices.get(directory)
+    if index is None or index.index_directory != index_directory():
+        index = FileIndex(directory, index_directory())
+        _indices[directory] = index
+    return index
+
+
+def _narrow_files(filepaths, select):
+    # only keep the files containing variables that can be selected
+    # according to the index of their directory, unless a selection is
+    # not a plain identity, or is not found in any of the files
+    if not all(isinstance(s, str) for s in select):
+        return filepaths
+
+    indices, identities = {}, {}
+    for filepath in filepaths:
+        if path.isfile(filepath):
+            directory = path.dirname(filepath)
+            if directory not in indices:
+                indices[directory] = _get_index(directory)
+            identities[filepath] = indices[directory].identities(filepath)
+        else:
+            identities[filepath] = None
+    for index in indices.values():
+        index.save()
+
+    found = set().union(*[i for i in identities.values() if i is not None])
+    if not all(s in found for s in select):
+        return filepaths
+
+    return [
+        f
+        for f in filepaths
+        if identities[f] is None or any(s in identities[f] for s in select)
+    ]
+
 
 class DataSet(MutableMapping):
     """DataSet is a dictionary-like data structure which maps variable
     names to `Variable` objects.
+
+    The files are scanned and aggregated once for all the variables
+    read from the same files, and only the files containing the
+    variables selected are read, according to an index of the
+    variables in each file (persisted in the directory given to
+    `unifhy.index_directory`, if any). The variables of a `DataSet`
+    created from a configuration are only read from file when first
+    accessed.
     """
 
     def __init__(self, files=None, name_mapping=None, select=None):
@@ -69,14 +225,23 @@ class DataSet(MutableMapping):
         }
         """
         self._variables = {}
+        # variables only read from file on first access (keys are the
+        # variable names, values are the files and identity to read)
+        self._lazy = {}
         if files is not None:
             self.update(self._get_dict_variables_from_file(files, name_mapping, select))
 
     def __getitem__(self, key):
+        if key in self._lazy:
+            files, select = self._lazy.pop(key)
+            self.update(
+                self._get_dict_variables_from_file(files, {select: key}, select)
+            )
         return self._variables[key]
 
     def __setitem__(self, key, value):
         if isinstance(value, Variable):
+            self._lazy.pop(key, None)
             self._variables[key] = value
         else:
             raise TypeError(
@@ -85,27 +250,33 @@ class DataSet(MutableMapping):
             )
 
     def __delitem__(self, key):
-        del self._variables[key]
+        if key in self._lazy:
+            del self._lazy[key]
+        else:
+            del self._variables[key]
+
+    def __contains__(self, key):
+        return key in self._variables or key in self._lazy
 
     def __iter__(self):
-        return iter(self._variables)
+        return iter([*self._variables, *self._lazy])
 
     def __len__(self):
-        return len(self._variables)
+        return len(self._variables) + len(self._lazy)
 
     def __str__(self):
         return (
             "\n".join(
                 ["DataSet{"]
                 + [
-                    f"    {self._variables[v]!r}".replace("<CF Field: ", "")
+                    f"    {self[v]!r}".replace("<CF Field: ", "")
                     .replace(">", "")
-                    .replace(self._variables[v].identity(), v)
-                    for v in sorted(self._variables)
+                    .replace(self[v].identity(), v)
+                    for v in sorted(self)
                 ]
                 + ["}"]
             )
-            if self._variables
+            if len(self)
             else "DataSet{ }"
         )
 
@@ -174,11 +345,7 @@ class DataSet(MutableMapping):
     def _get_dict_variables_from_file(files, name_mapping, select):
         variables = {}
 
-        for field in cf.read(
-            files, aggregate={"relaxed_identities": True}, select=select
-        ):
-            filenames = field.get_filenames()
-
+        for field, filenames in _read_fields(files, select):
             # look for name to use as key in variables dict
             field_names = []
             name_in_mapping = None
@@ -237,11 +404,8 @@ class DataSet(MutableMapping):
         inst = cls()
         if cfg:
             for var in cfg:
-                inst.load_from_file(
-                    files=cfg[var]["files"],
-                    select=cfg[var]["select"],
-                    name_mapping={cfg[var]["select"]: var},
-                )
+                # defer reading until the variable is first accessed
+                inst._lazy[var] = (cfg[var]["files"], cfg[var]["select"])
         return inst
 
     def to_config(self):
@@ -273,10 +437,18 @@ class DataSet(MutableMapping):
         cfg = {}
 
         for var_name in self:
-            cfg[var_name] = {
-                "files": list(self[var_name].filenames),
-                "select": self[var_name].identity(),
-            }
+            if var_name in self._lazy:
+                # no need to read a variable not accessed yet
+                files, select = self._lazy[var_name]
+                cfg[var_name] = {
+                    "files": [files] if isinstance(files, str) else list(files),
+                    "select": select,
+                }
+            else:
+                cfg[var_name] = {
+                    "files": list(self[var_name].filenames),
+                    "select": self[var_name].identity(),
+                }
 
         return cfg
 
@@ -312,36 +484,203 @@ class StaticVariable(Variable):
     def __getitem__(self, index):
         return self._array
 
+    def block(self, index, length):
+        return self._array
+
     def reset_time(self):
         pass
 
 
-class ClimatologicVariable(StaticVariable):
-    # behaves as a StaticVariable until a reason arises not to
-    # (e.g. may want to return a specific season/month/day of year,
-    #  for now it returns the whole array)
-    pass
+class ClimatologicVariable(Variable):
+    # cumulative number of days in a leap year before each month
+    _days_before_month = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+    def __init__(self, field, filenames, frequency, datetimes, calendar="standard"):
+        super(ClimatologicVariable, self).__init__(field, filenames)
+        # position in the climatology for each timestep, precomputed
+        # so that no datetime arithmetic is required during the run
+        indices = self._index_climatology(
+            datetimes, frequency, field.construct("time").size, calendar
+        )
+        # only load in the part of the climatology used over the
+        # period, and index it instead of the whole climatology
+        used, self._indices = np.unique(indices, return_inverse=True)
+        self._array = field[used].array
+
+    @classmethod
+    def _index_climatology(cls, datetimes, frequency, length, calendar="standard"):
+        months = np.array([d.month for d in datetimes], dtype=int)
+        if frequency == "monthly":
+            return months - 1
+        if frequency == "seasonal":
+            # DJF-MAM-JJA-SON
+            return (months % 12) // 3
+
+        days = np.array([d.day for d in datetimes], dtype=int)
+        if calendar == "360_day":
+            # all months are 30 days long, so days of year do not match
+            # the ones of the other calendars
+            if frequency == "day_of_year":
+                raise ValueError(
+                    "climatologic frequency 'day_of_year' not supported for "
+                    "'360_day' calendar, use an integer frequency instead"
+                )
+            day_of_year = (months - 1) * 30 + days - 1
+            return day_of_year * length // 360
+
+        # day of year in a leap year (i.e. including February 29th)
+        day_of_year = np.minimum(cls._days_before_month[months - 1] + days - 1, 365)
+        if frequency == "day_of_year":
+            return day_of_year
+        # otherwise, climatology divides the year in equal parts
+        return day_of_year * length // 366
+
+    @property
+    def climatology(self):
+        return self._array
+
+    @property
+    def indices(self):
+        return self._indices
+
+    def __getitem__(self, index):
+        return self._array[self._indices[index]]
+
+    def block(self, index, length):
+        return self._array[self._indices[index : index + length]]
+
+    def reset_time(self):
+        pass
 
 
 class DynamicVariable(Variable):
-    def __init__(self, field, filenames, reading_slice):
+    def __init__(self, field, filenames, reading_slice, prefetch=0):
         super(DynamicVariable, self).__init__(field, filenames)
         self._steps_per_slice = reading_slice
         # time dimension, so load in data one time slice at a time
         self._current_slice = 0
         self._current_array = None
+        # number of time slices to read ahead on a background thread
+        # while the current one is being used, and mapping to store the
+        # pending reads (keys are slice numbers, values are futures)
+        self._prefetch = prefetch
+        self._slice_count = -(-field.construct("time").size // reading_slice)
+        self._pending = {}
+        self._pending_pid = None
+        # reader of time slices straight from the netCDF file, which is
+        # resolved on the first read, and only kept if it provides the
+        # same values as cf-python
+        self._hyperslab = None
+        self._hyperslab_resolved = False
+
+    @property
+    def reading_slice(self):
+        return self._steps_per_slice
 
     def __getitem__(self, index):
+        slice_index = self._load_slice(index)
+
+        return self._current_array[slice_index]
+
+    def block(self, index, length):
+        # consecutive timesteps must not span beyond the time slice
+        slice_index = self._load_slice(index)
+
+        return self._current_array[slice_index : slice_index + length]
+
+    def _load_slice(self, index):
         slice_index = index % self._steps_per_slice
 
         if slice_index == 0:
             i = self._current_slice
-            length = self._steps_per_slice
-            self._current_array = self._f[i * length : (i + 1) * length].array
+            future = self._pending.pop(i, None)
+            if future is not None and self._pending_pid == getpid():
+                self._current_array = future.result()
+            else:
+                self._current_array = self._read_slice(i)
             self._current_slice += 1
+            if self._prefetch:
+                self._prefetch_slices(i + 1)
+
+        return slice_index
+
+    def _read_slice(self, i):
+        length = self._steps_per_slice
+        if self._hyperslab is not None:
+            return self._hyperslab(i * length, (i + 1) * length)
+
+        with netcdf_lock:
+            array = self._f[i * length : (i + 1) * length].array
+
+        if not self._hyperslab_resolved:
+            self._hyperslab_resolved = True
+            hyperslab = HyperslabReader.from_field(self._f)
+            if hyperslab is not None:
+                values = hyperslab(i * length, (i + 1) * length)
+                if (
+                    type(values) is type(array)
+                    and values.dtype == array.dtype
+                    and values.shape == array.shape
+                    and np.array_equal(
+                        np.ma.getmaskarray(values), np.ma.getmaskarray(array)
+                    )
+                    and np.ma.allequal(values, array)
+                ):
+                    self._hyperslab = hyperslab
+
+        return array
+
+    def _prefetch_slices(self, start):
+        # reads pending in another process cannot be waited for here
+        if self._pending_pid != getpid():
+            self._pending = {}
+            self._pending_pid = getpid()
+
+        reader = _get_reader()
+        for i in range(start, min(start + self._prefetch, self._slice_count)):
+            if i not in self._pending:
+                self._pending[i] = reader.submit(self._read_slice, i)
+
+    def to_cache(self, directory, tag):
+        # materialise the field once into a local file chunked along
+        # time at the reading slice, identified by the source files,
+        # their modification time, the reading slice, and the given tag
+        # (characterising the domains onto which the field was subset),
+        # and return a variable reading from this file instead
+        sources = sorted(self._f.get_filenames())
+        if not sources:
+            return self
+
+        digest = hashlib.sha256()
+        for source in sources:
+            digest.update(f"{source}:{path.getmtime(source)}".encode())
+        digest.update(
+            f"{self._f.identity()}:{self._f.Units!r}:{self._steps_per_slice}:"
+            f"{tag}".encode()
+        )
+        filepath = sep.join([directory, f"input_{digest.hexdigest()[:16]}.nc"])
+
+        with netcdf_lock:
+            if not path.exists(filepath):
+                # write to a temporary file first so that another model
+                # never reads a partially written cache file
+                field = self._f.copy()
+                field.nc_set_hdf5_chunksizes(
+                    [min(self._steps_per_slice, field.shape[0]), *field.shape[1:]]
+                )
+                temporary = f"{filepath}.{getpid()}.tmp"
+                cf.write(field, temporary)
+                replace(temporary, filepath)
+            field = cf.read(filepath)[0]
 
-        return self._current_array[slice_index]
+        return DynamicVariable(
+            field, self._filenames, self._steps_per_slice, self._prefetch
+        )
 
     def reset_time(self):
         self._current_slice = 0
         self._current_array = None
+        # pending reads remain valid since slices are read from the
+        # same field, so they are kept for when time runs again
+        if self._prefetch:
+            self._prefetch_slices(0)
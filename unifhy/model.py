@@ -2,10 +2,17 @@ from importlib import import_module
 from os import sep
 from datetime import datetime, timedelta
 import re
+import multiprocessing
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import dask
 import yaml
 
 from ._utils import Exchanger, Clock, Compass
 from ._utils.exchanger import load_transfers_dump
+from ._utils.io import AsyncWriter, FileManager
 from .component import (
     SurfaceLayerComponent,
     SubSurfaceComponent,
@@ -16,6 +23,7 @@ from .component import (
     DataComponent,
     NullComponent,
 )
+from .data import flush_reader
 from .time import TimeDomain
 
 
@@ -38,6 +46,7 @@ class Model(object):
         nutrientsurfacelayer,
         nutrientsubsurface,
         nutrientopenwater,
+        io_memory_budget=None,
         _to_yaml=True,
     ):
         """**Instantiation**
@@ -79,6 +88,18 @@ class Model(object):
                 The `Component` responsible for the open water
                 compartment of any nutrient modelling.
 
+            io_memory_budget: `int`, optional
+                The memory (in bytes) that the time slices of the
+                dynamic input data and of the records of all the
+                components can use. If set, it is shared between the
+                components in proportion to the memory they require for
+                one timestep, which overrides their own *io_slice* and
+                *io_memory_budget*.
+
+                *Parameter example:* ::
+
+                    io_memory_budget=8e9
+
         """
         # assign components to model if of the correct type
         #: Return the surface layer component of the model.
@@ -105,6 +126,11 @@ class Model(object):
 
         self._check_components_plugging()
 
+        # share memory budget for input/output between components
+        self._io_memory_budget = None
+        if io_memory_budget is not None:
+            self._share_io_memory_budget(io_memory_budget)
+
         # assign identifier
         self.identifier = identifier
 
@@ -121,6 +147,14 @@ class Model(object):
         # define attribute exchanger for transfers between components
         self.exchanger = None
 
+        # define attribute writer for asynchronous output (if requested)
+        self._writer = None
+        # define attribute manager for files kept open during a run
+        self._files = None
+        # define attribute executor for concurrent components (if requested)
+        self._execution = "serial"
+        self._executor = None
+
     @property
     def identifier(self):
         """Return the name used to identify the model files."""
@@ -179,6 +213,26 @@ class Model(object):
                         f"not available from {src.category} component"
                     )
 
+    def _share_io_memory_budget(self, io_memory_budget):
+        # components are given shares in proportion to the memory they
+        # require for one timestep, so that they all end up with time
+        # slices of the same length
+        self._io_memory_budget = float(io_memory_budget)
+        components = [
+            self.surfacelayer,
+            self.subsurface,
+            self.openwater,
+            self.nutrientsurfacelayer,
+            self.nutrientsubsurface,
+            self.nutrientopenwater,
+        ]
+        memory = [component.io_memory_per_step_() for component in components]
+        for component, memory_ in zip(components, memory):
+            if memory_:
+                component.set_io_memory_budget_(
+                    self._io_memory_budget * memory_ / sum(memory)
+                )
+
     def __str__(self):
         return "\n".join(
             [f"{self.__class__.__name__}("]
@@ -235,6 +289,7 @@ class Model(object):
                 cfg["nutrientsubsurface"]
             ),
             nutrientopenwater=nutrientopenwater.from_config(cfg["nutrientopenwater"]),
+            io_memory_budget=cfg.get("io_memory_budget", None),
             _to_yaml=False,
         )
 
@@ -249,6 +304,7 @@ class Model(object):
             "nutrientsurfacelayer": self.nutrientsurfacelayer.to_config(),
             "nutrientsubsurface": self.nutrientsubsurface.to_config(),
             "nutrientopenwater": self.nutrientopenwater.to_config(),
+            "io_memory_budget": self._io_memory_budget,
         }
 
     @staticmethod
@@ -421,7 +477,7 @@ class Model(object):
                 if self.exchanger.transfers[tr].get("from") is None:
                     continue
                 else:
-                    self.exchanger.transfers[tr]["slices"][-1] = transfers[tr]
+                    self.exchanger.set_latest_transfer(tr, transfers[tr])
             else:
                 raise KeyError(
                     f"initial conditions for exchanger transfer '{tr}' " f"not in dump"
@@ -436,6 +492,8 @@ class Model(object):
         cycles=1,
         dumping_frequency=None,
         overwrite=True,
+        asynchronous_output=False,
+        execution="serial",
         _cycle_origin_no=0,
     ):
         """Run model spin-up simulation to initialise states of each
@@ -480,7 +538,54 @@ class Model(object):
                 feature the same name as files about to be written by
                 the model. If not provided, set to default True.
 
+            asynchronous_output: `bool`, optional
+                Whether the values aggregated by the record streams of
+                the `Components` are to be written to file by a
+                background thread, so that writing overlaps with
+                computations. Writing is blocked when too many values
+                are pending (i.e. back-pressure), it is flushed before
+                each snapshot is dumped and when the run completes, and
+                any writing error is raised in the main run loop. If
+                not provided, set to default False (i.e. values are
+                written synchronously).
+
+            execution: `str`, optional
+                The mode of execution of the `Components` due to run
+                at the same time. Since `Components` only see each
+                other's transfers from previous timesteps, they can be
+                run concurrently. If not provided, set to default
+                'serial'. See table below for details.
+
+                ===========  ==========================================
+                mode         description
+                ===========  ==========================================
+                'serial'     The `Components` are run one after the
+                             other.
+
+                'threads'    The `Components` are run in a pool of
+                             threads, which is only beneficial for
+                             `Components` releasing the Python global
+                             interpreter lock (e.g. relying on NumPy or
+                             on compiled extensions).
+
+                'processes'  The `Components` are run each in their
+                             own worker process (forked from the
+                             current process, so only available on
+                             platforms supporting it), the transfers
+                             being shared in memory across processes.
+                             Note, the `Components` are finalised in
+                             their worker process, and only their
+                             states are sent back to the current
+                             process.
+                ===========  ==========================================
+
+                Note, the transfers are merged in the same order
+                regardless of the mode of execution, so that results
+                are identical.
+
         """
+        self._check_execution(execution)
+
         # generate spin-up timedomains for each model component
         surfacelayer_timedomain = self.surfacelayer.get_spin_up_timedomain(start, end)
         subsurface_timedomain = self.subsurface.get_spin_up_timedomain(start, end)
@@ -505,6 +610,8 @@ class Model(object):
             "dumping_frequency": dumping_frequency
             if dumping_frequency is not None
             else None,
+            "asynchronous_output": asynchronous_output,
+            "execution": execution,
         }
         self._set_up_yaml_dumper()
         with open(
@@ -532,9 +639,13 @@ class Model(object):
         # start the spin up run(s)
         for cycle in range(cycles):
             tag = f"spinup{_cycle_origin_no + cycle + 1}"
-            self._initialise(tag, overwrite)
-            self._run(tag, dumping_frequency, overwrite)
-            self._finalise()
+            try:
+                self._initialise(tag, overwrite, asynchronous_output, execution)
+                self._run(tag, dumping_frequency, overwrite)
+                self._finalise()
+            except BaseException:
+                self._abort()
+                raise
 
         # restore main run attributes
         self.surfacelayer.timedomain = main_sl_td
@@ -544,7 +655,13 @@ class Model(object):
         self.nutrientsubsurface.timedomain = main_nss_td
         self.nutrientopenwater.timedomain = main_now_td
 
-    def simulate(self, dumping_frequency=None, overwrite=True):
+    def simulate(
+        self,
+        dumping_frequency=None,
+        overwrite=True,
+        asynchronous_output=False,
+        execution="serial",
+    ):
         """Run model simulation over period defined in its components'
         timedomains.
 
@@ -569,12 +686,61 @@ class Model(object):
                 feature the same name as files about to be written by
                 the model. If not provided, set to default True.
 
+            asynchronous_output: `bool`, optional
+                Whether the values aggregated by the record streams of
+                the `Components` are to be written to file by a
+                background thread, so that writing overlaps with
+                computations. Writing is blocked when too many values
+                are pending (i.e. back-pressure), it is flushed before
+                each snapshot is dumped and when the run completes, and
+                any writing error is raised in the main run loop. If
+                not provided, set to default False (i.e. values are
+                written synchronously).
+
+            execution: `str`, optional
+                The mode of execution of the `Components` due to run
+                at the same time. Since `Components` only see each
+                other's transfers from previous timesteps, they can be
+                run concurrently. If not provided, set to default
+                'serial'. See table below for details.
+
+                ===========  ==========================================
+                mode         description
+                ===========  ==========================================
+                'serial'     The `Components` are run one after the
+                             other.
+
+                'threads'    The `Components` are run in a pool of
+                             threads, which is only beneficial for
+                             `Components` releasing the Python global
+                             interpreter lock (e.g. relying on NumPy or
+                             on compiled extensions).
+
+                'processes'  The `Components` are run each in their
+                             own worker process (forked from the
+                             current process, so only available on
+                             platforms supporting it), the transfers
+                             being shared in memory across processes.
+                             Note, the `Components` are finalised in
+                             their worker process, and only their
+                             states are sent back to the current
+                             process.
+                ===========  ==========================================
+
+                Note, the transfers are merged in the same order
+                regardless of the mode of execution, so that results
+                are identical.
+
         """
+        self._check_execution(execution)
+
         # store spin up configuration in a separate yaml file
         simulate_config = {
             "dumping_frequency": dumping_frequency
             if dumping_frequency is not None
-            else None
+            else None,
+            "asynchronous_output": asynchronous_output,
+            "execution": execution,
         }
         self._set_up_yaml_dumper()
         with open(
@@ -584,18 +750,54 @@ class Model(object):
             yaml.dump(simulate_config, f, yaml.Dumper, sort_keys=False)
 
         # initialise, run, finalise model
-        self._initialise("run", overwrite)
-        self._run("run", dumping_frequency, overwrite)
-        self._finalise()
+        try:
+            self._initialise("run", overwrite, asynchronous_output, execution)
+            self._run("run", dumping_frequency, overwrite)
+            self._finalise()
+        except BaseException:
+            self._abort()
+            raise
+
+    @staticmethod
+    def _check_execution(execution):
+        if execution not in ["serial", "threads", "processes"]:
+            raise ValueError(f"execution mode {execution} unknown")
+        if execution == "processes" and (
+            "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            raise RuntimeError(
+                f"execution mode {execution} not supported on this platform"
+            )
+
+    def _initialise(
+        self, tag, overwrite, asynchronous_output=False, execution="serial"
+    ):
+        self._execution = execution
+
+        # set up manager responsible for keeping files open during run
+        self._files = FileManager()
+
+        # set up writer responsible for asynchronous output (if any)
+        self._writer = AsyncWriter() if asynchronous_output else None
+
+        # set up executor responsible for running components concurrently
+        # (if requested)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=6, thread_name_prefix="unifhy-component")
+            if execution == "threads"
+            else None
+        )
 
-    def _initialise(self, tag, overwrite):
         # initialise components' states
-        self.surfacelayer.initialise_(tag, overwrite)
-        self.subsurface.initialise_(tag, overwrite)
-        self.openwater.initialise_(tag, overwrite)
-        self.nutrientsurfacelayer.initialise_(tag, overwrite)
-        self.nutrientsubsurface.initialise_(tag, overwrite)
-        self.nutrientopenwater.initialise_(tag, overwrite)
+        for component in [
+            self.surfacelayer,
+            self.subsurface,
+            self.openwater,
+            self.nutrientsurfacelayer,
+            self.nutrientsubsurface,
+            self.nutrientopenwater,
+        ]:
+            component.initialise_(tag, overwrite, self._writer, self._files)
 
     def _run(self, tag, dumping_frequency=None, overwrite=True):
         # set up compass responsible for mapping across components
@@ -646,18 +848,20 @@ class Model(object):
             # of the existing instance because time or space information
             # may have been changed for one or more components
             self.exchanger.set_up(clock, compass)
-        self.exchanger.initialise_(tag, overwrite)
+        self.exchanger.initialise_(tag, overwrite, self._files)
+
+        # let components run consecutive timesteps at once where possible
+        components = [getattr(self, category) for category in clock.categories]
+        for category, component in zip(clock.categories, components):
+            component.plan_blocks_(clock.get_dumping_timeindices(category))
+
+        # run components each in their own process (if requested)
+        if self._execution == "processes":
+            self._run_processes(clock, components)
+            return
 
         # run components
-        for (
-            run_surfacelayer,
-            run_subsurface,
-            run_openwater,
-            run_nutrientsurfacelayer,
-            run_nutrientsubsurface,
-            run_nutrientopenwater,
-            dumping,
-        ) in clock:
+        for *running, dumping in clock:
             to_exchanger = {}
 
             if dumping:
@@ -680,67 +884,246 @@ class Model(object):
                 self.nutrientopenwater.dump_states(ti)
                 self.nutrientopenwater.dump_record_streams(ti)
                 self.exchanger.dump_transfers(clock.get_current_timestamp())
-
-            if run_surfacelayer:
-                to_exchanger.update(
-                    self.surfacelayer.run_(
-                        clock.get_current_timeindex("surfacelayer"),
-                        self.exchanger,
-                    )
+                # make sure snapshot is on disk in case run dies later
+                self._files.sync()
+
+            # run components due at this time in category order
+            due = [
+                (component, clock.get_current_timeindex(category))
+                for category, component, run in zip(
+                    clock.categories, components, running
                 )
+                if run
+            ]
 
-            if run_subsurface:
-                to_exchanger.update(
-                    self.subsurface.run_(
-                        clock.get_current_timeindex("subsurface"),
-                        self.exchanger,
-                    )
-                )
+            if self._executor is None or len(due) < 2:
+                for component, timeindex in due:
+                    to_exchanger.update(component.run_(timeindex, self.exchanger))
+            else:
+                # components only get transfers from previous time, so
+                # they can run concurrently, and their transfers are
+                # merged in category order to remain deterministic
+                futures = [
+                    self._executor.submit(component.run_, timeindex, self.exchanger)
+                    for component, timeindex in due
+                ]
+                try:
+                    for future in futures:
+                        to_exchanger.update(future.result())
+                except BaseException:
+                    # do not start components not yet running, the
+                    # run is going to be aborted
+                    for future in futures:
+                        future.cancel()
+                    raise
 
-            if run_openwater:
-                to_exchanger.update(
-                    self.openwater.run_(
-                        clock.get_current_timeindex("openwater"),
-                        self.exchanger,
-                    )
-                )
+            self.exchanger.update_transfers(to_exchanger)
 
-            if run_nutrientsurfacelayer:
-                to_exchanger.update(
-                    self.nutrientsurfacelayer.run_(
-                        clock.get_current_timeindex("nutrientsurfacelayer"),
-                        self.exchanger,
-                    )
-                )
+    def _run_processes(self, clock, components):
+        # transfers must be in shared memory before forking processes
+        self.exchanger.share_transfers_()
+
+        # make sure that no write or read is pending (hence no lock
+        # held) when forking processes
+        if self._writer is not None:
+            self._writer.flush()
+        flush_reader()
+
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(len(components) + 1)
+        results = context.Queue()
+
+        processes = [
+            context.Process(
+                target=self._run_process,
+                args=(category, component, clock, barrier, results),
+                name=f"unifhy-{category}",
+                daemon=True,
+            )
+            for category, component in zip(clock.categories, components)
+        ]
 
-            if run_nutrientsubsurface:
-                to_exchanger.update(
-                    self.nutrientsubsurface.run_(
-                        clock.get_current_timeindex("nutrientsubsurface"),
-                        self.exchanger,
-                    )
+        try:
+            for process in processes:
+                process.start()
+
+            # follow the processes along the clock to dump the transfers
+            # and to keep the same order of transfer views as them
+            try:
+                for *running, dumping in clock:
+                    if dumping:
+                        self.exchanger.dump_transfers(clock.get_current_timestamp())
+                        # make sure snapshot is on disk in case run dies later
+                        self._files.sync()
+
+                    # wait for components to run, then for transfers to
+                    # be updated
+                    barrier.wait()
+                    for component, run in zip(components, running):
+                        if run:
+                            for name in component.outwards_info:
+                                self.exchanger.rotate_transfer(name)
+                    barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+
+            # collect final states of components, or error(s) raised
+            outcomes = {}
+            while len(outcomes) < len(processes):
+                try:
+                    category, error, states = results.get(timeout=1)
+                    outcomes[category] = (error, states)
+                except queue.Empty:
+                    for process in processes:
+                        category = process.name.split("-", 1)[-1]
+                        if process.exitcode is not None and category not in outcomes:
+                            outcomes[category] = (
+                                f"process exited with code {process.exitcode}",
+                                None,
+                            )
+
+            # (only reporting processes interrupted by a failure in
+            # another process if no other error is available)
+            errors = [
+                f"{category} component: {error}"
+                for category, (error, states) in outcomes.items()
+                if error not in [None, "interrupted"]
+            ] or [
+                f"{category} component: {error}"
+                for category, (error, states) in outcomes.items()
+                if error is not None
+            ]
+            if errors:
+                raise RuntimeError(
+                    "run in worker process(es) failed\n" + "\n".join(errors)
                 )
 
-            if run_nutrientopenwater:
-                to_exchanger.update(
-                    self.nutrientopenwater.run_(
-                        clock.get_current_timeindex("nutrientopenwater"),
-                        self.exchanger,
+            # bring final states of components back into this process
+            for category, component in zip(clock.categories, components):
+                states = outcomes[category][1]
+                for s in states:
+                    for slice_, value in zip(component.states[s], states[s]):
+                        slice_[:] = value
+        finally:
+            barrier.abort()
+            for process in processes:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            self.exchanger.unshare_transfers_()
+
+    def _run_process(self, category, component, clock, barrier, results):
+        try:
+            # thread pools of parent process do not survive the fork, so
+            # data must be read without relying on them
+            dask.config.set(scheduler="synchronous")
+
+            # files and writer must not be shared with parent process
+            files = FileManager()
+            writer = AsyncWriter() if self._writer is not None else None
+            component.attach_io_(writer, files)
+
+            outwards = set(component.outwards_info)
+            index = clock.categories.index(category)
+
+            for *running, dumping in clock:
+                run = running[index]
+
+                if dumping:
+                    ti = clock.get_current_timeindex(category)
+                    component.dump_states(ti)
+                    component.dump_record_streams(ti)
+                    # make sure snapshot is on disk in case run dies later
+                    files.sync()
+
+                if run:
+                    to_exchanger = component.run_(
+                        clock.get_current_timeindex(category), self.exchanger
                     )
-                )
-
-            self.exchanger.update_transfers(to_exchanger)
+                    if not outwards.issubset(to_exchanger):
+                        raise RuntimeError(
+                            f"outwards {sorted(outwards - set(to_exchanger))} "
+                            f"not returned by {category} component"
+                        )
+
+                # wait for components to run (i.e. to be done reading
+                # transfers), then update transfers (only the producing
+                # process sets values, the others only follow the time
+                # incrementing of the transfer views)
+                barrier.wait()
+                for other, other_run in zip(clock.categories, running):
+                    if not other_run:
+                        continue
+                    if other == category:
+                        for name in outwards:
+                            self.exchanger.set_transfer(name, to_exchanger[name])
+                    else:
+                        for name in getattr(self, other).outwards_info:
+                            self.exchanger.rotate_transfer(name)
+                barrier.wait()
+
+            if writer is not None:
+                writer.close()
+            component.finalise_()
+            files.close()
+
+            states = {
+                s: [v.copy() for v in component.states[s]] for s in component.states
+            }
+            results.put((category, None, states))
+        except threading.BrokenBarrierError:
+            # another process failed, it reports its own error
+            results.put((category, "interrupted", None))
+        except BaseException:
+            barrier.abort()
+            results.put((category, traceback.format_exc(), None))
 
     def _finalise(self):
-        # finalise components
-        self.surfacelayer.finalise_()
-        self.subsurface.finalise_()
-        self.openwater.finalise_()
-        self.nutrientsurfacelayer.finalise_()
-        self.nutrientsubsurface.finalise_()
-        self.nutrientopenwater.finalise_()
+        # release threads running components concurrently (if any)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        # flush pending asynchronous output (if any)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        # finalise components (unless already done in their process)
+        if self._execution != "processes":
+            self.surfacelayer.finalise_()
+            self.subsurface.finalise_()
+            self.openwater.finalise_()
+            self.nutrientsurfacelayer.finalise_()
+            self.nutrientsubsurface.finalise_()
+            self.nutrientopenwater.finalise_()
         # finalise model
         self.exchanger.finalise_()
+        # close files kept open during run
+        self._files.close()
+        self._files = None
+
+    def _abort(self):
+        # release executor, writer, and files after a run died partway,
+        # while making sure not to mask the error that made the run die
+        # (components still running are waited for, pending ones were
+        # cancelled when the error was caught)
+        if self._executor is not None:
+            try:
+                self._executor.shutdown()
+            except Exception:
+                pass
+            self._executor = None
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        if self._files is not None:
+            try:
+                self._files.close()
+            except Exception:
+                pass
+            self._files = None
 
     def resume(self, tag, at=None):
         """Resume model spin up or main simulation run on latest
@@ -875,6 +1258,8 @@ class Model(object):
             start = datetime.strptime(str(cfg["start"]), "%Y-%m-%d %H:%M:%S")
             end = datetime.strptime(str(cfg["end"]), "%Y-%m-%d %H:%M:%S")
             dumping_frequency = cfg["dumping_frequency"]
+            asynchronous_output = cfg.get("asynchronous_output", False)
+            execution = cfg.get("execution", "serial")
 
             # resume spin up cycle according to the latest dump found
             if at == end:
@@ -891,6 +1276,8 @@ class Model(object):
                     cycles=1,
                     dumping_frequency=dumping_frequency,
                     overwrite=False,
+                    asynchronous_output=asynchronous_output,
+                    execution=execution,
                     _cycle_origin_no=cycle_no - 1,
                 )
             # start any potential additional spin up cycle
@@ -901,6 +1288,8 @@ class Model(object):
                     cycles=cfg["cycles"] - cycle_no,
                     dumping_frequency=dumping_frequency,
                     overwrite=False,
+                    asynchronous_output=asynchronous_output,
+                    execution=execution,
                     _cycle_origin_no=cycle_no,
                 )
         else:  # method == 'simulate'
@@ -929,4 +1318,9 @@ class Model(object):
                 component.timedomain = remaining_td
 
             # resume simulation run
-            self.simulate(dumping_frequency=cfg["dumping_frequency"], overwrite=False)
+            self.simulate(
+                dumping_frequency=cfg["dumping_frequency"],
+                overwrite=False,
+                asynchronous_output=cfg.get("asynchronous_output", False),
+                execution=cfg.get("execution", "serial"),
+            )
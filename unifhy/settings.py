@@ -46,9 +46,42 @@ def array_order(value=None):
     return settings_["ORDER"]
 
 
+def index_directory(value=None):
+    """Set or get the directory where to persist the indices of the
+    variables contained in the input data directories.
+
+    When a `DataSet` is given netCDF files, the identities of the
+    variables they contain are indexed per data directory, so that only
+    the files containing the variables selected need to be read. These
+    indices are always kept in memory for the session. If an index
+    directory is set, each index is also saved there (as a netCDF file
+    named after a hash of the path of the data directory), so that it
+    can be reused by other sessions or processes. Nothing is ever
+    written into the data directories themselves.
+
+    :Parameters:
+
+        value: `str`, optional
+            The path to the directory where to persist the indices. An
+            empty string can be given to unset the index directory
+            again. If not provided, the setting is left unchanged.
+
+    :Returns:
+
+        `str` or `None`
+            The directory where the indices are persisted, or `None`
+            if they are only kept in memory (which is the default).
+
+    """
+    if value is not None:
+        settings_["INDEX_DIRECTORY"] = str(value) if value else None
+    return settings_["INDEX_DIRECTORY"]
+
+
 # configuring default values
 atol(1e-8)
 rtol(1e-5)
 decr(12)
 dtype_float(np.float64)
 array_order("C")
+index_directory("")
@@ -1,4 +1,5 @@
 import abc
+import threading
 import numpy as np
 from copy import deepcopy
 import re
@@ -32,6 +33,7 @@ class SpaceDomain(metaclass=abc.ABCMeta):
         # optional land sea mask attributes
         self._land_sea_mask = None
         self._land_sea_mask_field = None
+        self._land_index = None
 
     @property
     @abc.abstractmethod
@@ -422,6 +424,148 @@ class Grid(SpaceDomain):
 
         self._land_sea_mask = mask
 
+        # precompute the flat indices of the land elements to gather
+        # them into/scatter them from compact arrays
+        self._land_index = np.flatnonzero(mask)
+
+    @property
+    def land_shape(self):
+        """Return the shape of the arrays compacted to the land elements
+        of the `Grid` as a `tuple` of `int` (i.e. the Y and X axes are
+        replaced by a single axis for the land elements). If no
+        `land_sea_mask` is set, return `None`.
+
+        **Examples**
+
+        >>> import numpy
+        >>> grid = LatLonGrid.from_extent_and_resolution(
+        ...     latitude_extent=(51, 55),
+        ...     latitude_resolution=1,
+        ...     longitude_extent=(-2, 1),
+        ...     longitude_resolution=1
+        ... )
+        >>> print(grid.land_shape)
+        None
+        >>> mask = grid.to_field()
+        >>> mask.set_data(numpy.array([[0, 1, 1],
+        ...                            [1, 1, 0],
+        ...                            [0, 1, 0],
+        ...                            [0, 0, 0]]))
+        >>> grid.land_sea_mask = mask
+        >>> print(grid.land_shape)
+        (5,)
+        """
+        if self._land_index is None:
+            return None
+        return (*self.shape[:-2], self._land_index.size)
+
+    def pack_land(self, values, axis=None):
+        """Gather the values of the land elements of the `Grid` into a
+        compact array (i.e. where the Y and X axes are replaced by a
+        single axis for the land elements).
+
+        :Parameters:
+
+            values: `numpy.ndarray`
+                The values to compact, whose Y and X axes must be
+                consecutive and of the same length as the `Grid` ones.
+
+            axis: `int`, optional
+                The position of the Y axis in *values*. If not provided,
+                the position of the Y axis in the `Grid` is used.
+
+        :Returns:
+
+            `numpy.ndarray`
+                The values of the land elements.
+
+        **Examples**
+
+        >>> import numpy
+        >>> grid = LatLonGrid.from_extent_and_resolution(
+        ...     latitude_extent=(51, 55),
+        ...     latitude_resolution=1,
+        ...     longitude_extent=(-2, 1),
+        ...     longitude_resolution=1
+        ... )
+        >>> mask = grid.to_field()
+        >>> mask.set_data(numpy.array([[0, 1, 1],
+        ...                            [1, 1, 0],
+        ...                            [0, 1, 0],
+        ...                            [0, 0, 0]]))
+        >>> grid.land_sea_mask = mask
+        >>> values = numpy.arange(12).reshape(4, 3)
+        >>> print(grid.pack_land(values))
+        [1 2 3 4 7]
+        """
+        if self._land_index is None:
+            raise RuntimeError("method 'pack_land' requires a land sea mask")
+        axis = len(self.shape) - 2 if axis is None else axis
+
+        values = np.ma.getdata(values)
+        shape = np.shape(values)
+        values = np.reshape(values, (*shape[:axis], -1, *shape[axis + 2 :]))
+
+        return np.take(values, self._land_index, axis=axis)
+
+    def unpack_land(self, values, axis=None):
+        """Scatter the values of a compact array (i.e. only featuring
+        the land elements of the `Grid`) back into an array of the
+        shape of the `Grid` where the sea elements are masked.
+
+        :Parameters:
+
+            values: `numpy.ndarray`
+                The compact values to scatter.
+
+            axis: `int`, optional
+                The position of the land elements axis in *values*. If
+                not provided, the position of the Y axis in the `Grid`
+                is used.
+
+        :Returns:
+
+            `numpy.ma.MaskedArray`
+                The values for all elements of the `Grid`.
+
+        **Examples**
+
+        >>> import numpy
+        >>> grid = LatLonGrid.from_extent_and_resolution(
+        ...     latitude_extent=(51, 55),
+        ...     latitude_resolution=1,
+        ...     longitude_extent=(-2, 1),
+        ...     longitude_resolution=1
+        ... )
+        >>> mask = grid.to_field()
+        >>> mask.set_data(numpy.array([[0, 1, 1],
+        ...                            [1, 1, 0],
+        ...                            [0, 1, 0],
+        ...                            [0, 0, 0]]))
+        >>> grid.land_sea_mask = mask
+        >>> print(grid.unpack_land(numpy.array([1, 2, 3, 4, 7])))
+        [[-- 1 2]
+         [3 4 --]
+         [-- 7 --]
+         [-- -- --]]
+        """
+        if self._land_index is None:
+            raise RuntimeError("method 'unpack_land' requires a land sea mask")
+        axis = len(self.shape) - 2 if axis is None else axis
+
+        values = np.ma.getdata(values)
+        shape = np.shape(values)
+        flat = (*shape[:axis], self._land_sea_mask.size, *shape[axis + 1 :])
+        index = (slice(None),) * axis + (self._land_index,)
+
+        array = np.zeros(flat, np.result_type(values))
+        array[index] = values
+        mask = np.ones(flat, bool)
+        mask[index] = False
+
+        shape = (*shape[:axis], *self._land_sea_mask.shape, *shape[axis + 1 :])
+        return np.ma.array(array.reshape(shape), mask=mask.reshape(shape))
+
     @property
     def flow_direction(self):
         """The information necessary to move any variable laterally
@@ -923,6 +1067,15 @@ class Grid(SpaceDomain):
                 "method 'route' requires setting " "property 'flow_direction'"
             )
 
+        # values compacted to the land elements need to be scattered
+        # onto the grid to be routed (with zeros for the sea elements),
+        # and gathered again afterwards
+        if self._land_index is not None and values_to_route.shape == self.land_shape:
+            values_routed, values_out = self.route(
+                np.ma.getdata(self.unpack_land(values_to_route))
+            )
+            return self.pack_land(values_routed), self.pack_land(values_out)
+
         # check that values_to_route has the same shape as flow_direction
         if not self.flow_direction.shape[:-1] == values_to_route.shape:
             raise RuntimeError(
@@ -2442,6 +2595,165 @@ class Grid(SpaceDomain):
         return self.__class__.from_config(cfg)
 
 
+class GridTile(object):
+    """GridTile stands in for a `Grid` when a `Component` is run tile by
+    tile (see *tiling* parameter of `Component`).
+
+    It is a rectangular window over the Y and X dimensions of the
+    `Grid`. Its *shape*, *land_sea_mask*, *flow_direction*, and
+    *cell_area* are the ones of the window, and its *route* method
+    exchanges a one-cell halo with the neighbouring tiles, while any
+    other attribute is the one of the whole `Grid`.
+    """
+
+    def __init__(self, grid, y_slice, x_slice, exchange):
+        self._grid = grid
+        self._window = (..., y_slice, x_slice)
+        self._exchange = exchange
+
+        # determine the indices of the tile and of its one-cell halo
+        # in the whole grid (wrapping around like `Grid.route` does)
+        y, x = grid.shape[-2:]
+        rows = np.arange(y_slice.start - 1, y_slice.stop + 1) % y
+        cols = np.arange(x_slice.start - 1, x_slice.stop + 1) % x
+        self._halo = (..., rows[:, np.newaxis], cols[np.newaxis, :])
+
+        # pre-process routing masks of tile (with halo for the ones
+        # used to determine where values are routed from)
+        self._flow_direction = None
+        self._routing_out_mask = None
+        self._routing_masks = {}
+        if grid.flow_direction is not None:
+            self._flow_direction = grid.flow_direction[..., y_slice, x_slice, :]
+            self._routing_out_mask = grid._routing_out_mask[self._window]
+            for key, mask in grid._routing_masks.items():
+                self._routing_masks[key] = mask[self._halo]
+
+    def __getattr__(self, name):
+        if name == "_grid":
+            raise AttributeError(name)
+        return getattr(self._grid, name)
+
+    @property
+    def shape(self):
+        return self._grid.shape[:-2] + tuple(
+            s.stop - s.start for s in self._window[-2:]
+        )
+
+    @property
+    def land_sea_mask(self):
+        mask = self._grid.land_sea_mask
+        return None if mask is None else mask[self._window]
+
+    @property
+    def flow_direction(self):
+        return self._flow_direction
+
+    @property
+    def cell_area(self):
+        return self._grid.cell_area[self._window]
+
+    def route(self, values_to_route):
+        """Route the given values as `Grid.route` does, except that
+        values coming from the neighbouring tiles are collected through
+        a halo exchange, so it must be called by all the tiles.
+        """
+        # check whether method can be used
+        if self.flow_direction is None:
+            raise RuntimeError(
+                "method 'route' requires setting " "property 'flow_direction'"
+            )
+
+        # check that values_to_route has the same shape as flow_direction
+        if not self.flow_direction.shape[:-1] == values_to_route.shape:
+            raise RuntimeError(
+                "shape mismatch between 'values_to_route' "
+                "and 'flow_direction' in 'route' method"
+            )
+
+        # share values with the other tiles, and wait for all of them
+        # to have shared theirs before collecting the halo
+        data, mask_ = self._exchange.buffers(
+            self._grid.flow_direction.shape[:-1], values_to_route.dtype
+        )
+        data[self._window] = np.ma.getdata(values_to_route)
+        mask_[self._window] = np.ma.getmaskarray(values_to_route)
+        self._exchange.barrier.wait()
+
+        halo = data[self._halo]
+        if np.ma.isMaskedArray(values_to_route):
+            halo = np.ma.array(halo, mask=mask_[self._halo])
+
+        # wait for all tiles to have collected their halo before the
+        # values can be overwritten by a subsequent call
+        self._exchange.barrier.wait()
+
+        # initialise routed and out arrays depending on mask/no-mask
+        if np.ma.is_masked(self.flow_direction):
+            mask = self.flow_direction.mask[..., 0]
+            values_routed = np.ma.array(
+                np.zeros(values_to_route.shape, values_to_route.dtype),
+                mask=mask,
+            )
+            values_out = np.ma.array(
+                np.zeros(values_to_route.shape, values_to_route.dtype),
+                mask=mask,
+            )
+        else:
+            mask = None
+            values_routed = np.zeros(values_to_route.shape, values_to_route.dtype)
+            values_out = np.zeros(values_to_route.shape, values_to_route.dtype)
+        # if no mask, keep as is, if not, take logical negation of it
+        mask = None if mask is None else ~mask
+
+        # collect the values routed towards outside the domain
+        out_mask = self._routing_out_mask
+        if np.ma.is_masked(self.flow_direction):
+            values_out[out_mask & mask] = values_to_route[out_mask & mask]
+        else:
+            values_out[out_mask] = values_to_route[out_mask]
+
+        # perform the routing using the routing mask, where the values
+        # moved into the tile are read from the halo
+        y, x = values_to_route.shape[-2:]
+        # Y-wards movement
+        for j in [-1, 0, 1]:
+            # X-wards movement
+            for i in [-1, 0, 1]:
+                routing_mask = self._routing_masks[(j, i)]
+                values_routed[mask] += (halo * routing_mask)[
+                    ..., 1 - j : 1 - j + y, 1 - i : 1 - i + x
+                ][mask]
+
+        return values_routed, values_out
+
+
+class HaloExchange(object):
+    """HaloExchange holds the values shared between the tiles of a
+    `Grid` when they are routing values (see `GridTile`), as well as
+    the barrier synchronising the tiles.
+    """
+
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties)
+        self._lock = threading.Lock()
+        self._data = None
+        self._mask = None
+
+    def buffers(self, shape, dtype):
+        # (re)allocate buffers if required (first tile to arrive does it
+        # for all tiles because all tiles route the same values)
+        with self._lock:
+            if (
+                self._data is None
+                or self._data.shape != shape
+                or self._data.dtype != dtype
+            ):
+                self._data = np.zeros(shape, dtype)
+                self._mask = np.zeros(shape, bool)
+        return self._data, self._mask
+
+
 class LatLonGrid(Grid):
     """This class characterises the spatial dimension for a `Component`
     as a regular grid on a spherical domain whose coordinates are